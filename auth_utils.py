@@ -1,15 +1,16 @@
+import csv
 import os
 
-import pandas as pd
 import streamlit as st
 
 ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
 
 
 def cargar_celulas_disponibles():
+    # Con csv en lugar de pandas: login.py importa este módulo y no debe cargar pandas
     if os.path.exists(ARCHIVO_SELECCION):
-        df = pd.read_csv(ARCHIVO_SELECCION)
-        return sorted(df["Celula"].dropna().unique().tolist())
+        with open(ARCHIVO_SELECCION, newline="", encoding="utf-8-sig") as f:
+            return sorted({fila["Celula"] for fila in csv.DictReader(f) if fila.get("Celula")})
     return []
 
 
@@ -69,8 +70,15 @@ def requiere_celulas_asignadas():
     return celulas
 
 
+def celulas_a_cargar():
+    """Células a las que limitar la carga de datos: None (todas) para admin, las asignadas para usuarios."""
+    if es_admin():
+        return None
+    return requiere_celulas_asignadas()
+
+
 def filtrar_celulas_permitidas(celulas):
-    celulas = [c for c in celulas if c not in ["nan", "obsoleta"] and pd.notna(c)]
+    celulas = [c for c in celulas if c not in ["nan", "obsoleta"] and c is not None and c == c]
     if es_admin():
         return celulas
     asignadas = requiere_celulas_asignadas()
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from memo_utils import memo_en_disco
+
+# Niveles que forman el backlog de deuda técnica (se ignora "info")
+COLUMNAS_BUGS_BACKLOG = ["bugs_blocker", "bugs_critical", "bugs_major", "bugs_minor"]
+
+# Líneas base para el % de eliminación del backlog
+BASE_PRIMER_ENERO = "primer_enero"
+BASE_ENERO_ANUAL = "enero_anual"
+BASE_MOVIL = "movil"
+
+DESCRIPCION_BASES = {
+    BASE_PRIMER_ENERO: "primer enero disponible",
+    BASE_ENERO_ANUAL: "enero de cada año",
+    BASE_MOVIL: "mismo mes del año anterior",
+}
+
+# Líneas base que necesitan al menos un enero en la serie de la célula
+BASES_ENERO = (BASE_PRIMER_ENERO, BASE_ENERO_ANUAL)
+
+
+@memo_en_disco()
+def bugs_mensuales(df_historico, columnas=None):
+    """Suma de bugs por célula y mes con la columna 'Total Bugs', ordenada por célula y mes."""
+    columnas = [c for c in (columnas or COLUMNAS_BUGS_BACKLOG) if c in df_historico.columns]
+    df = df_historico.dropna(subset=["Mes"])
+    mensual = (
+        df.groupby(["Celula", pd.to_datetime(df["Mes"]).dt.to_period("M")])[columnas]
+        .sum()
+        .reset_index()
+    )
+    mensual["Mes"] = mensual["Mes"].dt.to_timestamp()
+    mensual["Total Bugs"] = mensual[columnas].sum(axis=1)
+    return mensual.sort_values(["Celula", "Mes"]).reset_index(drop=True)
+
+
+def bases_disponibles(mensual):
+    """Líneas base aplicables a la serie (la primera es la de por defecto): sin enero solo la móvil."""
+    tiene_enero = (mensual["Mes"].dt.month == 1).any()
+    return [base for base in DESCRIPCION_BASES if tiene_enero or base not in BASES_ENERO]
+
+
+def _linea_base(mensual, base, ventana):
+    """Total de bugs de referencia para cada fila (NaN si la fila no tiene base o es la base)."""
+    es_enero = mensual["Mes"].dt.month == 1
+    total = mensual["Total Bugs"]
+
+    if base == BASE_MOVIL:
+        # Mismo mes `ventana` meses antes por calendario (no `ventana` filas antes): un mes
+        # faltante deja sin base solo al mes que le corresponde
+        anterior = mensual[["Celula", "Mes", "Total Bugs"]].assign(
+            Mes=mensual["Mes"] + pd.DateOffset(months=ventana)
+        )
+        return mensual[["Celula", "Mes"]].merge(anterior, on=["Celula", "Mes"], how="left")["Total Bugs"]
+
+    if base == BASE_ENERO_ANUAL:
+        anio = mensual["Mes"].dt.year
+        valor_enero = total.where(es_enero).groupby([mensual["Celula"], anio]).transform("max")
+        return valor_enero.where(~es_enero)
+
+    # Primer enero de cada célula: aplica a los meses posteriores
+    mes_base = mensual["Mes"].where(es_enero).groupby(mensual["Celula"]).transform("min")
+    valor_base = total.where(mensual["Mes"] == mes_base).groupby(mensual["Celula"]).transform("max")
+    return valor_base.where(mensual["Mes"] > mes_base)
+
+
+@memo_en_disco()
+def tendencia_bugs(mensual, base=BASE_PRIMER_ENERO, ventana=12):
+    """Agrega 'Factor crecimiento bugs' y '% eliminación backlog deuda técnica' para todas las células.
+
+    El factor es la diferencia de 'Total Bugs' contra el mes anterior disponible de la célula.
+    El % de eliminación es (base - actual) / base * 100 con la línea base elegida
+    (primer enero, enero de cada año o `ventana` meses antes), redondeado hacia arriba
+    desde .5 como en el resto del dashboard; es NaN si no hay base o la base es 0.
+    """
+    mensual = mensual.sort_values(["Celula", "Mes"]).reset_index(drop=True)
+    mensual["Factor crecimiento bugs"] = mensual.groupby("Celula", sort=False)["Total Bugs"].diff()
+
+    valor_base = _linea_base(mensual, base, ventana).astype(float)
+    valor_base = valor_base.where(valor_base != 0)
+    eliminacion = (valor_base - mensual["Total Bugs"]) / valor_base * 100
+    # + 0.0 evita mostrar "-0%"
+    mensual["% eliminación backlog deuda técnica"] = np.trunc(eliminacion + 0.5) + 0.0
+    return mensual
+
+
+def comparativo_celulas(tendencia, mes=None):
+    """Última fila (o la del mes indicado) de cada célula para comparar todas las células."""
+    if mes is not None:
+        tendencia = tendencia[tendencia["Mes"] == pd.Timestamp(mes)]
+    return tendencia.groupby("Celula", sort=True).tail(1).reset_index(drop=True)
+
+
+@memo_en_disco()
+def variacion_bugs_proyectos(df_historico, columnas=None):
+    """Variación de bugs de cada proyecto respecto a su mes anterior, para todas las células.
+
+    Una sola pasada: se ordena por (Celula, NombreProyecto, Mes) y cada fila se compara con
+    la anterior si pertenece al mismo proyecto. Devuelve solo filas con mes anterior, con
+    columnas Total_Bugs, Bugs_Mes_Anterior y Variacion_Bugs (enteros).
+    """
+    columnas = [c for c in (columnas or COLUMNAS_BUGS_BACKLOG) if c in df_historico.columns]
+    df = df_historico[["Celula", "NombreProyecto", "Mes"] + columnas].dropna(subset=["Mes"])
+    df = df.sort_values(["Celula", "NombreProyecto", "Mes"], kind="stable").reset_index(drop=True)
+    df[columnas] = df[columnas].fillna(0)
+    df["Total_Bugs"] = df[columnas].sum(axis=1)
+
+    mismo_proyecto = (
+        df["Celula"].eq(df["Celula"].shift()) & df["NombreProyecto"].eq(df["NombreProyecto"].shift())
+    )
+    df["Bugs_Mes_Anterior"] = df["Total_Bugs"].shift().where(mismo_proyecto)
+    df = df[mismo_proyecto].copy()
+    df["Variacion_Bugs"] = df["Total_Bugs"] - df["Bugs_Mes_Anterior"]
+
+    enteros = columnas + ["Total_Bugs", "Bugs_Mes_Anterior", "Variacion_Bugs"]
+    df[enteros] = df[enteros].astype(int)
+    return df.reset_index(drop=True)
+
+
+def top_variaciones(variacion, n=None, por=None, incremento=True, mes=None):
+    """Mayores incrementos (o reducciones con incremento=False) de bugs.
+
+    mes limita a un mes; por=None devuelve el top global, por='Celula' o por='Mes' el top
+    de cada grupo. n=None devuelve todas las filas ordenadas.
+    """
+    filas = variacion if mes is None else variacion[variacion["Mes"] == pd.Timestamp(mes)]
+    filas = filas[filas["Variacion_Bugs"] > 0] if incremento else filas[filas["Variacion_Bugs"] < 0]
+    filas = filas.sort_values("Variacion_Bugs", ascending=not incremento, kind="stable")
+    if n is None:
+        return filas
+    if por is None:
+        return filas.head(n)
+    return filas.groupby(por, sort=False).head(n)
@@ -0,0 +1,160 @@
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+_PATRON_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Peso de un término que coincide con el token completo frente a uno que solo es prefijo
+PESO_EXACTO = 2.0
+PESO_PREFIJO = 1.0
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes, para que 'celula' encuentre 'Célula'."""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto):
+    return _PATRON_TOKEN.findall(normalizar_texto(texto))
+
+
+class IndiceTexto:
+    """Índice invertido token -> filas sobre todas las columnas de un DataFrame.
+
+    Las filas se identifican por su posición (0..n-1) en el DataFrame indexado.
+    """
+
+    def __init__(self, df):
+        self.n_filas = len(df)
+        ocurrencias = defaultdict(lambda: defaultdict(int))
+        for col in df.columns:
+            for fila, valor in enumerate(df[col].tolist()):
+                if pd.isna(valor):
+                    continue
+                for token in tokenizar(valor):
+                    ocurrencias[token][fila] += 1
+
+        self.tokens = sorted(ocurrencias)
+        self.postings = {
+            token: (
+                np.fromiter(filas.keys(), dtype=np.int64, count=len(filas)),
+                np.fromiter(filas.values(), dtype=np.float64, count=len(filas)),
+            )
+            for token, filas in ocurrencias.items()
+        }
+
+    def tokens_con_prefijo(self, prefijo):
+        inicio = bisect.bisect_left(self.tokens, prefijo)
+        fin = bisect.bisect_left(self.tokens, prefijo + "￿")
+        return self.tokens[inicio:fin]
+
+    def puntajes(self, consulta):
+        """Puntaje por fila; 0 si la fila no contiene todos los términos (AND).
+
+        Devuelve None si la consulta no tiene términos.
+        """
+        terminos = tokenizar(consulta)
+        if not terminos:
+            return None
+        total = np.zeros(self.n_filas)
+        coinciden = np.ones(self.n_filas, dtype=bool)
+        for termino in dict.fromkeys(terminos):
+            puntaje = np.zeros(self.n_filas)
+            for token in self.tokens_con_prefijo(termino):
+                filas, frecuencias = self.postings[token]
+                peso = PESO_EXACTO if token == termino else PESO_PREFIJO
+                puntaje[filas] += peso * frecuencias
+            coinciden &= puntaje > 0
+            if not coinciden.any():
+                return np.zeros(self.n_filas)
+            total += puntaje
+        return np.where(coinciden, total, 0.0)
+
+    def buscar(self, consulta):
+        """Posiciones de las filas que cumplen la consulta, de mayor a menor puntaje.
+
+        Devuelve None si la consulta no tiene términos (no se filtra nada).
+        """
+        puntajes = self.puntajes(consulta)
+        if puntajes is None:
+            return None
+        posiciones = np.flatnonzero(puntajes)
+        return posiciones[np.argsort(-puntajes[posiciones], kind="stable")]
+
+
+def mascara_busqueda(indice, consulta):
+    """Máscara booleana por posición con las filas que cumplen la consulta (None si no filtra)."""
+    posiciones = indice.buscar(consulta)
+    if posiciones is None:
+        return None
+    mascara = np.zeros(indice.n_filas, dtype=bool)
+    mascara[posiciones] = True
+    return mascara
+
+
+def filtrar_por_busqueda(df_filtrado, df_base, indice, consulta):
+    """Aplica la búsqueda a df_filtrado (subconjunto de df_base) ordenando por relevancia."""
+    posiciones = indice.buscar(consulta)
+    if posiciones is None:
+        return df_filtrado
+    etiquetas = df_base.index[posiciones]
+    return df_filtrado.loc[etiquetas[etiquetas.isin(df_filtrado.index)]]
+
+
+class CatalogoFacetas:
+    """Columnas de texto con pocos valores distintos, codificadas una sola vez para filtrar.
+
+    Cada faceta guarda los códigos por fila (pd.factorize, -1 para NaN) y sus valores
+    ordenados, de modo que filtrar y contar es aritmética sobre arreglos de enteros.
+    """
+
+    def __init__(self, df, max_valores=30):
+        self.n_filas = len(df)
+        self.facetas = {}
+        for col in df.columns:
+            serie = df[col]
+            if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+                continue
+            try:
+                codigos, valores = pd.factorize(serie, sort=True)
+            except TypeError:
+                codigos, valores = pd.factorize(serie)
+            if 1 < len(valores) <= max_valores:
+                valores = list(valores)
+                self.facetas[col] = {
+                    "codigos": codigos,
+                    "valores": valores,
+                    "posicion": {v: i for i, v in enumerate(valores)},
+                }
+
+    @property
+    def columnas(self):
+        return list(self.facetas)
+
+    def valores(self, col):
+        return self.facetas[col]["valores"]
+
+    def mascara_columna(self, col, seleccion):
+        faceta = self.facetas[col]
+        codigos_sel = [faceta["posicion"][v] for v in seleccion if v in faceta["posicion"]]
+        return np.isin(faceta["codigos"], codigos_sel)
+
+    def mascara(self, filtros, base=None, excluir=None):
+        """AND de los filtros activos {col: [valores]}, opcionalmente sobre una máscara base."""
+        mascara = np.ones(self.n_filas, dtype=bool) if base is None else base.copy()
+        for col, seleccion in filtros.items():
+            if col != excluir and seleccion:
+                mascara &= self.mascara_columna(col, seleccion)
+        return mascara
+
+    def conteos(self, col, filtros, base=None):
+        """{valor: filas} para la faceta col aplicando los demás filtros (no el propio)."""
+        faceta = self.facetas[col]
+        codigos = faceta["codigos"][self.mascara(filtros, base, excluir=col)]
+        conteo = np.bincount(codigos[codigos >= 0], minlength=len(faceta["valores"]))
+        return dict(zip(faceta["valores"], conteo.tolist()))
@@ -0,0 +1,239 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Política por defecto de cada caché en memoria del proceso. Además, todas juntas no
+# superan PRESUPUESTO_BYTES: al pasarse se desaloja lo usado hace más tiempo en cualquiera.
+MAX_ENTRADAS_POR_CACHE = 64
+MAX_BYTES_POR_CACHE = 512 * 1024 * 1024
+TTL_POR_DEFECTO = 12 * 3600
+PRESUPUESTO_BYTES = 1024 * 1024 * 1024
+
+
+def tamano_aproximado(valor, profundidad=2):
+    """Bytes aproximados de un valor cacheado (DataFrames con memory_usage profundo)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        uso = valor.memory_usage(deep=True, index=True)
+        return int(uso.sum() if isinstance(valor, pd.DataFrame) else uso)
+    if profundidad <= 0:
+        return sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            tamano_aproximado(k, profundidad - 1) + tamano_aproximado(v, profundidad - 1)
+            for k, v in valor.items()
+        )
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(v, profundidad - 1) for v in valor)
+    if hasattr(valor, "__dict__"):
+        return sys.getsizeof(valor) + tamano_aproximado(vars(valor), profundidad - 1)
+    return sys.getsizeof(valor)
+
+
+class CacheAcotada:
+    """Caché LRU en memoria con límite de entradas y bytes, TTL y estadísticas.
+
+    Guarda una sola versión por clave: al pedir una clave con otra versión (p. ej. otro
+    mtime) la anterior se descarta en el acto en vez de esperar a salir por LRU. Cuando
+    varias sesiones piden a la vez una clave que falta, una la construye y las demás
+    esperan su resultado.
+    """
+
+    def __init__(self, nombre, max_entradas=MAX_ENTRADAS_POR_CACHE, max_bytes=MAX_BYTES_POR_CACHE,
+                 ttl=TTL_POR_DEFECTO):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # clave -> (version, valor, bytes, creada, ultimo_uso)
+        self._bloqueo = threading.Lock()
+        self._construcciones = {}  # (clave, version) -> bloqueo de quien la está construyendo
+        self.bytes = 0
+        self.aciertos = self.fallos = 0
+        self.desalojos = self.reemplazos = self.expirados = 0
+
+    def _quitar(self, clave):
+        _, _, tamano, _, _ = self._entradas.pop(clave)
+        self.bytes -= tamano
+
+    def _buscar(self, clave, version, contar_fallo=True):
+        with self._bloqueo:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                version_guardada, valor, tamano, creada, _ = entrada
+                if version_guardada != version:
+                    self._quitar(clave)
+                    self.reemplazos += 1
+                elif self.ttl is not None and time.monotonic() - creada > self.ttl:
+                    self._quitar(clave)
+                    self.expirados += 1
+                else:
+                    self._entradas[clave] = (version, valor, tamano, creada, time.monotonic())
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return True, valor
+            if contar_fallo:
+                self.fallos += 1
+            return False, None
+
+    def _guardar(self, clave, version, valor):
+        tamano = tamano_aproximado(valor)
+        ahora = time.monotonic()
+        with self._bloqueo:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (version, valor, tamano, ahora, ahora)
+            self.bytes += tamano
+            while len(self._entradas) > 1 and (
+                len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes
+            ):
+                self._quitar(next(iter(self._entradas)))
+                self.desalojos += 1
+
+    def obtener(self, clave, construir, version=None):
+        """Valor de la clave; si falta, expiró o cambió la versión, lo construye y lo guarda."""
+        encontrado, valor = self._buscar(clave, version, contar_fallo=False)
+        if encontrado:
+            return valor
+        # Un bloqueo por clave y versión: las demás claves se leen y cargan mientras tanto
+        with self._bloqueo:
+            construccion = self._construcciones.setdefault((clave, version), threading.Lock())
+        with construccion:
+            # Quien esperaba recibe lo que construyó la otra sesión (si falló, lo intenta él)
+            encontrado, valor = self._buscar(clave, version)
+            if encontrado:
+                return valor
+            try:
+                valor = construir()
+                self._guardar(clave, version, valor)
+            finally:
+                with self._bloqueo:
+                    if self._construcciones.get((clave, version)) is construccion:
+                        del self._construcciones[(clave, version)]
+        _respetar_presupuesto()
+        return valor
+
+    def desalojar_mas_antigua(self):
+        """Quita la entrada usada hace más tiempo; devuelve False si está vacía."""
+        with self._bloqueo:
+            if not self._entradas:
+                return False
+            self._quitar(next(iter(self._entradas)))
+            self.desalojos += 1
+            return True
+
+    def ultimo_uso_mas_antiguo(self):
+        with self._bloqueo:
+            return self._entradas[next(iter(self._entradas))][4] if self._entradas else None
+
+    def limpiar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+            self.bytes = 0
+
+    def estadisticas(self):
+        with self._bloqueo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "Caché": self.nombre,
+                "Entradas": len(self._entradas),
+                "Bytes": self.bytes,
+                "Aciertos": self.aciertos,
+                "Fallos": self.fallos,
+                "% Aciertos": round(100 * self.aciertos / consultas, 1) if consultas else None,
+                "Desalojos": self.desalojos,
+                "Versiones reemplazadas": self.reemplazos,
+                "Expirados (TTL)": self.expirados,
+                "Máx. entradas": self.max_entradas,
+                "Máx. bytes": self.max_bytes,
+                "TTL (s)": self.ttl,
+            }
+
+
+# Registro del proceso: los módulos importados sobreviven a los reruns de las páginas
+_CACHES = {}
+_bloqueo_registro = threading.Lock()
+
+
+def cache_acotada(nombre, **politica):
+    """Caché registrada con ese nombre (se crea con `politica` la primera vez)."""
+    with _bloqueo_registro:
+        if nombre not in _CACHES:
+            _CACHES[nombre] = CacheAcotada(nombre, **politica)
+        return _CACHES[nombre]
+
+
+def _respetar_presupuesto():
+    while True:
+        with _bloqueo_registro:
+            caches = list(_CACHES.values())
+        if sum(c.bytes for c in caches) <= PRESUPUESTO_BYTES:
+            return
+        candidatas = [(c.ultimo_uso_mas_antiguo(), c) for c in caches]
+        candidatas = [(uso, c) for uso, c in candidatas if uso is not None]
+        # Nunca se vacía la última entrada: un valor más grande que el presupuesto se conserva
+        if sum(len(c._entradas) for _, c in candidatas) <= 1:
+            return
+        min(candidatas, key=lambda x: x[0])[1].desalojar_mas_antigua()
+
+
+def estadisticas_caches():
+    """DataFrame con el estado de todas las cachés en memoria del proceso."""
+    with _bloqueo_registro:
+        caches = list(_CACHES.values())
+    return pd.DataFrame([c.estadisticas() for c in sorted(caches, key=lambda c: c.nombre)])
+
+
+def limpiar_caches():
+    with _bloqueo_registro:
+        caches = list(_CACHES.values())
+    for cache in caches:
+        cache.limpiar()
+
+
+def vista(df):
+    """Vista sin copia de un DataFrame compartido.
+
+    Con copy-on-write (pandas 3) la vista comparte los datos con el original: agregar o
+    reemplazar columnas, o modificar valores, copia solo lo que se toca y nunca altera
+    el DataFrame de la caché.
+    """
+    return df.copy(deep=False) if isinstance(df, pd.DataFrame) else df
+
+
+def obtener_compartido(clave, construir, version=None, cache="compartido"):
+    """Valor único para todas las sesiones, construido una vez por clave y versión.
+
+    Los DataFrames se devuelven como vista; cada versión nueva reemplaza a la anterior.
+    """
+    return vista(cache_acotada(cache).obtener(clave, construir, version))
+
+
+def _origen(funcion):
+    # Las páginas se ejecutan como __main__: el archivo distingue cargadores con el mismo nombre
+    funcion = getattr(funcion, "__wrapped__", funcion)
+    return f"{os.path.basename(funcion.__code__.co_filename)}:{funcion.__qualname__}"
+
+
+def cargar_compartido(cargar, path):
+    """Resultado de cargar(path) compartido entre sesiones; se recarga cuando cambia el mtime.
+
+    A diferencia de st.cache_data no se serializa ni se copia en cada acceso, y la versión
+    anterior del archivo se libera al recargarlo.
+    """
+    return obtener_compartido(path, lambda: cargar(path), os.path.getmtime(path), _origen(cargar))
+
+
+def compartido_por_archivo(cargar):
+    """Decorador para cargadores cargar(path): reemplaza a @st.cache_data con cargar_compartido.
+
+    Quien llama recibe una vista; no hace falta copiarla antes de agregarle columnas.
+    """
+    @functools.wraps(cargar)
+    def envoltura(path):
+        return cargar_compartido(cargar, path)
+    return envoltura
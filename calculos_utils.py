@@ -0,0 +1,82 @@
+"""Cálculos memoizados que muestran las páginas, con sus argumentos armados en un solo lugar.
+
+Las páginas y precalentar.py llaman a estas funciones: el histórico sale del mismo cargador
+compartido, la configuración de configuracion() y la versión de los datos de la huella del
+archivo Arrow. Así el precalentamiento deja en el memo en disco exactamente las entradas
+que las páginas leen.
+"""
+from bugs_utils import bugs_mensuales, tendencia_bugs, variacion_bugs_proyectos
+from cache_utils import obtener_compartido
+from config_utils import (
+    cargar_configuracion_metricas,
+    cargar_configuracion_na,
+    cargar_metas,
+    cargar_parametros,
+    cargar_seleccion,
+)
+from degradados_utils import calcular_degradados
+from exclusiones_utils import cargar_reglas_exclusion
+from historico_utils import asegurar_historico, leer_historico, version_historico_archivos
+from okr_utils import okr_mensual, ventanas_okr
+
+
+def configuracion():
+    """Configuración de data/ con la que se calculan OKR, degradaciones y bugs en las páginas."""
+    return {
+        "parametros": cargar_parametros(),
+        "metas": cargar_metas(),
+        "config_na": cargar_configuracion_na(),
+        "config_metricas": cargar_configuracion_metricas(),
+        "seleccion": cargar_seleccion(),
+        "reglas_exclusion": cargar_reglas_exclusion(),
+    }
+
+
+def historico_almacen(conn):
+    """(histórico normalizado del almacén compartido entre sesiones, versión de los datos)."""
+    firma = asegurar_historico(conn)
+    return obtener_compartido("historico", leer_historico, firma, "historico.arrow"), ("historico.arrow", firma)
+
+
+def resumen_general(df_historico, version_datos, config):
+    """(degradaciones, tendencia de bugs, variación de bugs por proyecto) de todo el portafolio."""
+    degradados = calcular_degradados(
+        df_historico, config["parametros"], config["config_na"], version_datos=version_datos
+    )
+    tendencia = tendencia_bugs(bugs_mensuales(df_historico, version_datos=version_datos))
+    variacion = variacion_bugs_proyectos(df_historico, version_datos=version_datos)
+    return degradados, tendencia, variacion
+
+
+def degradados_de(df_historico, celulas, config):
+    """Degradaciones de historico_archivos(celulas) (None: todas las células)."""
+    return calcular_degradados(
+        df_historico, config["parametros"], config["config_na"], config["config_metricas"],
+        config["seleccion"], config["reglas_exclusion"], version_datos=version_historico_archivos(celulas)
+    )
+
+
+def variacion_bugs_de(df_historico, celulas):
+    """Variación de bugs por proyecto de historico_archivos(celulas)."""
+    return variacion_bugs_proyectos(df_historico, version_datos=version_historico_archivos(celulas))
+
+
+def _de_celula(df_historico, celula):
+    # Las filas de una célula son las mismas sin importar qué células se leyeron: una sola
+    # entrada del memo sirve al admin y a todos los usuarios de esa célula
+    return df_historico[df_historico["Celula"] == celula], version_historico_archivos([celula])
+
+
+def okr_de_celula(df_historico, celula, config):
+    """OKR mensual con ventanas (ventanas_okr) de una célula."""
+    df_celula, version = _de_celula(df_historico, celula)
+    return ventanas_okr(okr_mensual(
+        df_celula, config["parametros"], config["metas"], config["config_na"], config["config_metricas"],
+        config["seleccion"], config["reglas_exclusion"], version_datos=version
+    ))
+
+
+def bugs_de_celula(df_historico, celula, columnas=None):
+    """Total de bugs por mes de una célula (bugs_mensuales)."""
+    df_celula, version = _de_celula(df_historico, celula)
+    return bugs_mensuales(df_celula, columnas, version_datos=version)
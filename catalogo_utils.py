@@ -0,0 +1,82 @@
+import os
+from datetime import datetime
+
+from cache_utils import cache_acotada
+from datos_utils import PATRON_ARCHIVO_MES, UPLOAD_DIR
+
+# Respaldo para cambios hechos fuera de la app (archivos reemplazados sin pasar por
+# invalidar_catalogo): el catálogo se vuelve a leer como máximo cada tantos segundos.
+MAX_EDAD_CATALOGO = 30
+
+
+class CatalogoMeses:
+    """Meses disponibles en uploads/ con su archivo metricas_YYYY-MM.xlsx y versión (mtime)."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        archivos = {}
+        if os.path.isdir(directorio):
+            for nombre in os.listdir(directorio):
+                m = PATRON_ARCHIVO_MES.fullmatch(nombre)
+                if m and _mes_valido(m.group(1)):
+                    archivos[m.group(1)] = os.path.join(directorio, nombre)
+        self.archivos = dict(sorted(archivos.items()))
+        self.versiones = {mes: os.path.getmtime(path) for mes, path in self.archivos.items()}
+
+    @property
+    def meses(self):
+        """Meses 'YYYY-MM' del más antiguo al más reciente."""
+        return list(self.archivos)
+
+    @property
+    def rutas(self):
+        """Rutas de los archivos ordenadas por mes."""
+        return list(self.archivos.values())
+
+    @property
+    def ultimo_mes(self):
+        return self.meses[-1] if self.archivos else None
+
+    @property
+    def ultimo_archivo(self):
+        return self.archivos[self.ultimo_mes] if self.archivos else None
+
+    @property
+    def firma(self):
+        """(ruta, mtime) de cada archivo: cambia con cualquier carga, edición o eliminación."""
+        return tuple((self.archivos[mes], self.versiones[mes]) for mes in self.archivos)
+
+    def archivo(self, mes):
+        return self.archivos.get(mes)
+
+
+def _mes_valido(mes):
+    try:
+        datetime.strptime(mes, "%Y-%m")
+    except ValueError:
+        return False
+    return True
+
+
+def _version_directorio(directorio):
+    try:
+        return os.stat(directorio).st_mtime_ns
+    except OSError:
+        return None
+
+
+def catalogo_meses(directorio=UPLOAD_DIR):
+    """Catálogo compartido por todas las sesiones; se rearma cuando cambia el mtime del directorio."""
+    cache = cache_acotada("catalogo_meses", ttl=MAX_EDAD_CATALOGO)
+    return cache.obtener(directorio, lambda: CatalogoMeses(directorio), _version_directorio(directorio))
+
+
+def invalidar_catalogo(directorio=UPLOAD_DIR):
+    """Avisa que se cargó o editó un archivo mensual.
+
+    Tocar el directorio cambia su mtime, así que también se enteran los demás procesos del
+    host; las ediciones en el lugar (openpyxl, copias sobre un archivo existente) no lo hacen solas.
+    """
+    if os.path.isdir(directorio):
+        os.utime(directorio)
+    cache_acotada("catalogo_meses", ttl=MAX_EDAD_CATALOGO).limpiar()
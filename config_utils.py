@@ -0,0 +1,111 @@
+import os
+
+import pandas as pd
+
+# Configuración del dashboard en data/ (la editan las páginas de administración).
+# Funciones sin Streamlit para usarlas también desde los scripts de línea de comandos.
+ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
+ARCHIVO_PARAMETROS = "data/parametros_metricas.csv"
+ARCHIVO_METAS = "data/metas_progreso.csv"
+ARCHIVO_CONFIGURACION_METRICAS = "data/configuracion_metricas.csv"
+ARCHIVO_CONFIGURACION_NA = "data/configuracion_na.csv"
+ARCHIVO_EXCLUSIONES = "data/exclusiones_metricas.csv"
+
+
+def cargar_seleccion():
+    """Proyectos seleccionados por célula: {celula: [NombreProyecto, ...]}"""
+    if os.path.exists(ARCHIVO_SELECCION):
+        df_sel = pd.read_csv(ARCHIVO_SELECCION)
+        seleccion = {}
+        for celula in df_sel['Celula'].unique():
+            seleccion[celula] = df_sel[df_sel['Celula'] == celula]['NombreProyecto'].tolist()
+        return seleccion
+    return {}
+
+
+def cargar_parametros():
+    """Cargar umbrales de cumplimiento por métrica"""
+    if os.path.exists(ARCHIVO_PARAMETROS):
+        df_param = pd.read_csv(ARCHIVO_PARAMETROS)
+        if not df_param.empty:
+            fila = df_param.iloc[0]
+            return {
+                "security_rating": fila.get("security_rating", "A,B,C,D,E"),
+                "reliability_rating": fila.get("reliability_rating", "A,B,C,D,E"),
+                "sqale_rating": fila.get("sqale_rating", "A,B,C,D,E"),
+                "duplicated_lines_density": fila.get("duplicated_lines_density", "A,B,C,D,E"),
+                "coverage_min": float(fila.get("coverage_min", 0))
+            }
+    return {
+        "security_rating": "A,B,C,D,E",
+        "reliability_rating": "A,B,C,D,E",
+        "sqale_rating": "A,B,C,D,E",
+        "duplicated_lines_density": "A,B,C,D,E",
+        "coverage_min": 0
+    }
+
+
+def cargar_configuracion_metricas():
+    """Cargar configuración de métricas (si usar proyectos seleccionados o todos)"""
+    if os.path.exists(ARCHIVO_CONFIGURACION_METRICAS):
+        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_METRICAS)
+        if not df_config.empty:
+            fila = df_config.iloc[0]
+            return {
+                "seguridad_usar_seleccionados": fila.get("seguridad_usar_seleccionados", False),
+                "confiabilidad_usar_seleccionados": fila.get("confiabilidad_usar_seleccionados", False),
+                "mantenibilidad_usar_seleccionados": fila.get("mantenibilidad_usar_seleccionados", False),
+                "cobertura_usar_seleccionados": fila.get("cobertura_usar_seleccionados", True),
+                "complejidad_usar_seleccionados": fila.get("complejidad_usar_seleccionados", False)
+            }
+    return {
+        "seguridad_usar_seleccionados": False,
+        "confiabilidad_usar_seleccionados": False,
+        "mantenibilidad_usar_seleccionados": False,
+        "cobertura_usar_seleccionados": True,
+        "complejidad_usar_seleccionados": False
+    }
+
+
+def cargar_configuracion_na():
+    """Cargar configuración de componentes N/A (si incluirlos o excluirlos del cálculo)"""
+    if os.path.exists(ARCHIVO_CONFIGURACION_NA):
+        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_NA)
+        if not df_config.empty:
+            fila = df_config.iloc[0]
+            return {
+                "incluir_na_seguridad": fila.get("incluir_na_seguridad", False),
+                "incluir_na_confiabilidad": fila.get("incluir_na_confiabilidad", False),
+                "incluir_na_mantenibilidad": fila.get("incluir_na_mantenibilidad", False),
+                "incluir_na_cobertura": fila.get("incluir_na_cobertura", False),
+                "incluir_na_complejidad": fila.get("incluir_na_complejidad", False)
+            }
+    return {
+        "incluir_na_seguridad": False,
+        "incluir_na_confiabilidad": False,
+        "incluir_na_mantenibilidad": False,
+        "incluir_na_cobertura": False,
+        "incluir_na_complejidad": False
+    }
+
+
+def cargar_metas():
+    """Cargar metas de progreso desde archivo CSV"""
+    if os.path.exists(ARCHIVO_METAS):
+        df_metas = pd.read_csv(ARCHIVO_METAS)
+        if not df_metas.empty:
+            fila = df_metas.iloc[0]
+            return {
+                "meta_seguridad": float(fila.get("meta_seguridad", 90)),
+                "meta_confiabilidad": float(fila.get("meta_confiabilidad", 90)),
+                "meta_mantenibilidad": float(fila.get("meta_mantenibilidad", 90)),
+                "meta_cobertura": float(fila.get("meta_cobertura", 50)),
+                "meta_complejidad": float(fila.get("meta_complejidad", 90))
+            }
+    return {
+        "meta_seguridad": 90.0,
+        "meta_confiabilidad": 90.0,
+        "meta_mantenibilidad": 90.0,
+        "meta_cobertura": 50.0,
+        "meta_complejidad": 90.0
+    }
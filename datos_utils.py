@@ -0,0 +1,106 @@
+import os
+import re
+
+import pandas as pd
+
+UPLOAD_DIR = "uploads"
+
+COLUMNAS_NUMERICAS = [
+    "coverage", "bugs", "bugs_blocker", "bugs_critical",
+    "bugs_major", "bugs_minor", "bugs_info",
+]
+COLUMNAS_RATING = ["security_rating", "reliability_rating", "sqale_rating", "duplicated_lines_density"]
+RATINGS_VALIDOS = ["A", "B", "C", "D", "E"]
+
+PATRON_ARCHIVO_MES = re.compile(r"metricas_(\d{4}-\d{2})\.xlsx$")
+# Mes en nombres de exportaciones arbitrarios: 2025-03, 2025_03 (ej. sonar_2025_03.xlsx)
+PATRON_MES_NOMBRE = re.compile(r"(?<!\d)(\d{4})[-_](0[1-9]|1[0-2])(?!\d)")
+
+COLUMNAS_REQUERIDAS = ["NombreProyecto", "Celula"]
+
+
+def mes_de_archivo(path):
+    """Extrae 'YYYY-MM' del nombre metricas_YYYY-MM.xlsx."""
+    m = PATRON_ARCHIVO_MES.search(os.path.basename(path))
+    return m.group(1) if m else None
+
+
+def mes_de_nombre(path):
+    """Infiere 'YYYY-MM' de cualquier nombre de archivo que contenga el mes (None si no hay)."""
+    m = PATRON_MES_NOMBRE.search(os.path.basename(path))
+    return f"{m.group(1)}-{m.group(2)}" if m else None
+
+
+def _columna_mes(df):
+    return next((col for col in df.columns if str(col).strip().lower() == "mes"), None)
+
+
+def meses_de_columna(df):
+    """Conteo de filas por mes ('YYYY-MM') según la columna Mes/mes, del más frecuente al menos."""
+    columna = _columna_mes(df)
+    if columna is None:
+        return pd.Series(dtype="int64")
+    meses = pd.to_datetime(df[columna].astype(str).str.strip(), format="mixed", errors="coerce")
+    return meses.dropna().dt.strftime("%Y-%m").value_counts()
+
+
+def validar_metricas(df):
+    """Revisa un archivo de métricas ya leído; devuelve (errores, avisos) como listas de textos."""
+    columnas = df.columns.astype(str).str.strip()
+    errores = [f"falta la columna {col}" for col in COLUMNAS_REQUERIDAS if col not in columnas]
+    avisos = [
+        f"falta la columna {col}" for col in COLUMNAS_NUMERICAS + COLUMNAS_RATING if col not in columnas
+    ]
+    if errores:
+        return errores, []
+    if df.empty:
+        return ["el archivo no tiene filas"], avisos
+
+    df = df.set_axis(columnas, axis=1)
+    sin_nombre = int(df["NombreProyecto"].isna().sum())
+    if sin_nombre:
+        avisos.append(f"{sin_nombre} filas sin NombreProyecto")
+    repetidos = int(df.duplicated(subset=["Celula", "NombreProyecto"]).sum())
+    if repetidos:
+        avisos.append(f"{repetidos} proyectos repetidos en la misma célula")
+    invalidos = {
+        col: int((pd.to_numeric(df[col], errors="coerce").isna() & df[col].notna()).sum())
+        for col in COLUMNAS_NUMERICAS if col in df.columns
+    }
+    invalidos = {col: n for col, n in invalidos.items() if n}
+    if invalidos:
+        avisos.append("valores no numéricos (quedan vacíos): "
+                      + ", ".join(f"{col} {n}" for col, n in invalidos.items()))
+    return errores, avisos
+
+
+def normalizar_metricas(df, mes=None):
+    """Normaliza un DataFrame de métricas mensuales (columnas, tipos, ratings y mes).
+
+    Mantiene NaN para valores faltantes: los ratings inválidos quedan como NaN
+    y las columnas numéricas no se rellenan con 0.
+    """
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+
+    for col in COLUMNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    for col in COLUMNAS_RATING:
+        if col in df.columns:
+            valores = df[col].astype(str).str.strip().str.upper()
+            df[col] = valores.where(valores.isin(RATINGS_VALIDOS))
+
+    if mes is not None:
+        df["Mes"] = pd.to_datetime(mes, format="%Y-%m")
+    elif "Mes" in df.columns:
+        df["Mes"] = pd.to_datetime(df["Mes"], format="%Y-%m", errors="coerce")
+    else:
+        df["Mes"] = pd.NaT
+    return df
+
+
+def leer_archivo_metricas(path):
+    """Lee y normaliza un archivo metricas_YYYY-MM.xlsx."""
+    return normalizar_metricas(pd.read_excel(path), mes_de_archivo(path))
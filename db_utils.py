@@ -0,0 +1,386 @@
+import glob
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+from datos_utils import UPLOAD_DIR, leer_archivo_metricas, mes_de_archivo
+
+# Almacén embebido (SQLite) con métricas mensuales, selección, parámetros y usuarios.
+# Los archivos de uploads/ y data/ y usuarios.json siguen siendo el formato de
+# importación/exportación: `sincronizar` reimporta solo los que cambiaron.
+RUTA_DB = "data/sonarqube.db"
+ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
+USUARIOS_FILE = "usuarios.json"
+
+# Archivos de configuración de una sola fila que se guardan como clave/valor
+ARCHIVOS_PARAMETROS = {
+    "parametros_metricas": "data/parametros_metricas.csv",
+    "metas_progreso": "data/metas_progreso.csv",
+    "configuracion_metricas": "data/configuracion_metricas.csv",
+    "configuracion_na": "data/configuracion_na.csv",
+}
+
+COLUMNAS_METRICAS = [
+    "Celula", "Mes", "NombreProyecto",
+    "security_rating", "reliability_rating", "sqale_rating", "duplicated_lines_density",
+    "coverage", "bugs", "bugs_blocker", "bugs_critical", "bugs_major", "bugs_minor", "bugs_info",
+]
+
+# Orden de columnas de los archivos metricas_YYYY-MM.xlsx
+COLUMNAS_ARCHIVO_MES = [
+    "NombreProyecto", "security_rating", "reliability_rating", "sqale_rating", "coverage",
+    "duplicated_lines_density", "bugs", "bugs_blocker", "bugs_critical", "bugs_major",
+    "bugs_minor", "bugs_info", "Celula", "Mes",
+]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS metricas (
+    Celula TEXT,
+    Mes TEXT NOT NULL,
+    NombreProyecto TEXT,
+    security_rating TEXT,
+    reliability_rating TEXT,
+    sqale_rating TEXT,
+    duplicated_lines_density TEXT,
+    coverage REAL,
+    bugs REAL,
+    bugs_blocker REAL,
+    bugs_critical REAL,
+    bugs_major REAL,
+    bugs_minor REAL,
+    bugs_info REAL
+);
+CREATE INDEX IF NOT EXISTS idx_metricas_celula_mes_proyecto ON metricas (Celula, Mes, NombreProyecto);
+CREATE INDEX IF NOT EXISTS idx_metricas_mes ON metricas (Mes);
+
+CREATE TABLE IF NOT EXISTS seleccion (
+    Celula TEXT NOT NULL,
+    NombreProyecto TEXT NOT NULL,
+    PRIMARY KEY (Celula, NombreProyecto)
+);
+
+CREATE TABLE IF NOT EXISTS parametros (
+    archivo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    valor TEXT,
+    PRIMARY KEY (archivo, clave)
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    usuario TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    rol TEXT,
+    celulas TEXT,
+    datos TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fuentes (
+    ruta TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+
+# ---------------------- Conexión ----------------------
+
+def conectar(ruta=RUTA_DB):
+    """Abre una conexión al almacén y crea el esquema si no existe."""
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    conn = sqlite3.connect(ruta, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(ESQUEMA)
+    return conn
+
+
+def _valores_sql(df, columnas):
+    """Filas de `df` como tuplas con None en lugar de NaN (NULL en SQLite)."""
+    df = df.reindex(columns=columnas).astype(object)
+    return list(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _mtime_registrado(conn, ruta):
+    fila = conn.execute("SELECT mtime FROM fuentes WHERE ruta = ?", (ruta,)).fetchone()
+    return fila[0] if fila else None
+
+
+def _registrar_fuente(conn, ruta, mtime):
+    conn.execute(
+        "INSERT INTO fuentes (ruta, mtime) VALUES (?, ?) "
+        "ON CONFLICT(ruta) DO UPDATE SET mtime = excluded.mtime",
+        (ruta, mtime),
+    )
+
+
+# ---------------------- Importación ----------------------
+
+def importar_mes(conn, df, mes):
+    """Reemplaza las filas de un mes con el DataFrame normalizado `df`."""
+    df = df.copy()
+    df["Mes"] = mes
+    conn.execute("DELETE FROM metricas WHERE Mes = ?", (mes,))
+    conn.executemany(
+        f"INSERT INTO metricas ({', '.join(COLUMNAS_METRICAS)}) "
+        f"VALUES ({', '.join('?' * len(COLUMNAS_METRICAS))})",
+        _valores_sql(df, COLUMNAS_METRICAS),
+    )
+
+
+def importar_archivo_mes(conn, path, df, mes):
+    """Importa un mes ya leído y registra su archivo para que `sincronizar` no lo vuelva a leer."""
+    importar_mes(conn, df, mes)
+    _registrar_fuente(conn, path, os.path.getmtime(path))
+
+
+def _sincronizar_metricas(conn):
+    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
+    vigentes = set()
+    for path in archivos:
+        mes = mes_de_archivo(path)
+        if mes is None:
+            continue
+        vigentes.add(path)
+        mtime = os.path.getmtime(path)
+        if _mtime_registrado(conn, path) == mtime:
+            continue
+        importar_mes(conn, leer_archivo_metricas(path), mes)
+        _registrar_fuente(conn, path, mtime)
+
+    # Meses cuyo archivo fue eliminado de uploads/
+    patron = os.path.join(UPLOAD_DIR, "metricas_%")
+    for (ruta,) in conn.execute("SELECT ruta FROM fuentes WHERE ruta LIKE ?", (patron,)).fetchall():
+        if ruta not in vigentes:
+            conn.execute("DELETE FROM metricas WHERE Mes = ?", (mes_de_archivo(ruta),))
+            conn.execute("DELETE FROM fuentes WHERE ruta = ?", (ruta,))
+
+
+def _sincronizar_seleccion(conn):
+    if not os.path.exists(ARCHIVO_SELECCION):
+        return
+    mtime = os.path.getmtime(ARCHIVO_SELECCION)
+    if _mtime_registrado(conn, ARCHIVO_SELECCION) == mtime:
+        return
+    df_sel = pd.read_csv(ARCHIVO_SELECCION).dropna(subset=["Celula", "NombreProyecto"])
+    conn.execute("DELETE FROM seleccion")
+    conn.executemany(
+        "INSERT OR IGNORE INTO seleccion (Celula, NombreProyecto) VALUES (?, ?)",
+        _valores_sql(df_sel, ["Celula", "NombreProyecto"]),
+    )
+    _registrar_fuente(conn, ARCHIVO_SELECCION, mtime)
+
+
+def _sincronizar_parametros(conn):
+    for nombre, path in ARCHIVOS_PARAMETROS.items():
+        if not os.path.exists(path):
+            continue
+        mtime = os.path.getmtime(path)
+        if _mtime_registrado(conn, path) == mtime:
+            continue
+        df_param = pd.read_csv(path, dtype=str)
+        conn.execute("DELETE FROM parametros WHERE archivo = ?", (nombre,))
+        if not df_param.empty:
+            fila = df_param.iloc[0]
+            conn.executemany(
+                "INSERT INTO parametros (archivo, clave, valor) VALUES (?, ?, ?)",
+                [(nombre, clave, None if pd.isna(valor) else valor) for clave, valor in fila.items()],
+            )
+        _registrar_fuente(conn, path, mtime)
+
+
+def _sincronizar_usuarios(conn):
+    if not os.path.exists(USUARIOS_FILE):
+        return
+    mtime = os.path.getmtime(USUARIOS_FILE)
+    if _mtime_registrado(conn, USUARIOS_FILE) == mtime:
+        return
+    with open(USUARIOS_FILE, "r") as f:
+        usuarios = json.load(f)
+    conn.execute("DELETE FROM usuarios")
+    conn.executemany(
+        "INSERT INTO usuarios (usuario, password, rol, celulas, datos) VALUES (?, ?, ?, ?, ?)",
+        [
+            (nombre, datos["password"], datos.get("rol"),
+             json.dumps(datos.get("celulas", datos.get("celula"))), json.dumps(datos))
+            for nombre, datos in usuarios.items()
+        ],
+    )
+    _registrar_fuente(conn, USUARIOS_FILE, mtime)
+
+
+def sincronizar(conn):
+    """Importa al almacén los archivos nuevos o modificados (según su mtime)."""
+    with conn:
+        _sincronizar_metricas(conn)
+        _sincronizar_seleccion(conn)
+        _sincronizar_parametros(conn)
+        _sincronizar_usuarios(conn)
+
+
+def abrir_almacen(ruta=RUTA_DB):
+    """Conecta y sincroniza el almacén con los archivos actuales."""
+    conn = conectar(ruta)
+    sincronizar(conn)
+    return conn
+
+
+# ---------------------- Exportación ----------------------
+
+def exportar_mes(conn, mes, path):
+    """Escribe un mes del almacén con el formato de uploads/metricas_YYYY-MM.xlsx."""
+    df = consultar_metricas(conn, meses=[mes])
+    df["Mes"] = df["Mes"].dt.strftime("%Y-%m")
+    df[COLUMNAS_ARCHIVO_MES].to_excel(path, index=False)
+
+
+def exportar_seleccion(conn, path=ARCHIVO_SELECCION):
+    """Escribe la selección de proyectos con el formato de seleccion_proyectos.csv."""
+    df = pd.read_sql_query(
+        "SELECT Celula, NombreProyecto FROM seleccion ORDER BY rowid", conn
+    )
+    df.to_csv(path, index=False)
+
+
+def exportar_usuarios(conn, path=USUARIOS_FILE):
+    """Escribe los usuarios con el formato de usuarios.json."""
+    usuarios = {
+        nombre: json.loads(datos)
+        for nombre, datos in conn.execute("SELECT usuario, datos FROM usuarios ORDER BY rowid")
+    }
+    with open(path, "w") as f:
+        json.dump(usuarios, f, indent=4)
+
+
+# ---------------------- Consultas ----------------------
+
+def _filtro_in(columna, valores, condiciones, argumentos):
+    if valores is None:
+        return
+    valores = list(valores)
+    if not valores:
+        condiciones.append("0")
+        return
+    condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+    argumentos.extend(valores)
+
+
+def _where(condiciones):
+    return f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+
+def leer_parametros(conn, archivo):
+    """Parámetros guardados de un archivo de configuración como dict {clave: valor}."""
+    return dict(conn.execute("SELECT clave, valor FROM parametros WHERE archivo = ?", (archivo,)).fetchall())
+
+
+def meses_disponibles(conn):
+    """Lista de meses ('YYYY-MM') presentes en el almacén, del más reciente al más antiguo."""
+    return [m for (m,) in conn.execute("SELECT DISTINCT Mes FROM metricas ORDER BY Mes DESC")]
+
+
+def celulas_por_proyecto(conn):
+    """Célula más reciente de cada proyecto: {NombreProyecto: Celula}."""
+    filas = conn.execute(
+        "SELECT NombreProyecto, Celula FROM metricas "
+        "WHERE Celula IS NOT NULL AND NombreProyecto IS NOT NULL ORDER BY Mes"
+    ).fetchall()
+    return dict(filas)
+
+
+def consultar_metricas(conn, celulas=None, meses=None, proyectos=None):
+    """Filas de métricas filtradas por célula, mes ('YYYY-MM') y proyecto usando los índices."""
+    condiciones, argumentos = [], []
+    _filtro_in("Celula", celulas, condiciones, argumentos)
+    _filtro_in("Mes", meses, condiciones, argumentos)
+    _filtro_in("NombreProyecto", proyectos, condiciones, argumentos)
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(COLUMNAS_METRICAS)} FROM metricas {_where(condiciones)}",
+        conn, params=argumentos,
+    )
+    df["Mes"] = pd.to_datetime(df["Mes"], format="%Y-%m")
+    return df
+
+
+def cumplimiento_por_celula(conn, mes, columna, umbral, es_rating=True, incluir_na=False,
+                            celulas=None, solo_seleccionados=False, excluir_proyectos=None,
+                            excluir_celulas=None):
+    """Cumplimiento de una métrica agrupado por célula para un mes, calculado en SQL.
+
+    Devuelve un DataFrame con columnas Celula, cumplen y total. Con `incluir_na`
+    los valores nulos cuentan como "no cumple"; si no, quedan fuera del total.
+    """
+    if columna not in COLUMNAS_METRICAS:
+        raise ValueError(f"Columna de métrica desconocida: {columna}")
+
+    condiciones, argumentos = ["m.Mes = ?"], [mes]
+    if es_rating:
+        umbral = list(umbral)
+        if umbral:
+            condicion_cumple = f"m.{columna} IN ({', '.join('?' * len(umbral))})"
+            argumentos_cumple = umbral
+        else:
+            condicion_cumple, argumentos_cumple = "0", []
+    else:
+        condicion_cumple, argumentos_cumple = f"m.{columna} >= ?", [umbral]
+
+    _filtro_in("m.Celula", celulas, condiciones, argumentos)
+    if excluir_proyectos:
+        condiciones.append(f"m.NombreProyecto NOT IN ({', '.join('?' * len(excluir_proyectos))})")
+        argumentos.extend(excluir_proyectos)
+    if excluir_celulas:
+        condiciones.append(
+            f"(m.Celula IS NULL OR LOWER(m.Celula) NOT IN ({', '.join('?' * len(excluir_celulas))}))"
+        )
+        argumentos.extend(c.lower() for c in excluir_celulas)
+    if not incluir_na:
+        condiciones.append(f"m.{columna} IS NOT NULL")
+
+    union = ""
+    if solo_seleccionados:
+        union = "JOIN seleccion s ON s.Celula = m.Celula AND s.NombreProyecto = m.NombreProyecto"
+
+    consulta = f"""
+        SELECT m.Celula AS Celula,
+               SUM(CASE WHEN {condicion_cumple} THEN 1 ELSE 0 END) AS cumplen,
+               COUNT(*) AS total
+        FROM metricas m {union}
+        {_where(condiciones)}
+        GROUP BY m.Celula
+        ORDER BY m.Celula
+    """
+    return pd.read_sql_query(consulta, conn, params=argumentos_cumple + argumentos)
+
+
+def bugs_por_celula(conn, mes, celulas=None):
+    """Suma de bugs por severidad y célula para un mes, calculada en SQL."""
+    condiciones, argumentos = ["Mes = ?"], [mes]
+    _filtro_in("Celula", celulas, condiciones, argumentos)
+    consulta = f"""
+        SELECT Celula,
+               SUM(bugs) AS bugs, SUM(bugs_blocker) AS bugs_blocker,
+               SUM(bugs_critical) AS bugs_critical, SUM(bugs_major) AS bugs_major,
+               SUM(bugs_minor) AS bugs_minor
+        FROM metricas
+        {_where(condiciones)}
+        GROUP BY Celula
+        ORDER BY Celula
+    """
+    return pd.read_sql_query(consulta, conn, params=argumentos).set_index("Celula").fillna(0)
+
+
+def proyectos_por_celula(conn, mes, excluir_celulas=None):
+    """Cantidad de proyectos por célula para un mes."""
+    condiciones, argumentos = ["Mes = ?", "Celula IS NOT NULL"], [mes]
+    if excluir_celulas:
+        condiciones.append(f"LOWER(Celula) NOT IN ({', '.join('?' * len(excluir_celulas))})")
+        argumentos.extend(c.lower() for c in excluir_celulas)
+    consulta = f"""
+        SELECT Celula, COUNT(NombreProyecto) AS "Total Proyectos"
+        FROM metricas
+        {_where(condiciones)}
+        GROUP BY Celula
+        ORDER BY Celula
+    """
+    return pd.read_sql_query(consulta, conn, params=argumentos).set_index("Celula")
@@ -0,0 +1,120 @@
+import pandas as pd
+
+from memo_utils import memo_en_disco
+from metricas_utils import evaluar_metricas, firma_registro, metricas_okr
+from seleccion_utils import indice_seleccion, marcar_seleccionados
+
+COLUMNAS_DEGRADADOS = [
+    "Celula", "Mes Anterior", "Mes", "Métrica", "Componente", "Valor Anterior", "Valor Actual",
+]
+
+
+def pares_mes_anterior(df_historico, columnas):
+    """Une cada fila con la del mismo proyecto en el mes anterior disponible de su célula.
+
+    Un solo merge sobre todo el histórico: las columnas del mes anterior llevan el sufijo
+    '_ant' y el resultado tiene 'Mes' y 'Mes Anterior' como 'YYYY-MM'.
+    """
+    base = df_historico[["Celula", "NombreProyecto", "Mes"] + columnas].dropna(subset=["Mes"]).copy()
+    base["Mes"] = pd.to_datetime(base["Mes"]).dt.strftime("%Y-%m")
+    # Proyectos repetidos en un mes: por columna se toma el último valor no nulo
+    base = base.groupby(["Celula", "NombreProyecto", "Mes"], dropna=False, sort=False).last().reset_index()
+
+    meses_celula = base[["Celula", "Mes"]].drop_duplicates().sort_values(["Celula", "Mes"])
+    meses_celula["Mes Anterior"] = meses_celula.groupby("Celula", dropna=False)["Mes"].shift()
+    actual = base.merge(meses_celula.dropna(subset=["Mes Anterior"]), on=["Celula", "Mes"])
+
+    anterior = base.rename(columns={c: f"{c}_ant" for c in columnas}).rename(columns={"Mes": "Mes Anterior"})
+    # El mes anterior va a la izquierda para conservar el orden de sus filas
+    return anterior.merge(actual, on=["Celula", "NombreProyecto", "Mes Anterior"])
+
+
+def _formatear_valor(serie):
+    return serie.astype(str).where(serie.notna(), "N/A")
+
+
+@memo_en_disco(extra=firma_registro)
+def calcular_degradados(df_historico, parametros, config_na=None, config_metricas=None,
+                        proyectos_seleccionados=None, exclusiones=None):
+    """Componentes que pasaron de cumplir a no cumplir entre meses consecutivos, para todo el histórico.
+
+    Devuelve una tabla con una fila por (célula, mes, métrica, componente) degradado
+    (columnas COLUMNAS_DEGRADADOS). Respeta la configuración de N/A y de proyectos
+    seleccionados de cada métrica; sin config_metricas se usan todos los proyectos.
+    """
+    metricas = metricas_okr()
+    columnas = [c for c in (m.columna_en(df_historico.columns) for m in metricas) if c]
+    if df_historico.empty or not columnas:
+        return pd.DataFrame(columns=COLUMNAS_DEGRADADOS)
+
+    pares = pares_mes_anterior(df_historico, columnas)
+    seleccionados = None
+    celulas_con_seleccion = [c for c, lista in (proyectos_seleccionados or {}).items() if lista]
+    if celulas_con_seleccion:
+        pares = marcar_seleccionados(pares, indice_seleccion(proyectos_seleccionados))
+        seleccionados = pares["seleccionado"] | ~pares["Celula"].isin(celulas_con_seleccion)
+
+    # Ambos meses se evalúan con el mismo kernel; el mes anterior con sus columnas '_ant'
+    anterior = pares[["NombreProyecto"]].assign(**{c: pares[f"{c}_ant"] for c in columnas})
+    _, cumplia = evaluar_metricas(anterior, parametros, config_na, config_metricas,
+                                  seleccionados, exclusiones, metricas)
+    incluido, cumple = evaluar_metricas(pares, parametros, config_na, config_metricas,
+                                        seleccionados, exclusiones, metricas)
+    degradado = cumplia & incluido & ~cumple
+
+    tablas = []
+    for metrica in metricas:
+        mascara = degradado[metrica.clave]
+        if not mascara.any():
+            continue
+
+        columna = metrica.columna_en(pares.columns)
+        antes, ahora = pares[f"{columna}_ant"], pares[columna]
+        filas = pares[mascara]
+        tablas.append(pd.DataFrame({
+            "Celula": filas["Celula"],
+            "Mes Anterior": filas["Mes Anterior"],
+            "Mes": filas["Mes"],
+            "Métrica": metrica.nombre,
+            "Componente": filas["NombreProyecto"],
+            "Valor Anterior": _formatear_valor(antes[mascara]),
+            "Valor Actual": _formatear_valor(ahora[mascara]),
+        }))
+
+    if not tablas:
+        return pd.DataFrame(columns=COLUMNAS_DEGRADADOS)
+    return pd.concat(tablas, ignore_index=True)
+
+
+def mes_anterior_comparado(df_degradados, df_historico, celula, mes):
+    """Mes ('YYYY-MM') contra el que se comparó la célula en `mes`, o None si no tiene uno anterior.
+
+    Es el 'Mes Anterior' de sus degradaciones; sin degradaciones, el mes anterior con datos de
+    la célula (el mismo emparejamiento de pares_mes_anterior, que puede saltear meses).
+    """
+    filas = df_degradados[(df_degradados["Celula"] == celula) & (df_degradados["Mes"] == mes)]
+    if not filas.empty:
+        return filas["Mes Anterior"].iloc[0]
+    meses = pd.to_datetime(df_historico.loc[df_historico["Celula"] == celula, "Mes"].dropna()).dt.strftime("%Y-%m")
+    anteriores = sorted(m for m in meses.unique() if m < mes)
+    return anteriores[-1] if anteriores else None
+
+
+def degradados_por_metrica(df_degradados, celula, mes):
+    """Vista por célula y mes: {métrica: DataFrame} con las columnas de la tabla de detalle."""
+    filas = df_degradados[(df_degradados["Celula"] == celula) & (df_degradados["Mes"] == mes)]
+    return {
+        metrica: grupo[["Componente", "Valor Anterior", "Valor Actual"]]
+        .assign(**{"Estado Anterior": "✅ Cumplía", "Estado Actual": "❌ No Cumple"})
+        .reset_index(drop=True)
+        for metrica, grupo in filas.groupby("Métrica", sort=False)
+    }
+
+
+def resumen_degradados(df_degradados, mes):
+    """Conteo de componentes degradados por célula y métrica en un mes (reporte de portafolio)."""
+    filas = df_degradados[df_degradados["Mes"] == mes]
+    if filas.empty:
+        return pd.DataFrame()
+    return filas.pivot_table(index="Celula", columns="Métrica", values="Componente",
+                             aggfunc="count", fill_value=0)
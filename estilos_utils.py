@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# Estilos usados en las tablas de cumplimiento
+ESTILO_CUMPLE = "background-color: #d4edda; color: #155724"
+ESTILO_ALERTA = "background-color: #fff3cd; color: #856404"
+ESTILO_NO_CUMPLE = "background-color: #f8d7da; color: #721c24"
+
+# Todas las funciones devuelven matrices de estilos (DataFrame de strings CSS con el mismo
+# índice y columnas que la tabla) para usarlas con Styler.apply(funcion, axis=None): el
+# estilo se calcula de una vez con numpy en lugar de invocar una función por fila o celda.
+
+
+def estilos_vacios(df):
+    return pd.DataFrame("", index=df.index, columns=df.columns)
+
+
+def estilos_filas(df, estilos_fila):
+    """Matriz donde cada fila completa lleva el estilo correspondiente de estilos_fila."""
+    valores = np.asarray(estilos_fila, dtype=object).reshape(-1, 1)
+    return pd.DataFrame(np.repeat(valores, df.shape[1], axis=1), index=df.index, columns=df.columns)
+
+
+def estilos_columnas(df, estilos_por_columna):
+    """Matriz vacía salvo en las columnas indicadas ({columna: estilo o arreglo de estilos})."""
+    resultado = estilos_vacios(df)
+    for col, estilos in estilos_por_columna.items():
+        if col in resultado.columns:
+            resultado[col] = estilos
+    return resultado
+
+
+def combinar_estilos(*matrices):
+    """Une varias matrices de estilos; si dos definen la misma propiedad, gana la última."""
+    resultado = matrices[0].astype(object)
+    for matriz in matrices[1:]:
+        a, b = resultado.to_numpy(dtype=object), matriz.to_numpy(dtype=object)
+        unidos = np.where((a != "") & (b != ""), a + "; " + b, np.where(b != "", b, a))
+        resultado = pd.DataFrame(unidos, index=resultado.index, columns=resultado.columns)
+    return resultado
+
+
+def porcentaje_desde_texto(serie):
+    """Convierte textos como '85%' a 85.0; cualquier otro valor (incluido 'N/A') queda NaN."""
+    texto = serie.astype("string")
+    tiene_pct = texto.str.contains("%", regex=False).fillna(False).astype(bool)
+    numeros = pd.to_numeric(texto.str.replace("%", "", regex=False), errors="coerce")
+    return numeros.where(tiene_pct).astype(float).to_numpy()
+
+
+def estilo_por_umbral(valores, umbrales, estilos, estilo_nan=None):
+    """Estilo por valor: estilos[i] si valor >= umbrales[i] (en orden), si no estilos[-1].
+
+    Con estilo_nan se usa ese estilo para valores faltantes; si no, caen en estilos[-1]
+    (igual que una comparación con NaN en Python).
+    """
+    valores = np.asarray(valores, dtype=float)
+    condiciones = [valores >= umbral for umbral in umbrales]
+    resultado = np.select(condiciones, estilos[:len(umbrales)], default=estilos[-1]).astype(object)
+    if estilo_nan is not None:
+        resultado[np.isnan(valores)] = estilo_nan
+    return resultado
+
+
+def estilo_cumplimiento_pct(serie, meta=100):
+    """Verde si el texto 'NN%' alcanza la meta, rojo si no; vacío si no es un porcentaje."""
+    return estilo_por_umbral(porcentaje_desde_texto(serie), [meta], [ESTILO_CUMPLE, ESTILO_NO_CUMPLE], estilo_nan="")
@@ -0,0 +1,89 @@
+"""Reglas de exclusión de proyectos por métrica, configuradas en data/exclusiones_metricas.csv.
+
+Cada fila es (metrica, tipo, patron): `metrica` es la clave del registro de métricas
+(p. ej. cobertura), `tipo` es exacto, glob o regex y `patron` el nombre del proyecto, un
+glob como *.FrontEnd:Quality o una expresión regular que debe coincidir con el nombre
+completo. Las reglas de una métrica se compilan en un solo patrón y cada nombre de
+proyecto se evalúa una vez por proceso: en cada rerun la exclusión es un isin.
+"""
+import fnmatch
+import functools
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cache_utils import obtener_compartido
+from config_utils import ARCHIVO_EXCLUSIONES
+
+TIPOS_REGLA = ("exacto", "glob", "regex")
+
+
+class ReglaExclusion:
+    """Reglas de una métrica compiladas; recuerda qué nombres de proyecto ya evaluó."""
+
+    def __init__(self, reglas):
+        self.exactos = frozenset(patron for tipo, patron in reglas if tipo == "exacto")
+        patrones = [fnmatch.translate(patron) if tipo == "glob" else f"(?:{patron})"
+                    for tipo, patron in reglas if tipo != "exacto"]
+        self.patron = re.compile("|".join(patrones)) if patrones else None
+        self._evaluados = set()
+        self._excluidos = list(self.exactos)
+        self._bloqueo = threading.Lock()
+
+    def excluye(self, nombre):
+        return nombre in self.exactos or bool(self.patron and self.patron.fullmatch(str(nombre)))
+
+    def mascara(self, proyectos):
+        """Array booleano con las filas de la columna de proyectos que quedan excluidas."""
+        with self._bloqueo:
+            if self.patron is not None:
+                nuevos = [n for n in pd.unique(proyectos.dropna()) if n not in self._evaluados]
+                self._excluidos.extend(n for n in nuevos if n not in self.exactos and self.excluye(n))
+                self._evaluados.update(nuevos)
+            excluidos = list(self._excluidos)
+        return proyectos.isin(excluidos).to_numpy(dtype=bool)
+
+
+def _leer_reglas(path):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    reglas = []
+    for fila in df.itertuples(index=False):
+        metrica, tipo, patron = fila.metrica.strip(), fila.tipo.strip().lower(), fila.patron.strip()
+        if not metrica or not patron:
+            continue
+        if tipo not in TIPOS_REGLA:
+            raise ValueError(f"{path}: tipo de regla desconocido '{tipo}' (use {', '.join(TIPOS_REGLA)})")
+        if tipo == "regex":
+            try:
+                re.compile(patron)
+            except re.error as e:
+                raise ValueError(f"{path}: expresión regular inválida '{patron}': {e}") from e
+        reglas.append((metrica, tipo, patron))
+    return tuple(reglas)
+
+
+def cargar_reglas_exclusion(path=ARCHIVO_EXCLUSIONES):
+    """Reglas ((metrica, tipo, patron), ...) del archivo; se releen solo cuando cambia su mtime."""
+    if not os.path.exists(path):
+        return ()
+    return obtener_compartido(path, lambda: _leer_reglas(path), os.path.getmtime(path), "reglas_exclusion")
+
+
+@functools.lru_cache(maxsize=8)
+def compilar_reglas(reglas):
+    """{metrica: ReglaExclusion} para una tupla de reglas (compartido mientras no cambien)."""
+    por_metrica = {}
+    for metrica, tipo, patron in reglas:
+        por_metrica.setdefault(metrica, []).append((tipo, patron))
+    return {metrica: ReglaExclusion(lista) for metrica, lista in por_metrica.items()}
+
+
+def mascara_exclusion(proyectos, metrica, reglas):
+    """Array booleano con los proyectos de la columna que `reglas` excluye para esa métrica."""
+    regla = compilar_reglas(tuple(reglas)).get(metrica) if reglas else None
+    if regla is None:
+        return np.zeros(len(proyectos), dtype=bool)
+    return regla.mascara(proyectos)
@@ -0,0 +1,102 @@
+import hashlib
+import io
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# xlsxwriter escribe bastante más rápido que openpyxl; si no está instalado se usa openpyxl
+try:
+    import xlsxwriter  # noqa: F401
+    MOTOR_EXCEL = "xlsxwriter"
+except ImportError:
+    MOTOR_EXCEL = "openpyxl"
+
+# Cantidad de archivos generados que se conservan en memoria (los más recientes)
+MAX_ARCHIVOS_CACHE = 16
+
+_cache_archivos = OrderedDict()
+_lock_archivos = threading.Lock()
+
+_CARACTERES_INVALIDOS_HOJA = re.compile(r"[\[\]:*?/\\]")
+
+
+def huella(*partes):
+    """Hash estable de los parámetros que determinan el contenido de un archivo exportado."""
+    texto = json.dumps(partes, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def huella_dataframe(df):
+    """Hash del contenido de un DataFrame (columnas y valores)."""
+    valores = pd.util.hash_pandas_object(df, index=False).values
+    return huella(list(df.columns), hashlib.sha1(valores.tobytes()).hexdigest())
+
+
+def nombre_hoja(nombre, usados):
+    """Nombre de hoja válido para Excel (máx. 31 caracteres, sin caracteres reservados, único)."""
+    base = _CARACTERES_INVALIDOS_HOJA.sub("_", str(nombre)).strip() or "Hoja"
+    base = base[:31]
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufijo = f" ({n})"
+        candidato = base[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def generar_excel(hojas):
+    """Genera un xlsx en memoria a partir de {nombre_hoja: DataFrame} y devuelve los bytes."""
+    output = io.BytesIO()
+    usados = set()
+    with pd.ExcelWriter(output, engine=MOTOR_EXCEL) as writer:
+        for nombre, df in hojas.items():
+            df.to_excel(writer, index=False, sheet_name=nombre_hoja(nombre, usados))
+    return output.getvalue()
+
+
+def obtener_o_generar(clave, generar):
+    """Devuelve los bytes cacheados para la clave o los genera con generar() y los guarda."""
+    with _lock_archivos:
+        if clave in _cache_archivos:
+            _cache_archivos.move_to_end(clave)
+            return _cache_archivos[clave]
+    datos = generar()
+    with _lock_archivos:
+        _cache_archivos[clave] = datos
+        _cache_archivos.move_to_end(clave)
+        while len(_cache_archivos) > MAX_ARCHIVOS_CACHE:
+            _cache_archivos.popitem(last=False)
+    return datos
+
+
+def excel_bajo_demanda(clave, construir_hojas):
+    """Callable sin argumentos para st.download_button(data=...).
+
+    Streamlit lo ejecuta solo al hacer clic, así que el archivo no se arma en cada rerun.
+    construir_hojas() debe devolver {nombre_hoja: DataFrame} y no usar comandos de Streamlit.
+    """
+    return lambda: obtener_o_generar(("xlsx", clave), lambda: generar_excel(construir_hojas()))
+
+
+def csv_bajo_demanda(clave, df, encoding="utf-8-sig"):
+    """Igual que excel_bajo_demanda pero para un CSV de un solo DataFrame.
+
+    Por defecto con BOM (utf-8-sig) para que Excel abra bien los acentos.
+    """
+    return lambda: obtener_o_generar(
+        ("csv", clave, encoding), lambda: df.to_csv(index=False).encode(encoding)
+    )
+
+
+def hojas_por_celula(resumen, df_proyectos, columnas, nombre_resumen="Resumen"):
+    """Hoja de resumen más una hoja por célula con sus proyectos."""
+    hojas = {nombre_resumen: resumen}
+    for celula, df_celula in df_proyectos.groupby("Celula", sort=True):
+        hojas[celula] = df_celula[[c for c in columnas if c in df_celula.columns]].reset_index(drop=True)
+    return hojas
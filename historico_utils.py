@@ -0,0 +1,228 @@
+"""Históricos en archivos Arrow IPC de solo lectura, abiertos con memory map.
+
+Todos los procesos de Streamlit del host (y los scripts) leen el mismo archivo: el page
+cache del sistema operativo es la única copia de los datos. Las columnas numéricas se
+guardan sin máscara de nulos (NaN como valor) para que pasen a pandas sin copiarse.
+
+- historico.arrow: el almacén SQLite normalizado (resumen general, reporte OKR).
+- historico_archivos.arrow: los archivos mensuales como los leen las páginas de detalle y
+  resumen anual (ratings sin normalizar salvo duplicated_lines_density, bugs por severidad
+  sin dato = 0).
+
+Las lecturas por célula filtran la tabla del memory map: solo se copian esas filas.
+
+    python historico_utils.py          # sincroniza el almacén y regenera los archivos si cambiaron
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+from cache_utils import obtener_compartido
+from catalogo_utils import catalogo_meses
+from datos_utils import COLUMNAS_RATING, RATINGS_VALIDOS, mes_de_archivo
+from db_utils import COLUMNAS_METRICAS, abrir_almacen, consultar_metricas
+
+RUTA_HISTORICO = "data/historico.arrow"
+RUTA_HISTORICO_ARCHIVOS = "data/historico_archivos.arrow"
+
+COLUMNAS_BUGS_SEVERIDAD = ["bugs_blocker", "bugs_critical", "bugs_major", "bugs_minor"]
+
+# Cambia cuando cambia lo que guarda leer_archivo_mes: obliga a regenerar el archivo
+FORMATO_ARCHIVOS = 2
+
+# Clave de metadatos del esquema con la huella de los archivos mensuales importados
+CLAVE_FIRMA = b"firma_fuentes"
+
+# Un solo hilo del proceso revisa y regenera cada archivo a la vez
+_bloqueos_regeneracion = {}
+_bloqueo_registro = threading.Lock()
+
+
+def firma_almacen(conn):
+    """Huella de los archivos mensuales registrados en el almacén (ruta y mtime)."""
+    filas = conn.execute(
+        "SELECT ruta, mtime FROM fuentes WHERE ruta LIKE ? ORDER BY ruta", ("%metricas_%",)
+    ).fetchall()
+    return hashlib.sha1(repr(filas).encode("utf-8")).hexdigest()
+
+
+def _tabla_arrow(df, firma):
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    columnas = []
+    for campo, columna in zip(tabla.schema, tabla.columns):
+        if pa.types.is_floating(campo.type):
+            # NaN como valor y sin bitmap de nulos: to_pandas los devuelve sin copiar
+            columna = pa.array(columna.to_numpy(zero_copy_only=False), type=campo.type, from_pandas=False)
+        columnas.append(columna)
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[CLAVE_FIRMA] = firma.encode("utf-8")
+    return pa.table(columnas, names=tabla.column_names).replace_schema_metadata(metadatos)
+
+
+def escribir_historico(df, firma, ruta=RUTA_HISTORICO):
+    """Escribe el archivo de forma atómica: los lectores con el archivo anterior abierto no se ven afectados."""
+    tabla = _tabla_arrow(df, firma)
+    # Temporal propio de cada escritura (hilos y procesos no comparten el nombre)
+    descriptor, temporal = tempfile.mkstemp(
+        prefix=f"{os.path.basename(ruta)}.", suffix=".tmp", dir=os.path.dirname(ruta) or "."
+    )
+    os.close(descriptor)
+    try:
+        with pa.OSFile(temporal, "wb") as destino:
+            with ipc.new_file(destino, tabla.schema) as escritor:
+                escritor.write_table(tabla)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def _regenerar_si_cambio(ruta, firma, construir):
+    """Escribe construir() en `ruta` si su huella no es `firma`; revisa de nuevo con el bloqueo tomado."""
+    if firma_historico(ruta) == firma:
+        return
+    with _bloqueo_registro:
+        bloqueo = _bloqueos_regeneracion.setdefault(os.path.abspath(ruta), threading.Lock())
+    with bloqueo:
+        # Otra sesión pudo regenerarlo mientras se esperaba el bloqueo
+        if firma_historico(ruta) != firma:
+            escribir_historico(construir(), firma, ruta)
+
+
+def firma_historico(ruta=RUTA_HISTORICO):
+    """Huella guardada en el archivo (None si no existe o no es legible)."""
+    try:
+        with pa.memory_map(ruta) as origen:
+            metadatos = ipc.open_file(origen).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    firma = metadatos.get(CLAVE_FIRMA)
+    return firma.decode("utf-8") if firma else None
+
+
+def asegurar_historico(conn, ruta=RUTA_HISTORICO):
+    """Regenera el archivo desde el almacén si su huella no coincide; devuelve la huella vigente."""
+    firma = firma_almacen(conn)
+    _regenerar_si_cambio(ruta, firma, lambda: consultar_metricas(conn))
+    return firma
+
+
+def leer_archivo_mes(path):
+    """Archivo metricas_YYYY-MM.xlsx como lo usan las páginas de detalle y resumen anual.
+
+    Los ratings quedan como vienen salvo duplicated_lines_density, que se valida (letra
+    A-E o NaN); coverage es numérico y los bugs por severidad son enteros, con 0 cuando no
+    hay dato.
+    """
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    # NO usar fillna(0) para mantener valores NaN
+    df['coverage'] = pd.to_numeric(df['coverage'], errors='coerce')
+
+    # duplicated_lines_density es un rating (A, B, C, D, E), no un porcentaje; los archivos
+    # más antiguos lo traen como 'complexity'
+    if 'duplicated_lines_density' not in df.columns and 'complexity' in df.columns:
+        df = df.rename(columns={'complexity': 'duplicated_lines_density'})
+    if 'duplicated_lines_density' in df.columns:
+        densidad = df['duplicated_lines_density'].astype(str).str.strip().str.upper()
+        # Valores inválidos como NaN en lugar de N/A
+        df['duplicated_lines_density'] = densidad.where(densidad.isin(RATINGS_VALIDOS))
+
+    for col in COLUMNAS_BUGS_SEVERIDAD:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+    return df
+
+
+def firma_archivos(fuentes):
+    """Huella de los archivos mensuales a partir de sus (ruta, mtime), p. ej. catalogo.firma."""
+    return hashlib.sha1(repr((FORMATO_ARCHIVOS, sorted(fuentes))).encode("utf-8")).hexdigest()
+
+
+def _historico_de_archivos(rutas):
+    columnas = COLUMNAS_METRICAS
+    dfs = []
+    for path in sorted(rutas):
+        df = leer_archivo_mes(path)
+        df["Mes"] = pd.to_datetime(mes_de_archivo(path), format="%Y-%m")
+        dfs.append(df.reindex(columns=columnas))
+    if not dfs:
+        return pd.DataFrame(columns=columnas)
+    df = pd.concat(dfs, ignore_index=True)
+    # Un archivo Arrow necesita un tipo por columna: los ratings como texto y los totales de
+    # bugs (que las páginas no usan) como números
+    for col in COLUMNAS_RATING:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    for col in ["bugs", "bugs_info"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def asegurar_historico_archivos(fuentes, ruta=RUTA_HISTORICO_ARCHIVOS):
+    """Regenera el archivo si cambió algún mes de `fuentes` ((ruta, mtime)); devuelve la huella vigente."""
+    firma = firma_archivos(fuentes)
+    _regenerar_si_cambio(ruta, firma, lambda: _historico_de_archivos([ruta_mes for ruta_mes, _ in fuentes]))
+    return firma
+
+
+def abrir_historico(ruta=RUTA_HISTORICO, columnas=None, celulas=None):
+    """Tabla Arrow respaldada por el memory map del archivo (sin leerlo a memoria propia).
+
+    Con `celulas` solo quedan las filas de esas células, en el orden del archivo.
+    """
+    with pa.memory_map(ruta) as origen:
+        tabla = ipc.open_file(origen).read_all()
+    if celulas is not None:
+        valores = pa.array(list(dict.fromkeys(celulas)), type=tabla.schema.field("Celula").type)
+        tabla = tabla.filter(pc.is_in(tabla["Celula"], value_set=valores))
+    return tabla.select(columnas) if columnas else tabla
+
+
+def leer_historico(ruta=RUTA_HISTORICO, columnas=None, celulas=None):
+    """DataFrame del histórico; sin `celulas`, columnas numéricas y Mes quedan como vistas de solo lectura del archivo."""
+    return abrir_historico(ruta, columnas, celulas).to_pandas(split_blocks=True)
+
+
+def _clave_celulas(celulas):
+    return None if celulas is None else tuple(sorted(set(celulas)))
+
+
+def historico_archivos(celulas=None):
+    """Histórico de las páginas de detalle y resumen anual, compartido entre sesiones.
+
+    Se regenera el archivo cuando cambia un mes de uploads/. Con `celulas` (las de un
+    usuario) solo se leen y retienen las filas de esas células.
+    """
+    fuentes = catalogo_meses().firma
+    clave = _clave_celulas(celulas)
+
+    def construir():
+        asegurar_historico_archivos(fuentes)
+        return leer_historico(RUTA_HISTORICO_ARCHIVOS, celulas=clave)
+
+    return obtener_compartido(clave, construir, firma_archivos(fuentes), "historico_archivos.arrow")
+
+
+def version_historico_archivos(celulas=None):
+    """Versión de los datos de historico_archivos(celulas) para el `version_datos` del memo en disco."""
+    return ("historico_archivos.arrow", firma_archivos(catalogo_meses().firma), _clave_celulas(celulas))
+
+
+if __name__ == "__main__":
+    conn = abrir_almacen()
+    try:
+        vigente = firma_historico() == firma_almacen(conn)
+        asegurar_historico(conn)
+    finally:
+        conn.close()
+    print(f"✔️ {RUTA_HISTORICO} {'ya estaba al día' if vigente else 'regenerado'}.")
+    fuentes = catalogo_meses().firma
+    vigente = firma_historico(RUTA_HISTORICO_ARCHIVOS) == firma_archivos(fuentes)
+    asegurar_historico_archivos(fuentes)
+    print(f"✔️ {RUTA_HISTORICO_ARCHIVOS} {'ya estaba al día' if vigente else 'regenerado'}.")
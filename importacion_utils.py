@@ -0,0 +1,104 @@
+"""Importaciones diferidas y reporte de tiempos de importación.
+
+Uso del reporte (equivalente a `python -X importtime`, resumido por archivo):
+    python importacion_utils.py login.py pages/app.py --top 15
+
+Para cada archivo se ejecutan solo sus importaciones de primer nivel en un proceso nuevo,
+así que el tiempo es el de un arranque en frío de la página.
+"""
+import argparse
+import ast
+import importlib
+import subprocess
+import sys
+
+# Paquetes pesados que conviene no cargar antes de tiempo (streamlit ya importa plotly y
+# plotly.graph_objects, que son livianos; plotly.express arrastra el resto)
+PAQUETES_PESADOS = ["pandas", "numpy", "pyarrow", "plotly.express", "matplotlib"]
+
+
+class ModuloPerezoso:
+    """Módulo que se importa en el primer acceso a uno de sus atributos."""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def _cargar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = "cargado" if self._modulo is not None else "sin cargar"
+        return f"<módulo perezoso {self._nombre} ({estado})>"
+
+
+def importar_perezoso(nombre):
+    """Reemplazo de `import nombre as alias` que difiere la importación hasta el primer uso."""
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    return ModuloPerezoso(nombre)
+
+
+# ---------------------- Reporte de tiempos ----------------------
+
+def importaciones_de_archivo(path):
+    """Código con solo las sentencias import de primer nivel del archivo."""
+    with open(path, encoding="utf-8") as f:
+        arbol = ast.parse(f.read(), filename=path)
+    return "\n".join(
+        ast.unparse(nodo) for nodo in arbol.body if isinstance(nodo, (ast.Import, ast.ImportFrom))
+    )
+
+
+def _leer_importtime(salida):
+    """Filas (modulo, propio_us, acumulado_us, profundidad) del stderr de -X importtime."""
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        propio, acumulado, modulo = linea[len("import time:"):].split("|")
+        profundidad = (len(modulo) - len(modulo.lstrip())) // 2
+        filas.append((modulo.strip(), int(propio), int(acumulado), profundidad))
+    return filas
+
+
+def perfil_importacion(path, top=10):
+    """Tiempo total de importación de un archivo, módulos más costosos y paquetes pesados cargados."""
+    codigo = importaciones_de_archivo(path)
+    codigo += "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % (PAQUETES_PESADOS,)
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo], capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"{path}: {proceso.stderr.strip().splitlines()[-1]}")
+    filas = _leer_importtime(proceso.stderr)
+    # La profundidad mínima son las importaciones directas; su acumulado suma el total
+    minima = min((f[3] for f in filas), default=0)
+    total_us = sum(f[2] for f in filas if f[3] == minima)
+    directos = sorted((f for f in filas if f[3] <= minima + 1), key=lambda f: -f[2])[:top]
+    pesados = [m for m in proceso.stdout.strip().split(",") if m]
+    return total_us / 1000, [(m, acumulado / 1000) for m, _, acumulado, _ in directos], pesados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de importación en frío de páginas y scripts.")
+    parser.add_argument("archivos", nargs="+", help="Archivos .py (por ejemplo login.py pages/app.py)")
+    parser.add_argument("--top", type=int, default=10, help="Módulos más costosos a mostrar por archivo")
+    args = parser.parse_args(argv)
+
+    for path in args.archivos:
+        total_ms, costosos, pesados = perfil_importacion(path, args.top)
+        print(f"\n{path}: {total_ms:.0f} ms")
+        print(f"  paquetes pesados cargados: {', '.join(pesados) or 'ninguno'}")
+        for modulo, ms in costosos:
+            print(f"  {ms:8.1f} ms  {modulo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
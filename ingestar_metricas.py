@@ -0,0 +1,179 @@
+"""Carga masiva de exportaciones mensuales de SonarQube a uploads/ y al almacén.
+
+Uso:
+    python ingestar_metricas.py historico/                 # todos los .xlsx/.xls/.csv de la carpeta
+    python ingestar_metricas.py "exportaciones/**/*.xlsx" --forzar
+    python ingestar_metricas.py historico/ --simular       # solo valida, no escribe nada
+
+El mes se toma del nombre del archivo (2025-03, 2025_03) o, si no lo tiene, del valor más
+frecuente de la columna Mes. Los archivos se leen y validan en paralelo; cada mes se guarda
+como uploads/metricas_YYYY-MM.xlsx y se importa normalizado al almacén.
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from catalogo_utils import invalidar_catalogo
+from datos_utils import (
+    UPLOAD_DIR,
+    meses_de_columna,
+    mes_de_nombre,
+    normalizar_metricas,
+    validar_metricas,
+)
+from db_utils import conectar, importar_archivo_mes
+from export_utils import MOTOR_EXCEL
+
+EXTENSIONES = (".xlsx", ".xls", ".csv")
+
+
+def expandir_rutas(rutas):
+    """Archivos a ingerir a partir de carpetas, patrones glob o archivos sueltos (sin repetir)."""
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            candidatos = sorted(os.path.join(ruta, nombre) for nombre in os.listdir(ruta))
+        elif glob.has_magic(ruta):
+            candidatos = sorted(glob.glob(ruta, recursive=True))
+        else:
+            candidatos = [ruta]
+        archivos.extend(
+            c for c in candidatos
+            if c.lower().endswith(EXTENSIONES) and not os.path.basename(c).startswith("~$")
+        )
+    return list(dict.fromkeys(archivos))
+
+
+def leer_exportacion(path):
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+def procesar_archivo(path):
+    """Lee, valida y normaliza un archivo (se ejecuta en un proceso del pool)."""
+    resultado = {"origen": path, "mes": None, "filas": 0, "celulas": 0,
+                 "errores": [], "avisos": [], "crudo": None, "normalizado": None}
+    if not os.path.exists(path):
+        resultado["errores"].append("el archivo no existe")
+        return resultado
+    try:
+        crudo = leer_exportacion(path)
+    except Exception as e:
+        resultado["errores"].append(f"no se pudo leer: {e}")
+        return resultado
+
+    errores, avisos = validar_metricas(crudo)
+    meses = meses_de_columna(crudo)
+    mes = mes_de_nombre(path)
+    if mes is None and not meses.empty:
+        mes = meses.index[0]
+    if mes is None:
+        errores.append("no se pudo inferir el mes (ni del nombre ni de la columna Mes)")
+    elif meses.drop(mes, errors="ignore").sum():
+        avisos.append(f"{int(meses.drop(mes, errors='ignore').sum())} filas con una columna Mes distinta de {mes}")
+
+    resultado.update(mes=mes, filas=len(crudo), errores=errores, avisos=avisos)
+    if errores:
+        return resultado
+    normalizado = normalizar_metricas(crudo, mes)
+    resultado.update(celulas=int(normalizado["Celula"].nunique()), normalizado=normalizado)
+    if not path.lower().endswith(".xlsx"):
+        resultado["crudo"] = crudo
+    return resultado
+
+
+def procesar_en_paralelo(archivos, trabajadores):
+    if trabajadores <= 1 or len(archivos) <= 1:
+        return [procesar_archivo(path) for path in archivos]
+    with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        return list(pool.map(procesar_archivo, archivos))
+
+
+def guardar_en_uploads(resultado, destino):
+    """Copia el archivo tal cual (como la página de carga) o, si no es .xlsx, lo convierte."""
+    if resultado["crudo"] is None:
+        shutil.copyfile(resultado["origen"], destino)
+    else:
+        resultado["crudo"].to_excel(destino, index=False, engine=MOTOR_EXCEL)
+
+
+def ingestar(archivos, forzar=False, simular=False, trabajadores=None):
+    """Procesa los archivos y devuelve el resumen como DataFrame (una fila por archivo)."""
+    trabajadores = trabajadores or min(4, os.cpu_count() or 1)
+    resultados = procesar_en_paralelo(archivos, trabajadores)
+
+    meses_vistos = {}
+    for r in resultados:
+        if r["errores"]:
+            r["estado"] = "error"
+        elif r["mes"] in meses_vistos:
+            r["estado"] = "error"
+            r["errores"].append(f"mes repetido con {os.path.basename(meses_vistos[r['mes']])}")
+        elif os.path.exists(os.path.join(UPLOAD_DIR, f"metricas_{r['mes']}.xlsx")) and not forzar:
+            r["estado"] = "omitido"
+            r["avisos"].append("el mes ya existe en uploads (usa --forzar para reemplazarlo)")
+        else:
+            r["estado"] = "validado" if simular else "importado"
+        if r["mes"] and not r["errores"]:
+            meses_vistos[r["mes"]] = r["origen"]
+
+    por_importar = [r for r in resultados if r["estado"] == "importado"]
+    if por_importar:
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        conn = conectar()
+        try:
+            with conn:
+                for r in por_importar:
+                    destino = os.path.join(UPLOAD_DIR, f"metricas_{r['mes']}.xlsx")
+                    guardar_en_uploads(r, destino)
+                    importar_archivo_mes(conn, destino, r["normalizado"], r["mes"])
+        finally:
+            conn.close()
+        invalidar_catalogo()
+
+    return pd.DataFrame([
+        {
+            "Archivo": os.path.basename(r["origen"]),
+            "Mes": r["mes"] or "",
+            "Filas": r["filas"],
+            "Células": r["celulas"],
+            "Estado": r["estado"],
+            "Detalle": "; ".join(r["errores"] + r["avisos"]),
+        }
+        for r in resultados
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta masiva de archivos mensuales de métricas.")
+    parser.add_argument("rutas", nargs="+", help="Carpetas, patrones glob o archivos .xlsx/.xls/.csv")
+    parser.add_argument("--forzar", action="store_true", help="Reemplaza meses que ya existen en uploads/")
+    parser.add_argument("--simular", action="store_true", help="Valida sin escribir en uploads/ ni en el almacén")
+    parser.add_argument("--trabajadores", type=int, help="Procesos para leer archivos (por defecto hasta 4)")
+    parser.add_argument("--reporte", help="Guarda el resumen en este CSV")
+    args = parser.parse_args(argv)
+
+    archivos = expandir_rutas(args.rutas)
+    if not archivos:
+        print("⚠️ No se encontraron archivos .xlsx, .xls o .csv en las rutas indicadas.")
+        return 1
+
+    resumen = ingestar(archivos, args.forzar, args.simular, args.trabajadores)
+    with pd.option_context("display.max_colwidth", 120, "display.width", 200):
+        print(resumen.to_string(index=False))
+    if args.reporte:
+        resumen.to_csv(args.reporte, index=False)
+
+    conteo = resumen["Estado"].value_counts()
+    print("\n" + ", ".join(f"{estado}: {n}" for estado, n in conteo.items()))
+    return 1 if conteo.get("error", 0) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,19 @@
 import streamlit as st
-import bcrypt
-import json
-import os
 
 from auth_utils import celulas_desde_usuario, mostrar_navegacion_usuario
-
-USUARIOS_FILE = "usuarios.json"
+from usuarios_utils import (
+    cargar_usuarios,
+    registrar_fallo_login,
+    reiniciar_login,
+    segundos_bloqueo_login,
+    verificar_password,
+)
 
 # ---------------------- Funciones ----------------------
 
-def cargar_usuarios():
-    if os.path.exists(USUARIOS_FILE):
-        with open(USUARIOS_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
 def verificar_credenciales(username, password, usuarios):
     if username in usuarios:
-        hashed = usuarios[username]["password"].encode("utf-8")
-        if bcrypt.checkpw(password.encode("utf-8"), hashed):
+        if verificar_password(password, usuarios[username]["password"]):
             user = usuarios[username]
             return user.get("rol"), celulas_desde_usuario(user)
     return None, None
@@ -46,10 +41,17 @@ else:
     password = st.text_input("Contraseña", type="password")
 
     if st.button("Entrar"):
+        ip = getattr(st.context, "ip_address", None)
+        espera = segundos_bloqueo_login(username, ip)
+        if espera:
+            st.error(f"Demasiados intentos fallidos. Intenta de nuevo en {espera} segundos.")
+            st.stop()
+
         usuarios = cargar_usuarios()
         rol, celulas = verificar_credenciales(username, password, usuarios)
 
         if rol:
+            reiniciar_login(username, ip)
             st.session_state["usuario"] = username
             st.session_state["rol"] = rol
             st.session_state["celulas"] = celulas
@@ -59,4 +61,5 @@ else:
                 st.success("Inicio de sesión exitoso")
             st.rerun()
         else:
+            registrar_fallo_login(username, ip)
             st.error("Credenciales incorrectas")
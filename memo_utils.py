@@ -0,0 +1,295 @@
+"""Memo en disco para cálculos costosos que sobrevive a reinicios del servidor.
+
+Cada resultado se guarda en DIR_MEMO con un nombre derivado de la huella de sus entradas:
+versión del código (el módulo de la función y los módulos del proyecto que importa, más
+`version`), versión de los datos y configuración recibida como argumentos. Mismas
+entradas => mismo archivo, sin importar qué proceso lo calculó.
+El directorio se limita a MAX_BYTES_MEMO eliminando primero lo usado hace más tiempo; se
+revisa cuando los bytes guardados por el proceso pasan el límite o cada RECORTE_CADA
+guardados (otros procesos también escriben en él).
+"""
+import ast
+import functools
+import hashlib
+import importlib.util
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIR_MEMO = "data/memo"
+DIR_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+MAX_BYTES_MEMO = 256 * 1024 * 1024
+EXTENSION_MEMO = ".pkl"
+RECORTE_CADA = 50
+# Al pasarse se recorta hasta esta fracción del límite, para no recorrer en cada guardado
+FRACCION_TRAS_RECORTE = 0.9
+
+# Contadores del proceso para el panel de cachés
+_contadores = {"aciertos": 0, "fallos": 0, "guardados": 0, "desalojos": 0}
+_bloqueo_contadores = threading.Lock()
+# Bytes del directorio según el último recorrido más lo guardado después (None: sin recorrer)
+_estado_recorte = {"bytes": None, "guardados": 0}
+_bloqueo_recorte = threading.Lock()
+
+
+def _contar(nombre, cantidad=1):
+    with _bloqueo_contadores:
+        _contadores[nombre] += cantidad
+
+
+class NoMemoizable(TypeError):
+    """Argumento sin huella estable: la llamada se ejecuta sin memo."""
+
+
+def _actualizar(h, valor):
+    if isinstance(valor, pd.DataFrame):
+        h.update(b"df")
+        _actualizar(h, [str(c) for c in valor.columns])
+        _actualizar(h, [str(t) for t in valor.dtypes])
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, pd.Series):
+        h.update(b"serie")
+        _actualizar(h, [str(valor.name), str(valor.dtype)])
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(f"nd{valor.dtype}{valor.shape}".encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, dict):
+        h.update(b"dict")
+        for clave in sorted(valor, key=repr):
+            _actualizar(h, clave)
+            _actualizar(h, valor[clave])
+    elif isinstance(valor, (list, tuple)):
+        h.update(f"{type(valor).__name__}{len(valor)}".encode())
+        for elemento in valor:
+            _actualizar(h, elemento)
+    elif isinstance(valor, (set, frozenset)):
+        _actualizar(h, sorted(valor, key=repr))
+    elif valor is None or isinstance(valor, (str, bytes, bool, int, float, np.generic, pd.Timestamp)):
+        h.update(f"{type(valor).__name__}:{valor!r}".encode())
+    else:
+        raise NoMemoizable(f"sin huella para {type(valor).__name__}")
+    h.update(b";")
+
+
+def huella(*valores):
+    """Hash sha256 del contenido de los valores (DataFrames, Series, contenedores y escalares)."""
+    h = hashlib.sha256()
+    for valor in valores:
+        _actualizar(h, valor)
+    return h.hexdigest()
+
+
+def _archivo_proyecto(nombre):
+    """Archivo del módulo si es del proyecto (no de la biblioteca estándar ni de site-packages)."""
+    modulo = sys.modules.get(nombre)
+    try:
+        archivo = modulo.__file__ if modulo is not None else importlib.util.find_spec(nombre).origin
+    except (AttributeError, ImportError, ValueError):
+        return None
+    if not archivo:
+        return None
+    archivo = os.path.abspath(archivo)
+    if not archivo.startswith(DIR_PROYECTO + os.sep) or "site-packages" in archivo:
+        return None
+    return archivo
+
+
+def _importados(fuente):
+    """Nombres de los módulos que importa un fuente (import x / from x import y)."""
+    for nodo in ast.walk(ast.parse(fuente)):
+        if isinstance(nodo, ast.Import):
+            yield from (alias.name for alias in nodo.names)
+        elif isinstance(nodo, ast.ImportFrom) and nodo.level == 0 and nodo.module:
+            yield nodo.module
+
+
+def modulos_de(nombre):
+    """{nombre: fuente} del módulo y de los módulos del proyecto de los que depende."""
+    pendientes, fuentes = [nombre], {}
+    while pendientes:
+        actual = pendientes.pop()
+        archivo = None if actual in fuentes else _archivo_proyecto(actual)
+        if archivo is None:
+            continue
+        with open(archivo, "rb") as f:
+            fuentes[actual] = f.read()
+        pendientes.extend(_importados(fuentes[actual]))
+    return fuentes
+
+
+def version_codigo(funcion, version=1):
+    """Huella del código del que depende la función: el fuente de su módulo y de los módulos
+    del proyecto que importa (p. ej. los auxiliares de metricas_utils o exclusiones_utils)."""
+    h = hashlib.sha256(f"{funcion.__module__}.{funcion.__qualname__}:{version}".encode())
+    for nombre, fuente in sorted(modulos_de(funcion.__module__).items()):
+        h.update(nombre.encode())
+        h.update(hashlib.sha256(fuente).digest())
+    return h.hexdigest()
+
+
+def _ruta(clave):
+    return os.path.join(DIR_MEMO, clave[:2], clave + EXTENSION_MEMO)
+
+
+def leer_memo(clave):
+    """(True, resultado) si la clave está en disco; marca el archivo como recién usado."""
+    ruta = _ruta(clave)
+    try:
+        with open(ruta, "rb") as f:
+            resultado = pickle.load(f)
+        os.utime(ruta)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # Ausente, recortada por otro proceso o escrita por una versión anterior del código
+        _contar("fallos")
+        return False, None
+    _contar("aciertos")
+    return True, resultado
+
+
+def archivos_memo():
+    """[(ruta, bytes, último uso)] de las entradas guardadas."""
+    archivos = []
+    for raiz, _, nombres in os.walk(DIR_MEMO):
+        for nombre in nombres:
+            if not nombre.endswith(EXTENSION_MEMO):
+                continue
+            ruta = os.path.join(raiz, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            archivos.append((ruta, estado.st_size, estado.st_mtime))
+    return archivos
+
+
+def recortar_memo(max_bytes=None):
+    """Elimina las entradas menos usadas recientemente hasta quedar bajo max_bytes; devuelve cuántas."""
+    max_bytes = MAX_BYTES_MEMO if max_bytes is None else max_bytes
+    with _bloqueo_recorte:
+        archivos = sorted(archivos_memo(), key=lambda a: a[2])
+        total = sum(a[1] for a in archivos)
+        eliminadas = 0
+        for ruta, tamano, _ in archivos:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(ruta)
+            except OSError:
+                continue
+            total -= tamano
+            eliminadas += 1
+        _estado_recorte["bytes"], _estado_recorte["guardados"] = total, 0
+    _contar("desalojos", eliminadas)
+    return eliminadas
+
+
+def _recortar_si_hace_falta(tamano):
+    # Recorrer el directorio en cada guardado es caro: se suma lo escrito y solo se recorre
+    # al pasar el límite, cada RECORTE_CADA guardados o la primera vez
+    with _bloqueo_recorte:
+        bytes_conocidos = _estado_recorte["bytes"]
+        _estado_recorte["guardados"] += 1
+        if bytes_conocidos is not None:
+            _estado_recorte["bytes"] = bytes_conocidos + tamano
+        recorrer = (bytes_conocidos is None or _estado_recorte["bytes"] > MAX_BYTES_MEMO
+                    or _estado_recorte["guardados"] >= RECORTE_CADA)
+    if recorrer:
+        recortar_memo(int(MAX_BYTES_MEMO * FRACCION_TRAS_RECORTE))
+
+
+def guardar_memo(clave, resultado):
+    """Escribe la entrada de forma atómica y recorta el directorio si supera el límite."""
+    ruta = _ruta(clave)
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Temporal propio de cada escritura: hilos y procesos no comparten el nombre
+        descriptor, temporal = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(ruta))
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+        tamano = os.path.getsize(ruta)
+    except (OSError, pickle.PicklingError):
+        return
+    _contar("guardados")
+    _recortar_si_hace_falta(tamano)
+
+
+def contadores_memo():
+    """Copia de los contadores del proceso: aciertos, fallos, guardados y desalojos."""
+    with _bloqueo_contadores:
+        return dict(_contadores)
+
+
+def estadisticas_memo():
+    """Estado del memo en disco con las columnas de cache_utils.estadisticas_caches."""
+    archivos = archivos_memo()
+    contadores = contadores_memo()
+    consultas = contadores["aciertos"] + contadores["fallos"]
+    return {
+        "Caché": f"{DIR_MEMO} (disco)",
+        "Entradas": len(archivos),
+        "Bytes": sum(a[1] for a in archivos),
+        "Aciertos": contadores["aciertos"],
+        "Fallos": contadores["fallos"],
+        "% Aciertos": round(100 * contadores["aciertos"] / consultas, 1) if consultas else None,
+        "Desalojos": contadores["desalojos"],
+        "Máx. bytes": MAX_BYTES_MEMO,
+    }
+
+
+def memo_en_disco(version=1, extra=None):
+    """Decorador: guarda en disco el resultado según versión del código, de los datos y configuración.
+
+    Quien llama con un histórico pasa `version_datos=` (p. ej. la huella del archivo Arrow
+    y las células leídas, o esa versión más la célula si filtró el histórico): los
+    DataFrames de la llamada se identifican por ella y no se recorren. Sin `version_datos`
+    se usa el contenido de los DataFrames, lo adecuado para resultados chicos como la salida
+    de bugs_mensuales. El resto de los argumentos (umbrales, configuración) entra en la huella.
+
+    La versión del código se calcula en la primera llamada con version_codigo; subir
+    `version` invalida las entradas cuando cambia algo que no está en el código (formato
+    del resultado). `extra`, si se da, se llama en cada invocación y su resultado entra en
+    la huella (p. ej. un registro que puede cambiar).
+    """
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+        prefijo = []
+        bloqueo = threading.Lock()
+
+        def version_de_codigo():
+            with bloqueo:
+                if not prefijo:
+                    prefijo.append(version_codigo(funcion, version))
+                return prefijo[0]
+
+        @functools.wraps(funcion)
+        def envoltura(*args, version_datos=None, **kwargs):
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            valores = dict(argumentos.arguments)
+            if version_datos is not None:
+                valores = {nombre: "datos" if isinstance(valor, (pd.DataFrame, pd.Series)) else valor
+                           for nombre, valor in valores.items()}
+            try:
+                clave = huella(version_de_codigo(), version_datos, valores, extra() if extra else None)
+            except (NoMemoizable, TypeError):
+                return funcion(*args, **kwargs)
+            encontrado, resultado = leer_memo(clave)
+            if encontrado:
+                return resultado
+            resultado = funcion(*args, **kwargs)
+            guardar_memo(clave, resultado)
+            return resultado
+        return envoltura
+    return decorador
@@ -0,0 +1,147 @@
+"""Registro de métricas de calidad y evaluación del cumplimiento de todas en una pasada.
+
+Cada métrica declara su columna, si es un rating (letras A-E) o un umbral numérico, la
+clave de su umbral en parametros_metricas.csv y su `clave`, de la que salen las claves de
+configuración de N/A, de proyectos seleccionados y de meta. Agregar una métrica (p. ej.
+vulnerabilities o code_smells) es agregar una entrada con registrar_metrica.
+"""
+import numpy as np
+import pandas as pd
+
+from exclusiones_utils import mascara_exclusion
+
+RATING = "rating"
+UMBRAL = "umbral"
+
+
+class Metrica:
+    """Una métrica del registro; sus exclusiones de proyectos están en exclusiones_utils."""
+
+    def __init__(self, clave, nombre, columna, tipo, parametro, meta=90, en_okr=True):
+        self.clave = clave
+        self.nombre = nombre
+        self.columna = columna
+        self.tipo = tipo
+        self.parametro = parametro
+        self.meta = meta
+        self.en_okr = en_okr
+
+    def __repr__(self):
+        return f"Metrica({self.clave!r}, {self.columna!r}, {self.tipo!r})"
+
+    @property
+    def es_rating(self):
+        return self.tipo == RATING
+
+    @property
+    def clave_na(self):
+        return f"incluir_na_{self.clave}"
+
+    @property
+    def clave_seleccion(self):
+        return f"{self.clave}_usar_seleccionados"
+
+    @property
+    def clave_meta(self):
+        return f"meta_{self.clave}"
+
+    def columna_en(self, columnas):
+        """Columna a evaluar en un DataFrame con esas columnas o None si no la tiene."""
+        return self.columna if self.columna in columnas else None
+
+
+# Orden del registro = orden de las métricas en tablas y gráficos
+METRICAS = [
+    Metrica("seguridad", "Seguridad", "security_rating", RATING, "security_rating", en_okr=False),
+    Metrica("confiabilidad", "Confiabilidad", "reliability_rating", RATING, "reliability_rating"),
+    Metrica("mantenibilidad", "Mantenibilidad", "sqale_rating", RATING, "sqale_rating"),
+    Metrica("cobertura", "Cobertura", "coverage", UMBRAL, "coverage_min", meta=50),
+    Metrica("complejidad", "Complejidad", "duplicated_lines_density", RATING, "duplicated_lines_density"),
+]
+
+
+def registrar_metrica(metrica):
+    """Agrega una métrica al registro (reemplaza la que tenga la misma clave)."""
+    METRICAS[:] = [m for m in METRICAS if m.clave != metrica.clave] + [metrica]
+    return metrica
+
+
+def firma_registro():
+    """Contenido del registro para la huella del memo en disco de los cálculos que lo usan."""
+    return [vars(m) for m in METRICAS]
+
+
+def metrica(clave):
+    return next(m for m in METRICAS if m.clave == clave)
+
+
+def metricas_okr():
+    """Métricas con OKR y seguimiento de degradaciones, en el orden del registro."""
+    return [m for m in METRICAS if m.en_okr]
+
+
+def _letras(umbral):
+    # Los umbrales de rating llegan como "A,B" (CSV) o como lista (multiselect de la página)
+    if isinstance(umbral, str):
+        return umbral.split(",")
+    return list(umbral)
+
+
+def _numeros(serie):
+    return pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def evaluar_metricas(df, parametros, config_na=None, config_metricas=None, seleccionados=None,
+                     exclusiones=None, metricas=None):
+    """(incluido, cumple): DataFrames booleanos con el índice de df y una columna por `clave`.
+
+    'incluido' aplica a cada métrica su configuración de N/A, la de proyectos seleccionados
+    (`seleccionados` marca las filas que cuentan cuando la métrica usa solo seleccionados) y
+    las reglas de `exclusiones` (ver cargar_reglas_exclusion); 'cumple' ya está restringido
+    a las filas incluidas. Los ratings se comparan todos juntos como una
+    matriz de códigos y los umbrales numéricos como una matriz de valores, sin recorrer filas
+    ni hacer una pasada por métrica. Una métrica sin su columna en df no incluye ninguna fila.
+    """
+    metricas = METRICAS if metricas is None else metricas
+    config_na, config_metricas = config_na or {}, config_metricas or {}
+    columnas = [m.columna_en(df.columns) for m in metricas]
+    n, k = len(df), len(metricas)
+    cumple = np.zeros((n, k), dtype=bool)
+    valido = np.zeros((n, k), dtype=bool)
+
+    ratings = [i for i, m in enumerate(metricas) if columnas[i] and m.es_rating]
+    if ratings:
+        # Código de cada valor en la unión de letras aceptadas (-1 si ninguna métrica lo acepta)
+        letras = [_letras(parametros[metricas[i].parametro]) for i in ratings]
+        categorias = pd.Index(list(dict.fromkeys(l for grupo in letras for l in grupo)))
+        codigos = np.column_stack([categorias.get_indexer(df[columnas[i]]) for i in ratings])
+        aceptadas = np.zeros((len(ratings), len(categorias) + 1), dtype=bool)  # última: código -1
+        for j, grupo in enumerate(letras):
+            aceptadas[j, categorias.get_indexer(grupo)] = True
+        cumple[:, ratings] = aceptadas[np.arange(len(ratings)), codigos]
+
+    umbrales = [i for i, m in enumerate(metricas) if columnas[i] and not m.es_rating]
+    if umbrales:
+        valores = np.column_stack([_numeros(df[columnas[i]]) for i in umbrales])
+        minimos = np.array([float(parametros[metricas[i].parametro]) for i in umbrales])
+        with np.errstate(invalid="ignore"):
+            cumple[:, umbrales] = valores >= minimos
+
+    presentes = ratings + umbrales
+    if presentes:
+        valido[:, presentes] = np.column_stack([df[columnas[i]].notna().to_numpy() for i in presentes])
+    incluir_na = np.array([bool(config_na.get(m.clave_na, False)) for m in metricas], dtype=bool)
+    incluido = valido | (incluir_na & np.array([c is not None for c in columnas], dtype=bool))
+
+    solo_seleccionados = np.array([bool(config_metricas.get(m.clave_seleccion, False)) for m in metricas],
+                                  dtype=bool)
+    if seleccionados is not None and solo_seleccionados.any():
+        incluido[:, solo_seleccionados] &= np.asarray(seleccionados, dtype=bool)[:, None]
+
+    if exclusiones:
+        for i, m in enumerate(metricas):
+            incluido[:, i] &= ~mascara_exclusion(df["NombreProyecto"], m.clave, exclusiones)
+
+    claves = [m.clave for m in metricas]
+    return (pd.DataFrame(incluido, index=df.index, columns=claves),
+            pd.DataFrame(cumple & incluido, index=df.index, columns=claves))
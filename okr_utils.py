@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from memo_utils import memo_en_disco
+from metricas_utils import evaluar_metricas, firma_registro, metricas_okr
+from seleccion_utils import indice_seleccion, marcar_seleccionados
+
+VENTANAS_OKR = (3, 6, 12)
+
+
+def _redondear(valores):
+    """Redondeo hacia arriba desde .5 (como redondear_hacia_arriba), conservando NaN."""
+    return np.trunc(valores + 0.5)
+
+
+def porcentaje_okr(cumplen, objetivo, total):
+    """OKR (%) = cumplen / objetivo * 100.
+
+    Con objetivo 0 es 100 si nadie cumple y 0 si alguien cumple; sin componentes
+    evaluables (total 0) es 0. Los NaN se conservan.
+    """
+    cumplen = pd.Series(cumplen, dtype=float)
+    objetivo = pd.Series(objetivo, dtype=float, index=cumplen.index)
+    total = pd.Series(total, dtype=float, index=cumplen.index)
+    okr = _redondear(cumplen / objetivo.where(objetivo > 0) * 100)
+    okr = okr.where(objetivo != 0, np.where(cumplen == 0, 100.0, 0.0))
+    okr = okr.where(total != 0, 0.0)
+    return okr.where(cumplen.notna() & objetivo.notna() & total.notna())
+
+
+def _orden_metrica(columna):
+    if columna.name == "Métrica":
+        return columna.map({m.nombre: i for i, m in enumerate(metricas_okr())})
+    return columna
+
+
+@memo_en_disco(extra=firma_registro)
+def okr_mensual(df_historico, parametros, metas=None, config_na=None, config_metricas=None,
+                proyectos_seleccionados=None, exclusiones=None):
+    """Numeradores y denominadores del OKR por célula, mes y métrica en una sola agrupación.
+
+    Devuelve una fila por (Celula, Mes, Métrica) con 'Cumplen', 'Total', 'Objetivo'
+    (total * meta redondeado) y 'OKR (%)'. Respeta la configuración de N/A y de proyectos
+    seleccionados de cada métrica igual que filtrar_datos_por_metrica; una métrica sin
+    componentes evaluables en el mes queda con OKR 0.
+    """
+    columnas = ["Cumplen", "Total", "Objetivo", "OKR (%)"]
+    if df_historico.empty:
+        return pd.DataFrame(columns=["Celula", "Mes", "Métrica"] + columnas)
+
+    df = df_historico.dropna(subset=["Mes"])
+    base = pd.DataFrame({
+        "Celula": df["Celula"],
+        "Mes": pd.to_datetime(df["Mes"]).dt.to_period("M").dt.to_timestamp(),
+        "NombreProyecto": df["NombreProyecto"],
+    })
+    metricas = metricas_okr()
+    seleccionados = None
+    celulas_con_seleccion = [c for c, lista in (proyectos_seleccionados or {}).items() if lista]
+    if celulas_con_seleccion:
+        base = marcar_seleccionados(base, indice_seleccion(proyectos_seleccionados))
+        seleccionados = base.pop("seleccionado") | ~base["Celula"].isin(celulas_con_seleccion)
+
+    incluido, cumple = evaluar_metricas(
+        df, parametros, config_na, config_metricas, seleccionados,
+        exclusiones, metricas,
+    )
+    nombres = {m.clave: m.nombre for m in metricas}
+    conteos = (
+        pd.concat({"Total": incluido.rename(columns=nombres), "Cumplen": cumple.rename(columns=nombres)}, axis=1)
+        .groupby([base["Celula"], base["Mes"]]).sum()
+    )
+    conteos.columns = conteos.columns.swaplevel().set_names(["Métrica", None])
+    mensual = conteos.stack("Métrica", future_stack=True).reset_index()
+
+    metas_por_metrica = {m.nombre: float((metas or {}).get(m.clave_meta, m.meta)) for m in metricas}
+    meta = mensual["Métrica"].map(metas_por_metrica)
+    mensual["Objetivo"] = _redondear(mensual["Total"] * (meta / 100)).astype(int)
+    mensual["OKR (%)"] = porcentaje_okr(mensual["Cumplen"], mensual["Objetivo"], mensual["Total"]).astype(int)
+    return mensual.sort_values(["Celula", "Mes", "Métrica"], key=_orden_metrica).reset_index(drop=True)
+
+
+@memo_en_disco()
+def ventanas_okr(mensual, ventanas=VENTANAS_OKR):
+    """Agrega OKR móvil, acumulado del año y variación interanual a la salida de okr_mensual.
+
+    Las ventanas suman numeradores y objetivos de los últimos n meses con datos de la
+    célula ('OKR nM (%)', NaN hasta completar n meses); 'OKR YTD (%)' acumula desde
+    enero del mismo año y 'Δ Interanual (pts)' es la diferencia del OKR contra el mismo
+    mes del año anterior (NaN si ese mes no existe).
+    """
+    if mensual.empty:
+        columnas = [f"OKR {n}M (%)" for n in ventanas] + ["OKR YTD (%)", "Δ Interanual (pts)"]
+        return mensual.reindex(columns=list(mensual.columns) + columnas)
+
+    df = mensual.sort_values(["Celula", "Métrica", "Mes"])
+    claves = [df["Celula"], df["Métrica"]]
+    posicion = df.groupby(claves, sort=False).cumcount()
+    acumulado = df[["Cumplen", "Objetivo", "Total"]].groupby(claves, sort=False).cumsum()
+
+    for n in ventanas:
+        previo = acumulado.groupby(claves, sort=False).shift(n).fillna(0)
+        suma = (acumulado - previo).where(posicion >= n - 1)
+        df[f"OKR {n}M (%)"] = porcentaje_okr(suma["Cumplen"], suma["Objetivo"], suma["Total"])
+
+    anio = df["Mes"].dt.year
+    anual = df[["Cumplen", "Objetivo", "Total"]].groupby([df["Celula"], df["Métrica"], anio], sort=False).cumsum()
+    df["OKR YTD (%)"] = porcentaje_okr(anual["Cumplen"], anual["Objetivo"], anual["Total"])
+
+    anio_anterior = df[["Celula", "Métrica", "Mes", "OKR (%)"]].assign(Mes=df["Mes"] + pd.DateOffset(years=1))
+    df = df.merge(anio_anterior, on=["Celula", "Métrica", "Mes"], how="left", suffixes=("", "_anterior"))
+    df["Δ Interanual (pts)"] = df["OKR (%)"] - df.pop("OKR (%)_anterior")
+    return df.sort_values(["Celula", "Mes", "Métrica"], key=_orden_metrica).reset_index(drop=True)
+
+
+def resumen_okr_anual(ventanas, anio):
+    """Una fila por célula con el OKR acumulado al último mes del año y los meses que cumplieron.
+
+    `ventanas` es la salida de ventanas_okr (calculada sobre todo el histórico para que las
+    ventanas de enero incluyan el año anterior).
+    """
+    df = ventanas[ventanas["Mes"].dt.year == anio]
+    if df.empty:
+        return pd.DataFrame()
+    por_metrica = df.groupby(["Celula", "Métrica"], sort=False).agg(
+        meses=("Mes", "size"),
+        cumplidos=("OKR (%)", lambda v: int((v >= 100).sum())),
+        ytd=("OKR YTD (%)", "last"),
+    )
+    por_metrica["% Meses Cumplidos"] = _redondear(por_metrica["cumplidos"] / por_metrica["meses"] * 100)
+
+    resumen = por_metrica[["ytd", "% Meses Cumplidos"]].rename(columns={"ytd": "OKR YTD (%)"}).unstack("Métrica")
+    orden = [m.nombre for m in metricas_okr() if m.nombre in resumen.columns.get_level_values("Métrica")]
+    resumen = resumen.reindex(columns=[(valor, m) for m in orden for valor in ("OKR YTD (%)", "% Meses Cumplidos")])
+    resumen.columns = [f"{metrica} {valor}" for valor, metrica in resumen.columns]
+    resumen.insert(0, "Meses", df.groupby("Celula", sort=False)["Mes"].nunique())
+    return resumen.sort_index().reset_index()
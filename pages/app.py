@@ -1,13 +1,20 @@
 import streamlit as st
 import pandas as pd
-import io
 import os
-import glob
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
 import math
 
+from cache_utils import compartido_por_archivo
+from catalogo_utils import catalogo_meses
+from export_utils import MIME_XLSX, excel_bajo_demanda, hojas_por_celula, huella
+from exclusiones_utils import cargar_reglas_exclusion, mascara_exclusion
+from importacion_utils import importar_perezoso
+from metricas_utils import METRICAS, evaluar_metricas
+from seleccion_utils import indice_seleccion, marcar_seleccionados
+
+# plotly se importa al dibujar el primer gráfico, no al abrir la página
+px = importar_perezoso("plotly.express")
+go = importar_perezoso("plotly.graph_objects")
+
 st.set_page_config(layout="wide", page_title="Dashboard SonarQube")
 
 if "rol" not in st.session_state or st.session_state["rol"] != "admin":
@@ -19,7 +26,6 @@ ARCHIVO_PARAMETROS = "data/parametros_metricas.csv"
 ARCHIVO_METAS = "data/metas_progreso.csv"
 ARCHIVO_CONFIGURACION_METRICAS = "data/configuracion_metricas.csv"
 ARCHIVO_CONFIGURACION_NA = "data/configuracion_na.csv"
-UPLOAD_DIR = "uploads"
 
 def redondear_hacia_arriba(valor):
     """Redondear hacia arriba cuando el decimal es .5 o mayor"""
@@ -70,18 +76,7 @@ def crear_barra_progreso(actual, meta, color="blue"):
 
     return fig
 
-def obtener_ultimo_archivo():
-    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-    if not archivos:
-        return None
-    archivos_ordenados = sorted(
-        archivos,
-        key=lambda x: datetime.strptime(os.path.basename(x).split("_")[1].replace(".xlsx", ""), "%Y-%m"),
-        reverse=True
-    )
-    return archivos_ordenados[0]
-
-@st.cache_data
+@compartido_por_archivo
 def cargar_datos(path):
     df = pd.read_excel(path)
     df.columns = df.columns.str.strip()
@@ -227,14 +222,6 @@ def guardar_configuracion_na(config):
     df = pd.DataFrame([config])
     df.to_csv(ARCHIVO_CONFIGURACION_NA, index=False)
 
-@st.cache_data
-def convertir_excel(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False)
-    output.seek(0)
-    return output
-
 proyectos_seleccionados = cargar_seleccion()
 parametros = cargar_parametros()
 metas = cargar_metas()
@@ -246,26 +233,23 @@ if proyectos_seleccionados is None or all(len(v) == 0 for v in proyectos_selecci
     st.stop()
 
 st.session_state["proyectos_seleccionados"] = proyectos_seleccionados
+indice_seleccionados = indice_seleccion(proyectos_seleccionados)
 
-ultimo_archivo = obtener_ultimo_archivo()
+catalogo = catalogo_meses()
+ultimo_archivo = catalogo.ultimo_archivo
 if ultimo_archivo is None:
     st.warning("⚠️ No se encontró ningún archivo de métricas en la carpeta uploads.")
     st.stop()
 
-archivos_todos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-meses_disponibles = sorted([
-    os.path.basename(f).split("_")[1].replace(".xlsx", "")
-    for f in archivos_todos
-    if os.path.basename(f).startswith("metricas_")
-], reverse=True)
+meses_disponibles = catalogo.meses[::-1]
 
 mes_seleccionado = st.selectbox("📅 Selecciona el mes", meses_disponibles)
-archivo_mes_seleccionado = os.path.join(UPLOAD_DIR, f"metricas_{mes_seleccionado}.xlsx")
+archivo_mes_seleccionado = catalogo.archivo(mes_seleccionado)
 
 st.title("📊 Dashboard de Métricas SonarQube por Célula")
 st.markdown(f"**📁 Archivo cargado:** {os.path.basename(archivo_mes_seleccionado)}")
 
-df = cargar_datos(archivo_mes_seleccionado)
+df = marcar_seleccionados(cargar_datos(archivo_mes_seleccionado), indice_seleccionados)
 
 # Panel de parámetros
 with st.expander("⚙️ Parámetros de calidad"):
@@ -372,85 +356,45 @@ with st.expander("🎯 Configurar Metas de Progreso"):
         guardar_metas(nuevas_metas)
         st.success("✅ Metas guardadas correctamente.")
 
-# Función para filtrar datos según configuración de métrica
-def filtrar_datos_por_metrica(df, celulas_seleccionadas, proyectos_seleccionados, usar_seleccionados):
-    if usar_seleccionados:
-        # Usar solo proyectos seleccionados
-        dfs_filtrados = []
-        for celula, proyectos in proyectos_seleccionados.items():
-            if proyectos and celula in celulas_seleccionadas:
-                df_filtrado = df[(df['Celula'] == celula) & (df['NombreProyecto'].isin(proyectos))]
-                dfs_filtrados.append(df_filtrado)
-        return pd.concat(dfs_filtrados, ignore_index=True) if dfs_filtrados else pd.DataFrame()
-    else:
-        # Usar todos los proyectos de las células seleccionadas
-        return df[df['Celula'].isin(celulas_seleccionadas)].copy()
+# Umbrales y uso de proyectos seleccionados vigentes en los paneles (aunque no se hayan guardado)
+umbrales_vigentes = {
+    **parametros,
+    "security_rating": umbral_seguridad,
+    "reliability_rating": umbral_confiabilidad,
+    "sqale_rating": umbral_mantenibilidad,
+    "coverage_min": cobertura_min,
+    "duplicated_lines_density": umbral_complejidad,
+}
+uso_seleccionados = {
+    "seguridad_usar_seleccionados": seguridad_seleccionados,
+    "confiabilidad_usar_seleccionados": confiabilidad_seleccionados,
+    "mantenibilidad_usar_seleccionados": mantenibilidad_seleccionados,
+    "cobertura_usar_seleccionados": cobertura_seleccionados,
+    "complejidad_usar_seleccionados": complejidad_seleccionados,
+}
 
 # Obtener células seleccionadas
 celulas_seleccionadas = list(proyectos_seleccionados.keys())
 
-# Filtrar datos según configuración para cada métrica
-df_seguridad = filtrar_datos_por_metrica(df, celulas_seleccionadas, proyectos_seleccionados, seguridad_seleccionados)
-df_confiabilidad = filtrar_datos_por_metrica(df, celulas_seleccionadas, proyectos_seleccionados, confiabilidad_seleccionados)
-df_mantenibilidad = filtrar_datos_por_metrica(df, celulas_seleccionadas, proyectos_seleccionados, mantenibilidad_seleccionados)
-df_cobertura = filtrar_datos_por_metrica(df, celulas_seleccionadas, proyectos_seleccionados, cobertura_seleccionados)
-df_complejidad = filtrar_datos_por_metrica(df, celulas_seleccionadas, proyectos_seleccionados, complejidad_seleccionados)
-
-# Proyectos a excluir para coverage
-proyectos_excluir_coverage = [
-    "AEL.DebidaDiligencia.FrontEnd:Quality",
-    "AEL.NominaElectronica.FrontEnd:Quality"
-]
-
-# Calcular cumplimiento para cada métrica considerando configuración de N/A
-def calcular_cumplimiento_con_na(df, columna_metrica, umbral, es_rating=True, incluir_na=False):
-    """Calcular cumplimiento considerando configuración de componentes N/A"""
-    if df.empty:
-        return pd.Series(dtype=float)
-    
-    if incluir_na:
-        # Incluir todos los proyectos, considerando N/A como "no cumplen"
-        df_calc = df.copy()
-        
-        if es_rating:
-            # Para ratings (A-E), N/A se considera como "no cumple"
-            df_calc['cumple'] = df_calc[columna_metrica].isin(umbral)
-            # Los valores NaN se consideran como False (no cumplen)
-            df_calc['cumple'] = df_calc['cumple'].fillna(False)
-        else:
-            # Para valores numéricos (coverage), N/A se considera como "no cumple"
-            df_calc['cumple'] = df_calc[columna_metrica] >= umbral
-            # Los valores NaN se consideran como False (no cumplen)
-            df_calc['cumple'] = df_calc['cumple'].fillna(False)
-    else:
-        # Excluir proyectos con valores nulos/vacíos en la métrica (comportamiento original)
-        df_calc = df.dropna(subset=[columna_metrica]).copy()
-        
-        if df_calc.empty:
-            return pd.Series(dtype=float)
-        
-        if es_rating:
-            # Para ratings (A-E)
-            df_calc['cumple'] = df_calc[columna_metrica].isin(umbral)
-        else:
-            # Para valores numéricos (coverage)
-            df_calc['cumple'] = df_calc[columna_metrica] >= umbral
-    
-    return df_calc.groupby('Celula')['cumple'].mean()
+# Reglas de exclusión de proyectos por métrica (data/exclusiones_metricas.csv)
+reglas_exclusion = cargar_reglas_exclusion()
 
-# Calcular cumplimiento para cada métrica usando configuración de N/A
-agrupado_seguridad = calcular_cumplimiento_con_na(df_seguridad, 'security_rating', umbral_seguridad, True, config_na["incluir_na_seguridad"])
-agrupado_confiabilidad = calcular_cumplimiento_con_na(df_confiabilidad, 'reliability_rating', umbral_confiabilidad, True, config_na["incluir_na_confiabilidad"])
-agrupado_mantenibilidad = calcular_cumplimiento_con_na(df_mantenibilidad, 'sqale_rating', umbral_mantenibilidad, True, config_na["incluir_na_mantenibilidad"])
+def calcular_cumplimiento(df, agrupar_por):
+    """Fracción de componentes que cumplen cada métrica del registro, por grupo.
 
-# Para cobertura, excluir proyectos específicos además de considerar configuración N/A
-if not df_cobertura.empty:
-    df_cobertura_filtrado = df_cobertura[~df_cobertura['NombreProyecto'].isin(proyectos_excluir_coverage)]
-    agrupado_cobertura = calcular_cumplimiento_con_na(df_cobertura_filtrado, 'coverage', cobertura_min, False, config_na["incluir_na_cobertura"])
-else:
-    agrupado_cobertura = pd.Series(dtype=float)
+    Evalúa todas las métricas en una sola pasada respetando la configuración de N/A,
+    de proyectos seleccionados (columna 'seleccionado') y las reglas de exclusión.
+    Un grupo sin componentes evaluables para una métrica queda en NaN.
+    """
+    incluido, cumple = evaluar_metricas(
+        df, umbrales_vigentes, config_na, uso_seleccionados, df['seleccionado'],
+        reglas_exclusion,
+    )
+    total = incluido.groupby(agrupar_por).sum()
+    return cumple.groupby(agrupar_por).sum() / total.where(total > 0)
 
-agrupado_complejidad = calcular_cumplimiento_con_na(df_complejidad, 'duplicated_lines_density', umbral_complejidad, True, config_na["incluir_na_complejidad"])
+df_celulas = df[df['Celula'].isin(celulas_seleccionadas)]
+cumplimiento = calcular_cumplimiento(df_celulas, df_celulas['Celula'])
 
 # Usar df completo para bugs (todos los proyectos de células seleccionadas)
 df_todas_metricas = df[df['Celula'].isin(celulas_seleccionadas)].copy()
@@ -466,18 +410,11 @@ agrupado_bugs = df_todas_metricas.groupby('Celula').agg({
 todas_las_celulas = set(celulas_seleccionadas)
 agrupado_final = pd.DataFrame(index=sorted(todas_las_celulas))
 
-# Agregar métricas una por una
-for serie, nombre in [
-    (agrupado_seguridad, 'cumple_seguridad'),
-    (agrupado_confiabilidad, 'cumple_confiabilidad'),
-    (agrupado_mantenibilidad, 'cumple_mantenibilidad'),
-    (agrupado_cobertura, 'cumple_cobertura'),
-    (agrupado_complejidad, 'cumple_complejidad')
-]:
-    if not serie.empty:
-        agrupado_final = agrupado_final.join(serie.rename(nombre), how='left')
-    else:
-        agrupado_final[nombre] = 0
+# Agregar el cumplimiento de las métricas del tablero (en el orden de las columnas renombradas abajo)
+metricas_tablero = ['seguridad', 'confiabilidad', 'mantenibilidad', 'cobertura', 'complejidad']
+agrupado_final = agrupado_final.join(
+    cumplimiento.reindex(columns=metricas_tablero).add_prefix('cumple_'), how='left'
+)
 
 # Agregar bugs
 agrupado_final = agrupado_final.join(agrupado_bugs, how='left')
@@ -579,7 +516,7 @@ def calcular_promedio_cobertura_general():
     df_todos_proyectos = df[df['Celula'].isin(celulas_seleccionadas)].copy()
     
     # Excluir proyectos específicos de cobertura
-    df_todos_proyectos = df_todos_proyectos[~df_todos_proyectos['NombreProyecto'].isin(proyectos_excluir_coverage)]
+    df_todos_proyectos = df_todos_proyectos[~mascara_exclusion(df_todos_proyectos['NombreProyecto'], 'cobertura', reglas_exclusion)]
     
     if config_na["incluir_na_cobertura"]:
         # Incluir todos los proyectos, considerando N/A como 0%
@@ -638,7 +575,7 @@ with col1:
 with col2:
     # Mostrar cantidad de proyectos considerados según configuración N/A
     df_todos_proyectos = df[df['Celula'].isin(celulas_seleccionadas)].copy()
-    df_todos_proyectos = df_todos_proyectos[~df_todos_proyectos['NombreProyecto'].isin(proyectos_excluir_coverage)]
+    df_todos_proyectos = df_todos_proyectos[~mascara_exclusion(df_todos_proyectos['NombreProyecto'], 'cobertura', reglas_exclusion)]
     
     if config_na["incluir_na_cobertura"]:
         # Incluir todos los proyectos
@@ -686,11 +623,40 @@ st.dataframe(
 )
 
 st.markdown("### 📥 Descargar Excel")
-st.download_button(
+# Los archivos se generan solo al hacer clic y se reutilizan mientras no cambien el mes (ni su
+# archivo), los parámetros, la selección ni las reglas de exclusión
+huella_reporte = huella(
+    mes_seleccionado,
+    catalogo.versiones[mes_seleccionado],
+    [umbral_seguridad, umbral_confiabilidad, umbral_mantenibilidad, umbral_complejidad, cobertura_min],
+    [seguridad_seleccionados, confiabilidad_seleccionados, mantenibilidad_seleccionados,
+     cobertura_seleccionados, complejidad_seleccionados],
+    config_na,
+    sorted(indice_seleccionados),
+    reglas_exclusion
+)
+columnas_reporte_celula = [
+    'NombreProyecto', 'security_rating', 'reliability_rating', 'sqale_rating', 'coverage',
+    'duplicated_lines_density', 'bugs', 'bugs_blocker', 'bugs_critical', 'bugs_major',
+    'bugs_minor', 'bugs_info', 'seleccionado'
+]
+col_descarga1, col_descarga2 = st.columns(2)
+col_descarga1.download_button(
     label="⬇️ Descargar Reporte",
-    data=convertir_excel(agrupado),
+    data=excel_bajo_demanda(("cumplimiento", huella_reporte), lambda agrupado=agrupado: {"Cumplimiento": agrupado}),
     file_name=f"cumplimiento_celulas_{mes_seleccionado}.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    mime=MIME_XLSX,
+    on_click="ignore"
+)
+col_descarga2.download_button(
+    label="⬇️ Reporte mensual completo (una hoja por célula)",
+    data=excel_bajo_demanda(
+        ("completo", huella_reporte),
+        lambda agrupado=agrupado, df_celulas=df_todas_metricas: hojas_por_celula(agrupado, df_celulas, columnas_reporte_celula)
+    ),
+    file_name=f"reporte_mensual_{mes_seleccionado}.xlsx",
+    mime=MIME_XLSX,
+    on_click="ignore"
 )
 
 st.subheader("📊 Gráfico de Cumplimiento por Célula")
@@ -721,10 +687,7 @@ st.header("📈 Tendencia de Cumplimiento por Célula y Métrica")
 
 # Cargar todos los meses
 lista_df = []
-archivos_todos_ordenados = sorted(archivos_todos, 
-    key=lambda x: datetime.strptime(os.path.basename(x).split("_")[1].replace(".xlsx", ""), "%Y-%m"))
-
-for archivo in archivos_todos_ordenados:
+for archivo in catalogo.rutas:
     try:
         df_mes = cargar_datos(archivo)
         if not df_mes.empty:
@@ -734,7 +697,7 @@ for archivo in archivos_todos_ordenados:
         continue
 
 if lista_df:
-    df_todos = pd.concat(lista_df, ignore_index=True)
+    df_todos = marcar_seleccionados(pd.concat(lista_df, ignore_index=True), indice_seleccionados)
     
     # Asegurar formato de fecha consistente
     if 'Mes' in df_todos.columns:
@@ -743,87 +706,23 @@ if lista_df:
         # Eliminar filas con fechas inválidas
         df_todos = df_todos.dropna(subset=['Mes'])
         
-        # Definir tendencias con parámetros actuales
-        tendencias = [
-            ("Seguridad", "cumple_seguridad", 'security_rating', umbral_seguridad, seguridad_seleccionados, True),
-            ("Confiabilidad", "cumple_confiabilidad", 'reliability_rating', umbral_confiabilidad, confiabilidad_seleccionados, True),
-            ("Mantenibilidad", "cumple_mantenibilidad", 'sqale_rating', umbral_mantenibilidad, mantenibilidad_seleccionados, True),
-            ("Cobertura", "cumple_cobertura", 'coverage', cobertura_min, cobertura_seleccionados, False),
-            ("Complejidad", "cumple_complejidad", 'duplicated_lines_density', umbral_complejidad, complejidad_seleccionados, True)
-        ]
-
-        for nombre, col_cumple, col_metrica, umbral, usar_sel, es_rating in tendencias:
+        # Cumplimiento de todas las métricas por mes y célula en una sola evaluación
+        df_tendencia = df_todos[df_todos['Celula'].isin(celulas_seleccionadas)]
+        cumplimiento_mensual = calcular_cumplimiento(df_tendencia, [
+            df_tendencia['Mes'].dt.to_period('M').dt.to_timestamp(), df_tendencia['Celula']
+        ])
+
+        for metrica in METRICAS:
+            nombre = metrica.nombre
             st.subheader(f"📊 {nombre}")
             
-            # Información de depuración desactivada
-            # if nombre == "Cobertura":
-            #     st.info(f"🔍 **Depuración Cobertura:** Usando proyectos seleccionados: {usar_sel}")
-            #     if usar_sel:
-            #         proyectos_cobertura = []
-            #         for celula, proyectos in proyectos_seleccionados.items():
-            #             if proyectos and celula in celulas_seleccionadas:
-            #                 proyectos_cobertura.extend([f"{celula}: {p}" for p in proyectos])
-            #         if proyectos_cobertura:
-            #             st.info(f"📋 **Proyectos seleccionados para cobertura:** {', '.join(proyectos_cobertura[:5])}{'...' if len(proyectos_cobertura) > 5 else ''}")
-            
-            # Lista para almacenar datos de tendencia
-            datos_tendencia = []
-            
-            # Procesar cada mes disponible
-            for mes_fecha in sorted(df_todos['Mes'].dt.to_period('M').unique()):
-                # Filtrar datos del mes específico
-                df_mes = df_todos[df_todos['Mes'].dt.to_period('M') == mes_fecha].copy()
-                
-                if df_mes.empty:
-                    continue
-                
-                # Aplicar filtrado según configuración de métrica
-                df_fil = filtrar_datos_por_metrica(df_mes, celulas_seleccionadas, proyectos_seleccionados, usar_sel)
-                
-                # Aplicar exclusiones específicas para cobertura
-                if nombre == "Cobertura" and not df_fil.empty:
-                    df_fil = df_fil[~df_fil['NombreProyecto'].isin(proyectos_excluir_coverage)]
-                
-                # Aplicar configuración de componentes N/A
-                config_na_key = f"incluir_na_{nombre.lower()}"
-                incluir_na = config_na.get(config_na_key, False)
-                
-                if incluir_na:
-                    # Incluir todos los proyectos, considerando N/A como "no cumplen"
-                    if es_rating:
-                        df_fil[col_cumple] = df_fil[col_metrica].isin(umbral)
-                        df_fil[col_cumple] = df_fil[col_cumple].fillna(False)
-                    else:
-                        df_fil[col_cumple] = df_fil[col_metrica] >= umbral
-                        df_fil[col_cumple] = df_fil[col_cumple].fillna(False)
-                else:
-                    # Excluir proyectos con métricas vacías (comportamiento original)
-                    if col_metrica in df_fil.columns:
-                        df_fil = df_fil.dropna(subset=[col_metrica])
-                    
-                    if df_fil.empty:
-                        continue
-                    
-                    # Calcular cumplimiento
-                    if es_rating:
-                        df_fil[col_cumple] = df_fil[col_metrica].isin(umbral)
-                    else:
-                        df_fil[col_cumple] = df_fil[col_metrica] >= umbral
-                
-                # Agrupar por célula
-                cumplimiento_mes = df_fil.groupby('Celula')[col_cumple].mean().reset_index()
-                cumplimiento_mes['Mes'] = mes_fecha.to_timestamp()
-                cumplimiento_mes[nombre] = cumplimiento_mes[col_cumple] * 100
-                # Aplicar redondeo hacia arriba en tendencias también
-                cumplimiento_mes[nombre] = cumplimiento_mes[nombre].apply(redondear_hacia_arriba)
-                cumplimiento_mes = cumplimiento_mes[['Mes', 'Celula', nombre]]
-                
-                datos_tendencia.append(cumplimiento_mes)
+            # Meses y células sin componentes evaluables no aparecen en la tendencia
+            df_trend = cumplimiento_mensual[metrica.clave].dropna() * 100
+            # Aplicar redondeo hacia arriba en tendencias también
+            df_trend = df_trend.apply(redondear_hacia_arriba).rename(nombre).reset_index()
             
             # Crear gráfico de tendencia si hay datos
-            if datos_tendencia:
-                df_trend = pd.concat(datos_tendencia, ignore_index=True)
-                
+            if not df_trend.empty:
                 # Asegurar que todas las células estén representadas en todos los meses
                 meses_unicos = df_trend['Mes'].unique()
                 celulas_unicas = df_trend['Celula'].unique()
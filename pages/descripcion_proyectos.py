@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import os
-import io
 
 from auth_utils import mostrar_navegacion_usuario, requiere_admin_o_usuario
+from busqueda_utils import CatalogoFacetas, IndiceTexto, filtrar_por_busqueda, mascara_busqueda
+from cache_utils import compartido_por_archivo, obtener_compartido
+from export_utils import MIME_XLSX, csv_bajo_demanda, excel_bajo_demanda, huella_dataframe
+from tabla_utils import tabla_paginada
 
 st.set_page_config(layout="wide", page_title="Descripción de Proyectos")
 
@@ -15,12 +18,20 @@ mostrar_navegacion_usuario()
 ARCHIVO = "data/descripcion_proyectos.xlsx"
 
 # ── Carga ─────────────────────────────────────────────────────────────────────
-@st.cache_data
+@compartido_por_archivo
 def cargar_proyectos(path: str) -> pd.DataFrame:
     df = pd.read_excel(path)
     df.columns = df.columns.str.strip()
     return df
 
+def construir_indice(path: str, mtime: float, df: pd.DataFrame) -> IndiceTexto:
+    # Un índice por versión del archivo (path + mtime); se comparte entre sesiones
+    return obtener_compartido(path, lambda: IndiceTexto(df), mtime, "descripcion_proyectos.py:construir_indice")
+
+def construir_catalogo(path: str, mtime: float, df: pd.DataFrame) -> CatalogoFacetas:
+    # Columnas candidatas a filtro y sus valores, calculados una vez por versión del archivo
+    return obtener_compartido(path, lambda: CatalogoFacetas(df), mtime, "descripcion_proyectos.py:construir_catalogo")
+
 # ── Header ────────────────────────────────────────────────────────────────────
 st.title("📋 Descripción de Proyectos")
 st.caption("Catálogo de proyectos registrados en el sistema de métricas.")
@@ -29,6 +40,7 @@ if not os.path.exists(ARCHIVO):
     st.error(f"No se encontró el archivo `{ARCHIVO}`. Verifica que exista en la carpeta `data/`.")
     st.stop()
 
+mtime_archivo = os.path.getmtime(ARCHIVO)
 df = cargar_proyectos(ARCHIVO)
 
 if df.empty:
@@ -59,35 +71,41 @@ with st.expander("🔍 Filtros y búsqueda", expanded=True):
     with search_col:
         busqueda = st.text_input("Buscar en todas las columnas", placeholder="Escribe para filtrar…")
 
-    # Detectar columnas categóricas con poca cardinalidad para filtros desplegables
-    cols_filtro = [
-        c for c in df.columns
-        if df[c].dtype == object and 1 < df[c].nunique() <= 30
-    ]
+    # Columnas categóricas con poca cardinalidad para filtros desplegables (catálogo precalculado)
+    catalogo = construir_catalogo(ARCHIVO, mtime_archivo, df)
+    cols_filtro = catalogo.columnas[:3]
+
+    # La búsqueda también acota los conteos de cada opción
+    indice = construir_indice(ARCHIVO, mtime_archivo, df) if busqueda else None
+    mascara_texto = mascara_busqueda(indice, busqueda) if indice is not None else None
 
-    filtros_activos = {}
+    # Selecciones vigentes (del rerun anterior) para mostrar conteos en vivo
+    filtros_activos = {
+        c: st.session_state.get(f"filtro_{c}", []) for c in cols_filtro
+        if st.session_state.get(f"filtro_{c}")
+    }
     if cols_filtro:
         with filter_cols:
-            num_filtros = min(len(cols_filtro), 3)
-            fcols = st.columns(num_filtros)
-            for i, col_name in enumerate(cols_filtro[:num_filtros]):
-                opciones = sorted(df[col_name].dropna().unique().tolist())
-                sel = fcols[i].multiselect(col_name, opciones, key=f"filtro_{col_name}")
+            fcols = st.columns(len(cols_filtro))
+            for i, col_name in enumerate(cols_filtro):
+                conteos = catalogo.conteos(col_name, filtros_activos, mascara_texto)
+                sel = fcols[i].multiselect(
+                    col_name,
+                    catalogo.valores(col_name),
+                    key=f"filtro_{col_name}",
+                    format_func=lambda v, conteos=conteos: f"{v} ({conteos.get(v, 0)})",
+                )
                 if sel:
                     filtros_activos[col_name] = sel
+                else:
+                    filtros_activos.pop(col_name, None)
 
 # ── Aplicar filtros ───────────────────────────────────────────────────────────
-df_filtrado = df.copy()
+df_filtrado = df[catalogo.mascara(filtros_activos, mascara_texto)]
 
-for col_name, valores in filtros_activos.items():
-    df_filtrado = df_filtrado[df_filtrado[col_name].isin(valores)]
-
-if busqueda:
-    mask = df_filtrado.apply(
-        lambda row: row.astype(str).str.contains(busqueda, case=False, na=False).any(),
-        axis=1,
-    )
-    df_filtrado = df_filtrado[mask]
+if indice is not None:
+    # Ordenar por relevancia de la búsqueda
+    df_filtrado = filtrar_por_busqueda(df_filtrado, df, indice, busqueda)
 
 # ── Resultados ────────────────────────────────────────────────────────────────
 st.markdown(f"**{len(df_filtrado)}** proyectos mostrados de **{total}** totales.")
@@ -96,8 +114,10 @@ st.markdown(f"**{len(df_filtrado)}** proyectos mostrados de **{total}** totales.
 cols_numericas = df_filtrado.select_dtypes(include="number").columns.tolist()
 format_map = {c: "{:,.2f}" for c in cols_numericas if df_filtrado[c].dtype == float}
 
-st.dataframe(
+tabla_paginada(
     df_filtrado.reset_index(drop=True),
+    key="tabla_descripcion_proyectos",
+    filas_por_pagina=100,
     use_container_width=True,
     height=500,
     column_config={
@@ -123,22 +143,22 @@ with dl_col1:
 with dl_col2:
     st.write("")  # spacer
 
+# El archivo se genera solo al hacer clic; la huella del filtrado evita regenerarlo
+huella_filtrado = huella_dataframe(df_filtrado)
 if fmt == "Excel (.xlsx)":
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df_filtrado.to_excel(writer, index=False, sheet_name="Proyectos")
     st.download_button(
         label="📥 Descargar Excel",
-        data=buffer.getvalue(),
+        data=excel_bajo_demanda(("descripcion", huella_filtrado), lambda df=df_filtrado: {"Proyectos": df}),
         file_name="descripcion_proyectos_filtrado.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        mime=MIME_XLSX,
+        on_click="ignore",
         use_container_width=False,
     )
 else:
-    csv_data = df_filtrado.to_csv(index=False, encoding="utf-8-sig")
     st.download_button(
         label="📥 Descargar CSV",
-        data=csv_data,
+        data=csv_bajo_demanda(("descripcion", huella_filtrado), df_filtrado),
+        on_click="ignore",
         file_name="descripcion_proyectos_filtrado.csv",
         mime="text/csv",
         use_container_width=False,
@@ -1,29 +1,42 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
-import plotly.express as px
-import plotly.graph_objects as go
-import glob
-from datetime import datetime
 import math
 
 from auth_utils import (
+    celulas_a_cargar,
     es_usuario,
     filtrar_celulas_permitidas,
     mostrar_navegacion_usuario,
     requiere_admin_o_usuario,
 )
+from bugs_utils import COLUMNAS_BUGS_BACKLOG, DESCRIPCION_BASES, bases_disponibles, tendencia_bugs
+from calculos_utils import bugs_de_celula, configuracion, degradados_de, okr_de_celula
+from catalogo_utils import catalogo_meses
+from degradados_utils import degradados_por_metrica, mes_anterior_comparado
+from estilos_utils import (
+    ESTILO_CUMPLE,
+    ESTILO_NO_CUMPLE,
+    combinar_estilos,
+    estilo_cumplimiento_pct,
+    estilos_columnas,
+    estilos_filas,
+)
+from exclusiones_utils import mascara_exclusion
+from historico_utils import historico_archivos
+from importacion_utils import importar_perezoso
+from metricas_utils import evaluar_metricas, metricas_okr
+from tabla_utils import tabla_paginada
+
+# plotly se importa al dibujar el primer gráfico, no al abrir la página
+px = importar_perezoso("plotly.express")
+go = importar_perezoso("plotly.graph_objects")
 
 requiere_admin_o_usuario()
 mostrar_navegacion_usuario()
 
-ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
-ARCHIVO_PARAMETROS = "data/parametros_metricas.csv"
 ARCHIVO_METRICAS_SELECCIONADAS = "data/metricas_seleccionadas.csv"
-ARCHIVO_METAS = "data/metas_progreso.csv"
-ARCHIVO_CONFIGURACION_METRICAS = "data/configuracion_metricas.csv"
-ARCHIVO_CONFIGURACION_NA = "data/configuracion_na.csv"
-UPLOAD_DIR = "uploads"
 
 def redondear_hacia_arriba(valor):
     """Redondear hacia arriba cuando el decimal es .5 o mayor"""
@@ -32,160 +45,20 @@ def redondear_hacia_arriba(valor):
     # Para .5 exacto y valores mayores, redondear hacia arriba
     return int(valor + 0.5)
 
-def obtener_ultimo_archivo():
-    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-    if not archivos:
-        return None
-    archivos_ordenados = sorted(
-        archivos,
-        key=lambda x: datetime.strptime(os.path.basename(x).split("_")[1].replace(".xlsx", ""), "%Y-%m"),
-        reverse=True
-    )
-    return archivos_ordenados[0]
-
-@st.cache_data
-def cargar_datos(path):
-    df = pd.read_excel(path)
-    df.columns = df.columns.str.strip()
-    # NO usar fillna(0) para mantener valores NaN
-    df['coverage'] = pd.to_numeric(df['coverage'], errors='coerce')
-
-    # Complexity es un rating (A, B, C, D, E), no un porcentaje - CORREGIR para usar duplicated_lines_density
-    if 'duplicated_lines_density' in df.columns:
-        df['complexity'] = df['duplicated_lines_density'].astype(str).str.strip().str.upper()
-        # Convertir valores inválidos a NaN en lugar de N/A
-        valid_ratings = ['A', 'B', 'C', 'D', 'E']
-        df['complexity'] = df['complexity'].apply(lambda x: x if x in valid_ratings else None)
-    elif 'complexity' in df.columns:
-        df['complexity'] = df['complexity'].astype(str).str.strip().str.upper()
-        valid_ratings = ['A', 'B', 'C', 'D', 'E']
-        df['complexity'] = df['complexity'].apply(lambda x: x if x in valid_ratings else None)
-    else:
-        df['complexity'] = None
-
-    bug_cols = ['bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
-    for col in bug_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-    return df
-
-def cargar_todos_los_datos():
-    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-    dfs = []
-    for archivo in archivos:
-        df_temp = cargar_datos(archivo)
-        mes = os.path.basename(archivo).split("_")[1].replace(".xlsx", "")
-        df_temp['Mes'] = pd.to_datetime(mes, format="%Y-%m")
-        dfs.append(df_temp)
-    return pd.concat(dfs) if dfs else pd.DataFrame()
-
-def cargar_seleccion():
-    if os.path.exists(ARCHIVO_SELECCION):
-        df_sel = pd.read_csv(ARCHIVO_SELECCION)
-        seleccion = {}
-        for celula in df_sel['Celula'].unique():
-            seleccion[celula] = df_sel[df_sel['Celula'] == celula]['NombreProyecto'].tolist()
-        return seleccion
-    return {}
-
-def cargar_parametros():
-    if os.path.exists(ARCHIVO_PARAMETROS):
-        df_param = pd.read_csv(ARCHIVO_PARAMETROS)
-        if not df_param.empty:
-            fila = df_param.iloc[0]
-            return {
-                "security_rating": fila.get("security_rating", "A,B,C,D,E"),
-                "reliability_rating": fila.get("reliability_rating", "A,B,C,D,E"),
-                "sqale_rating": fila.get("sqale_rating", "A,B,C,D,E"),
-                "duplicated_lines_density": fila.get("duplicated_lines_density", "A,B,C,D,E"),  # CORREGIR nombre
-                "coverage_min": float(fila.get("coverage_min", 0))
-            }
-    return {
-        "security_rating": "A,B,C,D,E",
-        "reliability_rating": "A,B,C,D,E",
-        "sqale_rating": "A,B,C,D,E",
-        "duplicated_lines_density": "A,B,C,D,E",  # CORREGIR nombre
-        "coverage_min": 0
-    }
-
-def cargar_configuracion_metricas():
-    """Cargar configuración de métricas (si usar proyectos seleccionados o todos)"""
-    if os.path.exists(ARCHIVO_CONFIGURACION_METRICAS):
-        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_METRICAS)
-        if not df_config.empty:
-            fila = df_config.iloc[0]
-            return {
-                "seguridad_usar_seleccionados": fila.get("seguridad_usar_seleccionados", False),
-                "confiabilidad_usar_seleccionados": fila.get("confiabilidad_usar_seleccionados", False),
-                "mantenibilidad_usar_seleccionados": fila.get("mantenibilidad_usar_seleccionados", False),
-                "cobertura_usar_seleccionados": fila.get("cobertura_usar_seleccionados", True),
-                "complejidad_usar_seleccionados": fila.get("complejidad_usar_seleccionados", False)
-            }
-    return {
-        "seguridad_usar_seleccionados": False,
-        "confiabilidad_usar_seleccionados": False,
-        "mantenibilidad_usar_seleccionados": False,
-        "cobertura_usar_seleccionados": True,
-        "complejidad_usar_seleccionados": False
-    }
-
-def cargar_configuracion_na():
-    """Cargar configuración de componentes N/A (si incluirlos o excluirlos del cálculo)"""
-    if os.path.exists(ARCHIVO_CONFIGURACION_NA):
-        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_NA)
-        if not df_config.empty:
-            fila = df_config.iloc[0]
-            return {
-                "incluir_na_seguridad": fila.get("incluir_na_seguridad", False),
-                "incluir_na_confiabilidad": fila.get("incluir_na_confiabilidad", False),
-                "incluir_na_mantenibilidad": fila.get("incluir_na_mantenibilidad", False),
-                "incluir_na_cobertura": fila.get("incluir_na_cobertura", False),
-                "incluir_na_complejidad": fila.get("incluir_na_complejidad", False)
-            }
-    return {
-        "incluir_na_seguridad": False,
-        "incluir_na_confiabilidad": False,
-        "incluir_na_mantenibilidad": False,
-        "incluir_na_cobertura": False,
-        "incluir_na_complejidad": False
-    }
-
-def cargar_metas():
-    """Cargar metas de progreso desde archivo CSV - VALORES CORREGIDOS"""
-    if os.path.exists(ARCHIVO_METAS):
-        df_metas = pd.read_csv(ARCHIVO_METAS)
-        if not df_metas.empty:
-            fila = df_metas.iloc[0]
-            return {
-                "meta_seguridad": float(fila.get("meta_seguridad", 90)),
-                "meta_confiabilidad": float(fila.get("meta_confiabilidad", 90)),
-                "meta_mantenibilidad": float(fila.get("meta_mantenibilidad", 90)),
-                "meta_cobertura": float(fila.get("meta_cobertura", 50)),  # 50% por defecto
-                "meta_complejidad": float(fila.get("meta_complejidad", 90))
-            }
-    return {
-        "meta_seguridad": 90.0,      # 90% por defecto
-        "meta_confiabilidad": 90.0,  # 90% por defecto
-        "meta_mantenibilidad": 90.0, # 90% por defecto
-        "meta_cobertura": 50.0,      # 50% por defecto
-        "meta_complejidad": 90.0     # 90% por defecto
-    }
+# Color de la barra de progreso de cada métrica
+COLORES_PROGRESO = {
+    'confiabilidad': '#ff7f0e',
+    'mantenibilidad': '#2ca02c',
+    'cobertura': '#d62728',
+    'complejidad': '#9467bd',
+}
 
 def cargar_metricas_seleccionadas():
+    """Columnas de las métricas a mostrar (seguridad no se muestra)"""
     if os.path.exists(ARCHIVO_METRICAS_SELECCIONADAS):
         df_metricas = pd.read_csv(ARCHIVO_METRICAS_SELECCIONADAS)
         return df_metricas['metrica'].tolist()
-    # Comentar security_rating - no se necesita
-    return ['reliability_rating', 'sqale_rating', 'coverage', 'complexity']
-
-def filtrar_datos_por_metrica(df, celula, proyectos_seleccionados, usar_seleccionados):
-    """Filtrar datos según configuración de métrica específica"""
-    if usar_seleccionados and celula in proyectos_seleccionados and proyectos_seleccionados[celula]:
-        # Usar solo proyectos seleccionados para esta célula
-        return df[(df['Celula'] == celula) & (df['NombreProyecto'].isin(proyectos_seleccionados[celula]))]
-    else:
-        # Usar todos los proyectos de la célula
-        return df[df['Celula'] == celula]
+    return [m.columna for m in metricas_okr()]
 
 def crear_barra_progreso(actual, meta, color="blue"):
     """Crear una barra de progreso usando Plotly.
@@ -229,18 +102,23 @@ def crear_barra_progreso(actual, meta, color="blue"):
 
     return fig
 
-ultimo_archivo = obtener_ultimo_archivo()
+catalogo = catalogo_meses()
+ultimo_archivo = catalogo.ultimo_archivo
 if ultimo_archivo is None:
     st.warning("⚠️ No se encontró ningún archivo de métricas en la carpeta uploads.")
     st.stop()
 
-df_ultimo = cargar_datos(ultimo_archivo)
-df_historico = cargar_todos_los_datos()
-seleccion_proyectos = cargar_seleccion()
-parametros = cargar_parametros()
-config_metricas = cargar_configuracion_metricas()
-config_na = cargar_configuracion_na()
-metas = cargar_metas()
+# Los usuarios solo leen del histórico las filas de sus células asignadas (admin: todas)
+celulas_usuario = celulas_a_cargar()
+df_historico = historico_archivos(celulas_usuario)
+df_ultimo = df_historico[df_historico['Mes'] == pd.Timestamp(catalogo.ultimo_mes)]
+# Misma configuración que usa precalentar.py para dejar listos los cálculos de la página
+config = configuracion()
+seleccion_proyectos = config["seleccion"]
+parametros = config["parametros"]
+config_metricas = config["config_metricas"]
+config_na = config["config_na"]
+metas = config["metas"]
 metricas_seleccionadas = cargar_metricas_seleccionadas()
 
 # Configuración de filtros
@@ -274,50 +152,35 @@ if meses_disponibles:
     # Si hay datos para el mes, usarlos en vez de df_ultimo
     if not df_mes_seleccionado.empty:
         df_ultimo = df_mes_seleccionado
-# Filtrar datos según configuración para cada métrica - CORREGIR nombres de las claves
-df_seguridad = filtrar_datos_por_metrica(df_ultimo, celula_seleccionada, seleccion_proyectos, config_metricas["seguridad_usar_seleccionados"])
-df_confiabilidad = filtrar_datos_por_metrica(df_ultimo, celula_seleccionada, seleccion_proyectos, config_metricas["confiabilidad_usar_seleccionados"])
-df_mantenibilidad = filtrar_datos_por_metrica(df_ultimo, celula_seleccionada, seleccion_proyectos, config_metricas["mantenibilidad_usar_seleccionados"])
-df_cobertura = filtrar_datos_por_metrica(df_ultimo, celula_seleccionada, seleccion_proyectos, config_metricas["cobertura_usar_seleccionados"])
-df_complejidad = filtrar_datos_por_metrica(df_ultimo, celula_seleccionada, seleccion_proyectos, config_metricas["complejidad_usar_seleccionados"])
 
+# Reglas de exclusión de proyectos por métrica (data/exclusiones_metricas.csv)
+reglas_exclusion = config["reglas_exclusion"]
 
+# Métricas del registro que se muestran y proyectos seleccionados de la célula
+metricas_mostradas = [m for m in metricas_okr() if m.columna in metricas_seleccionadas]
+cobertura = next(m for m in metricas_okr() if m.clave == 'cobertura')
+seleccion_celula = seleccion_proyectos.get(celula_seleccionada) or []
 
-# Proyectos a excluir para cálculo coverage
-proyectos_excluir_coverage = [
-    "AEL.DebidaDiligencia.FrontEnd:Quality",
-    "AEL.NominaElectronica.FrontEnd:Quality"
-]
+def seleccionados_de(df):
+    """Filas de proyectos seleccionados de la célula (None si la célula no tiene selección)"""
+    return df['NombreProyecto'].isin(seleccion_celula) if seleccion_celula else None
 
-# Verificar que hay datos para mostrar - MODIFICAR para excluir proyectos sin métricas
-proyectos_para_mostrar = set()
-# COMENTADO: Seguridad no se necesita
-# if 'security_rating' in metricas_seleccionadas and not df_seguridad.empty:
-#     # EXCLUIR proyectos con métricas vacías
-#     proyectos_para_mostrar.update(df_seguridad.dropna(subset=['security_rating'])['NombreProyecto'].tolist())
-if 'reliability_rating' in metricas_seleccionadas and not df_confiabilidad.empty:
-    # EXCLUIR proyectos con métricas vacías
-    proyectos_para_mostrar.update(df_confiabilidad.dropna(subset=['reliability_rating'])['NombreProyecto'].tolist())
-if 'sqale_rating' in metricas_seleccionadas and not df_mantenibilidad.empty:
-    # EXCLUIR proyectos con métricas vacías
-    proyectos_para_mostrar.update(df_mantenibilidad.dropna(subset=['sqale_rating'])['NombreProyecto'].tolist())
-if 'coverage' in metricas_seleccionadas:
-    # Para cobertura usar la configuración: si está seleccionado, usar proyectos seleccionados; si no, usar todos
-    if config_metricas["cobertura_usar_seleccionados"] and celula_seleccionada in seleccion_proyectos and seleccion_proyectos[celula_seleccionada]:
-        # Usar proyectos seleccionados aunque no tengan datos de cobertura
-        proyectos_para_mostrar.update(seleccion_proyectos[celula_seleccionada])
-    else:
-        # Usar todos los proyectos de la célula que tengan datos de cobertura
-        df_todos_cobertura = df_ultimo[df_ultimo['Celula'] == celula_seleccionada]
-        proyectos_para_mostrar.update(df_todos_cobertura.dropna(subset=['coverage'])['NombreProyecto'].tolist())
-if 'complexity' in metricas_seleccionadas and not df_complejidad.empty:
-    # EXCLUIR proyectos con métricas vacías
-    proyectos_para_mostrar.update(df_complejidad.dropna(subset=['complexity'])['NombreProyecto'].tolist())
+def usa_seleccionados(m):
+    return bool(seleccion_celula) and bool(config_metricas.get(m.clave_seleccion, False))
+
+df_todos_celula = df_ultimo[df_ultimo['Celula'] == celula_seleccionada]
+
+# Se muestran los proyectos con datos en alguna métrica (excluye proyectos sin métricas);
+# una métrica que usa solo los seleccionados muestra sus seleccionados aunque no tengan datos
+mostrar, _ = evaluar_metricas(
+    df_todos_celula, parametros, {m.clave_na: usa_seleccionados(m) for m in metricas_mostradas},
+    config_metricas, seleccionados_de(df_todos_celula), metricas=metricas_mostradas
+)
+proyectos_para_mostrar = set(df_todos_celula.loc[mostrar.any(axis=1), 'NombreProyecto'])
 
 # Si no hay proyectos con métricas, verificar si hay proyectos con bugs
 if not proyectos_para_mostrar:
     # Obtener todos los proyectos de la célula que tengan datos de bugs
-    df_todos_celula = df_ultimo[df_ultimo['Celula'] == celula_seleccionada]
     bug_cols = ['bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
     proyectos_con_bugs = set()
     
@@ -338,151 +201,53 @@ if not proyectos_para_mostrar:
 # Crear dataframe combinado para mostrar
 df_celula = df_ultimo[(df_ultimo['Celula'] == celula_seleccionada) & (df_ultimo['NombreProyecto'].isin(proyectos_para_mostrar))].copy()
 
-# Para la tabla principal, también necesitamos TODOS los proyectos de cobertura de la célula
-df_todos_celula_coverage = df_ultimo[df_ultimo['Celula'] == celula_seleccionada].dropna(subset=['coverage']).copy()
-
-# Aplicar parámetros - CORREGIR nombre del parámetro
-umbral_seguridad = parametros["security_rating"].split(",")
-umbral_confiabilidad = parametros["reliability_rating"].split(",")
-umbral_mantenibilidad = parametros["sqale_rating"].split(",")
-umbral_complejidad = parametros["duplicated_lines_density"].split(",")  # CORREGIR nombre
-cobertura_min = parametros["coverage_min"]
-
-df_celula['cumple_security'] = df_celula['security_rating'].isin(umbral_seguridad)
-df_celula['cumple_reliability'] = df_celula['reliability_rating'].isin(umbral_confiabilidad)
-df_celula['cumple_maintainability'] = df_celula['sqale_rating'].isin(umbral_mantenibilidad)
-df_celula['cumple_coverage'] = df_celula['coverage'] >= cobertura_min
-df_celula['cumple_duplications'] = df_celula['complexity'].isin(umbral_complejidad)
-
-df_celula['excluir_coverage'] = df_celula['NombreProyecto'].isin(proyectos_excluir_coverage)
+# Cumplimiento de cada métrica con su configuración de N/A, de proyectos seleccionados y
+# sus exclusiones (el mismo cálculo de okr_mensual)
+incluido, cumple = evaluar_metricas(
+    df_celula, parametros, config_na, config_metricas, seleccionados_de(df_celula), reglas_exclusion, metricas_okr()
+)
 
 # === NUEVA SECCIÓN: OKR CUMPLIMIENTO ===
 st.markdown("---")
 st.header(f"📊 OKR Cumplimiento - {celula_seleccionada}")
 
-def calcular_okr_cumplimiento(df_celula, df_cobertura, config_metricas, config_na, metas, parametros, proyectos_excluir_coverage):
-    """Calcular el cumplimiento OKR para cada métrica considerando metas configuradas y configuración N/A"""
+def calcular_okr_cumplimiento(incluido, cumple, metas):
+    """Calcular el cumplimiento OKR de cada métrica con componentes evaluables y su meta configurada"""
     okr_data = []
     
-    # Conteo de componentes totales por métrica
-    total_componentes = {}
-    componentes_cumplen = {}
-    
-    # Confiabilidad
-    if 'reliability_rating' in df_celula.columns:
-        if config_na.get("incluir_na_confiabilidad", False):
-            # Incluir todos los proyectos, considerando N/A como "no cumplen"
-            df_confiabilidad = df_celula.copy()
-            umbral_confiabilidad = parametros["reliability_rating"].split(",")
-            df_confiabilidad['cumple'] = df_confiabilidad['reliability_rating'].isin(umbral_confiabilidad)
-            df_confiabilidad['cumple'] = df_confiabilidad['cumple'].fillna(False)
-        else:
-            # Excluir proyectos con N/A
-            df_confiabilidad = df_celula.dropna(subset=['reliability_rating'])
-            umbral_confiabilidad = parametros["reliability_rating"].split(",")
-            df_confiabilidad['cumple'] = df_confiabilidad['reliability_rating'].isin(umbral_confiabilidad)
+    for m in metricas_okr():
+        total = int(incluido[m.clave].sum())
+        if total == 0:
+            continue
+        cumplen = int(cumple[m.clave].sum())
+        meta_configurada = metas.get(m.clave_meta, m.meta)
         
-        if not df_confiabilidad.empty:
-            total_componentes['Confiabilidad'] = len(df_confiabilidad)
-            componentes_cumplen['Confiabilidad'] = len(df_confiabilidad[df_confiabilidad['cumple']])
-    
-    # Mantenibilidad
-    if 'sqale_rating' in df_celula.columns:
-        if config_na.get("incluir_na_mantenibilidad", False):
-            # Incluir todos los proyectos, considerando N/A como "no cumplen"
-            df_mantenibilidad = df_celula.copy()
-            umbral_mantenibilidad = parametros["sqale_rating"].split(",")
-            df_mantenibilidad['cumple'] = df_mantenibilidad['sqale_rating'].isin(umbral_mantenibilidad)
-            df_mantenibilidad['cumple'] = df_mantenibilidad['cumple'].fillna(False)
-        else:
-            # Excluir proyectos con N/A
-            df_mantenibilidad = df_celula.dropna(subset=['sqale_rating'])
-            umbral_mantenibilidad = parametros["sqale_rating"].split(",")
-            df_mantenibilidad['cumple'] = df_mantenibilidad['sqale_rating'].isin(umbral_mantenibilidad)
-        
-        if not df_mantenibilidad.empty:
-            total_componentes['Mantenibilidad'] = len(df_mantenibilidad)
-            componentes_cumplen['Mantenibilidad'] = len(df_mantenibilidad[df_mantenibilidad['cumple']])
-    
-    # Complejidad
-    if 'complexity' in df_celula.columns:
-        if config_na.get("incluir_na_complejidad", False):
-            # Incluir todos los proyectos, considerando N/A como "no cumplen"
-            df_complejidad = df_celula.copy()
-            umbral_complejidad = parametros["duplicated_lines_density"].split(",")
-            df_complejidad['cumple'] = df_complejidad['complexity'].isin(umbral_complejidad)
-            df_complejidad['cumple'] = df_complejidad['cumple'].fillna(False)
-        else:
-            # Excluir proyectos con N/A
-            df_complejidad = df_celula.dropna(subset=['complexity'])
-            umbral_complejidad = parametros["duplicated_lines_density"].split(",")
-            df_complejidad['cumple'] = df_complejidad['complexity'].isin(umbral_complejidad)
+        # Calcular componentes objetivo según meta
+        componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
         
-        if not df_complejidad.empty:
-            total_componentes['Complejidad'] = len(df_complejidad)
-            componentes_cumplen['Complejidad'] = len(df_complejidad[df_complejidad['cumple']])
-    
-    # Cobertura - usar configuración específica
-    if 'coverage' in df_celula.columns:
-        if config_metricas.get("cobertura_usar_seleccionados", False):
-            # Usar proyectos seleccionados para cobertura
-            df_cobertura_calc = df_cobertura.copy()
+        # Calcular cumplimiento OKR (porcentaje respecto a la meta)
+        if componentes_objetivo > 0:
+            cumplimiento_okr = (cumplen / componentes_objetivo) * 100
         else:
-            # Usar todos los proyectos
-            df_cobertura_calc = df_celula.copy()
+            cumplimiento_okr = 100 if cumplen == 0 else 0
         
-        # Excluir proyectos específicos
-        df_cobertura_calc = df_cobertura_calc[~df_cobertura_calc['NombreProyecto'].isin(proyectos_excluir_coverage)]
-        
-        if config_na.get("incluir_na_cobertura", False):
-            # Incluir todos los proyectos, considerando N/A como "no cumplen"
-            df_cobertura_calc['cumple'] = df_cobertura_calc['coverage'] >= parametros["coverage_min"]
-            df_cobertura_calc['cumple'] = df_cobertura_calc['cumple'].fillna(False)
-        else:
-            # Excluir proyectos con N/A
-            df_cobertura_calc = df_cobertura_calc.dropna(subset=['coverage'])
-            df_cobertura_calc['cumple'] = df_cobertura_calc['coverage'] >= parametros["coverage_min"]
+        # Redondear hacia arriba
+        cumplimiento_okr = redondear_hacia_arriba(cumplimiento_okr)
         
-        if not df_cobertura_calc.empty:
-            total_componentes['Cobertura'] = len(df_cobertura_calc)
-            componentes_cumplen['Cobertura'] = len(df_cobertura_calc[df_cobertura_calc['cumple']])
-    
-    # Calcular porcentajes de cumplimiento OKR
-    for metrica in ['Confiabilidad', 'Mantenibilidad', 'Complejidad', 'Cobertura']:
-        if metrica in total_componentes and metrica in componentes_cumplen:
-            total = total_componentes[metrica]
-            cumplen = componentes_cumplen[metrica]
-            
-            # Obtener meta configurada
-            meta_key = f"meta_{metrica.lower()}"
-            meta_configurada = metas.get(meta_key, 90)
-            
-            # Calcular componentes objetivo según meta
-            componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-            
-            # Calcular cumplimiento OKR (porcentaje respecto a la meta)
-            if componentes_objetivo > 0:
-                cumplimiento_okr = (cumplen / componentes_objetivo) * 100
-            else:
-                cumplimiento_okr = 100 if cumplen == 0 else 0
-            
-            # Redondear hacia arriba
-            cumplimiento_okr = redondear_hacia_arriba(cumplimiento_okr)
-            
-            okr_data.append({
-                'Métrica': metrica,
-                'Total Componentes': total,
-                'Meta Configurada (%)': meta_configurada,
-                'Componentes Objetivo': componentes_objetivo,
-                'Componentes Cumplen': cumplen,
-                'Cumplimiento OKR (%)': cumplimiento_okr,
-                'Estado': '✅ Cumple' if cumplimiento_okr >= 100 else '⚠️ No cumple'
-            })
+        okr_data.append({
+            'Métrica': m.nombre,
+            'Total Componentes': total,
+            'Meta Configurada (%)': meta_configurada,
+            'Componentes Objetivo': componentes_objetivo,
+            'Componentes Cumplen': cumplen,
+            'Cumplimiento OKR (%)': cumplimiento_okr,
+            'Estado': '✅ Cumple' if cumplimiento_okr >= 100 else '⚠️ No cumple'
+        })
     
     return okr_data
 
 # Calcular OKR para la célula seleccionada
-okr_data = calcular_okr_cumplimiento(df_celula, df_cobertura, config_metricas, config_na, metas, parametros, proyectos_excluir_coverage)
+okr_data = calcular_okr_cumplimiento(incluido, cumple, metas)
 
 if okr_data:
     # Crear DataFrame para mostrar
@@ -496,14 +261,11 @@ if okr_data:
     df_okr_display['Meta Configurada (%)'] = df_okr_display['Meta Configurada (%)'].apply(lambda x: f"{x:.0f}%")
     df_okr_display['Cumplimiento OKR (%)'] = df_okr_display['Cumplimiento OKR (%)'].apply(lambda x: f"{x:.0f}%")
     
-    # Función para resaltar filas según estado
-    def resaltar_okr(row):
-        if row['Estado'] == '✅ Cumple':
-            return ['background-color: #d4edda; color: #155724'] * len(row)
-        else:
-            return ['background-color: #f8d7da; color: #721c24'] * len(row)
+    # Resaltar filas según estado
+    def resaltar_okr(df):
+        return estilos_filas(df, np.where(df['Estado'] == '✅ Cumple', ESTILO_CUMPLE, ESTILO_NO_CUMPLE))
     
-    df_okr_styled = df_okr_display.style.apply(resaltar_okr, axis=1)
+    df_okr_styled = df_okr_display.style.apply(resaltar_okr, axis=None)
     st.dataframe(df_okr_styled, use_container_width=True, hide_index=True)
     
     # Explicación del cálculo
@@ -526,121 +288,12 @@ else:
 st.markdown("---")
 st.header(f"🎯 Progreso hacia Metas - {celula_seleccionada}")
 
-# Calcular cumplimiento usando los dataframes filtrados correspondientes considerando configuración N/A
-cumplimiento_data = []
-
-# COMENTADO: Seguridad no se necesita
-# if 'security_rating' in metricas_seleccionadas and not df_seguridad.empty:
-#     if config_na.get("incluir_na_seguridad", False):
-#         df_security_calc = df_seguridad.copy()
-#         df_security_calc['cumple_security'] = df_security_calc['security_rating'].isin(umbral_seguridad)
-#         df_security_calc['cumple_security'] = df_security_calc['cumple_security'].fillna(False)
-#     else:
-#         df_security_calc = df_seguridad.dropna(subset=['security_rating']).copy()
-#         df_security_calc['cumple_security'] = df_security_calc['security_rating'].isin(umbral_seguridad)
-#     
-#     if not df_security_calc.empty:
-#         cumplimiento_security_pct = df_security_calc['cumple_security'].mean() * 100
-#         cumplimiento_data.append(('Seguridad', cumplimiento_security_pct, metas["meta_seguridad"], '#1f77b4'))
-
-if 'reliability_rating' in metricas_seleccionadas and not df_confiabilidad.empty:
-    if config_na.get("incluir_na_confiabilidad", False):
-        df_reliability_calc = df_confiabilidad.copy()
-        df_reliability_calc['cumple_reliability'] = df_reliability_calc['reliability_rating'].isin(umbral_confiabilidad)
-        df_reliability_calc['cumple_reliability'] = df_reliability_calc['cumple_reliability'].fillna(False)
-    else:
-        df_reliability_calc = df_confiabilidad.dropna(subset=['reliability_rating']).copy()
-        df_reliability_calc['cumple_reliability'] = df_reliability_calc['reliability_rating'].isin(umbral_confiabilidad)
-    
-    if not df_reliability_calc.empty:
-        # Calcular OKR para confiabilidad
-        total = len(df_reliability_calc)
-        cumplen = len(df_reliability_calc[df_reliability_calc['cumple_reliability']])
-        meta_configurada = metas.get("meta_confiabilidad", 90)
-        componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-        
-        if componentes_objetivo > 0:
-            okr_reliability = (cumplen / componentes_objetivo) * 100
-        else:
-            okr_reliability = 100 if cumplen == 0 else 0
-        
-        okr_reliability = redondear_hacia_arriba(okr_reliability)
-        cumplimiento_data.append(('Confiabilidad', okr_reliability, 100, '#ff7f0e'))  # Meta OKR es 100%
-
-if 'sqale_rating' in metricas_seleccionadas and not df_mantenibilidad.empty:
-    if config_na.get("incluir_na_mantenibilidad", False):
-        df_maintainability_calc = df_mantenibilidad.copy()
-        df_maintainability_calc['cumple_maintainability'] = df_maintainability_calc['sqale_rating'].isin(umbral_mantenibilidad)
-        df_maintainability_calc['cumple_maintainability'] = df_maintainability_calc['cumple_maintainability'].fillna(False)
-    else:
-        df_maintainability_calc = df_mantenibilidad.dropna(subset=['sqale_rating']).copy()
-        df_maintainability_calc['cumple_maintainability'] = df_maintainability_calc['sqale_rating'].isin(umbral_mantenibilidad)
-    
-    if not df_maintainability_calc.empty:
-        # Calcular OKR para mantenibilidad
-        total = len(df_maintainability_calc)
-        cumplen = len(df_maintainability_calc[df_maintainability_calc['cumple_maintainability']])
-        meta_configurada = metas.get("meta_mantenibilidad", 90)
-        componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-        
-        if componentes_objetivo > 0:
-            okr_maintainability = (cumplen / componentes_objetivo) * 100
-        else:
-            okr_maintainability = 100 if cumplen == 0 else 0
-        
-        okr_maintainability = redondear_hacia_arriba(okr_maintainability)
-        cumplimiento_data.append(('Mantenibilidad', okr_maintainability, 100, '#2ca02c'))  # Meta OKR es 100%
-
-if 'coverage' in metricas_seleccionadas and not df_cobertura.empty:
-    # Para las BARRAS DE PROGRESO usar la configuración filtrada (df_cobertura)
-    if config_na.get("incluir_na_cobertura", False):
-        df_coverage_calc = df_cobertura.copy()
-        df_coverage_calc['cumple_coverage'] = df_coverage_calc['coverage'] >= cobertura_min
-        df_coverage_calc['cumple_coverage'] = df_coverage_calc['cumple_coverage'].fillna(False)
-    else:
-        df_coverage_calc = df_cobertura.dropna(subset=['coverage']).copy()
-        df_coverage_calc['cumple_coverage'] = df_coverage_calc['coverage'] >= cobertura_min
-    
-    df_coverage_calc['excluir_coverage'] = df_coverage_calc['NombreProyecto'].isin(proyectos_excluir_coverage)
-    df_coverage_filtrado = df_coverage_calc[~df_coverage_calc['excluir_coverage']]
-    if not df_coverage_filtrado.empty:
-        # Calcular OKR para cobertura
-        total = len(df_coverage_filtrado)
-        cumplen = len(df_coverage_filtrado[df_coverage_filtrado['cumple_coverage']])
-        meta_configurada = metas.get("meta_cobertura", 50)
-        componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-        
-        if componentes_objetivo > 0:
-            okr_coverage = (cumplen / componentes_objetivo) * 100
-        else:
-            okr_coverage = 100 if cumplen == 0 else 0
-        
-        okr_coverage = redondear_hacia_arriba(okr_coverage)
-        cumplimiento_data.append(('Cobertura', okr_coverage, 100, '#d62728'))  # Meta OKR es 100%
-
-if 'complexity' in metricas_seleccionadas and not df_complejidad.empty:
-    if config_na.get("incluir_na_complejidad", False):
-        df_duplications_calc = df_complejidad.copy()
-        df_duplications_calc['cumple_duplications'] = df_duplications_calc['complexity'].isin(umbral_complejidad)
-        df_duplications_calc['cumple_duplications'] = df_duplications_calc['cumple_duplications'].fillna(False)
-    else:
-        df_duplications_calc = df_complejidad.dropna(subset=['complexity']).copy()
-        df_duplications_calc['cumple_duplications'] = df_duplications_calc['complexity'].isin(umbral_complejidad)
-    
-    if not df_duplications_calc.empty:
-        # Calcular OKR para complejidad
-        total = len(df_duplications_calc)
-        cumplen = len(df_duplications_calc[df_duplications_calc['cumple_duplications']])
-        meta_configurada = metas.get("meta_complejidad", 90)
-        componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-        
-        if componentes_objetivo > 0:
-            okr_complexity = (cumplen / componentes_objetivo) * 100
-        else:
-            okr_complexity = 100 if cumplen == 0 else 0
-        
-        okr_complexity = redondear_hacia_arriba(okr_complexity)
-        cumplimiento_data.append(('Complejidad', okr_complexity, 100, '#9467bd'))  # Meta OKR es 100%
+# Las barras muestran el OKR de la tabla anterior para las métricas seleccionadas (meta OKR: 100%)
+okr_por_metrica = {fila['Métrica']: fila['Cumplimiento OKR (%)'] for fila in okr_data}
+cumplimiento_data = [
+    (m.nombre, okr_por_metrica[m.nombre], 100, COLORES_PROGRESO.get(m.clave, '#1f77b4'))
+    for m in metricas_mostradas if m.nombre in okr_por_metrica
+]
 
 # Mostrar barras de progreso
 if cumplimiento_data:
@@ -670,7 +323,7 @@ nombre_metricas_amigables = {
     'reliability_rating': 'Confiabilidad',
     'sqale_rating': 'Mantenibilidad',
     'coverage': 'Cobertura de pruebas unitarias',
-    'complexity': 'Complejidad'
+    'duplicated_lines_density': 'Complejidad'
 }
 
 bug_cols = ['bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
@@ -715,85 +368,17 @@ for col in columnas_rating:
     if col in df_mostrar.columns:
         df_mostrar[col] = df_mostrar[col].apply(lambda x: "N/A" if pd.isna(x) or x is None or str(x).lower() == 'none' else x)
 
-# Crear fila de resumen usando los datos filtrados por métrica considerando configuración N/A
+# Fila de resumen: cumplimiento de todos los proyectos de la tabla (sin restringir a los
+# seleccionados), con la configuración N/A y las exclusiones de cada métrica
 fila_resumen = {'NombreProyecto': 'Cumplimiento (%)'}
-
-# COMENTADO: Seguridad no se necesita
-# if 'security_rating' in metricas_seleccionadas and not df_seguridad.empty:
-#     if config_na.get("incluir_na_seguridad", False):
-#         df_temp = df_seguridad.copy()
-#         df_temp['cumple_security'] = df_temp['security_rating'].isin(umbral_seguridad)
-#         df_temp['cumple_security'] = df_temp['cumple_security'].fillna(False)
-#     else:
-#         df_temp = df_seguridad.dropna(subset=['security_rating']).copy()
-#         df_temp['cumple_security'] = df_temp['security_rating'].isin(umbral_seguridad)
-#     
-#     if not df_temp.empty:
-#         fila_resumen['Seguridad'] = formatear_pct(df_temp['cumple_security'].mean() * 100)
-#     else:
-#         fila_resumen['Seguridad'] = "N/A"
-
-if 'reliability_rating' in metricas_seleccionadas and not df_confiabilidad.empty:
-    if config_na.get("incluir_na_confiabilidad", False):
-        df_temp = df_confiabilidad.copy()
-        df_temp['cumple_reliability'] = df_temp['reliability_rating'].isin(umbral_confiabilidad)
-        df_temp['cumple_reliability'] = df_temp['cumple_reliability'].fillna(False)
-    else:
-        df_temp = df_confiabilidad.dropna(subset=['reliability_rating']).copy()
-        df_temp['cumple_reliability'] = df_temp['reliability_rating'].isin(umbral_confiabilidad)
-    
-    if not df_temp.empty:
-        fila_resumen['Confiabilidad'] = formatear_pct(df_temp['cumple_reliability'].mean() * 100)
-    else:
-        fila_resumen['Confiabilidad'] = "N/A"
-
-if 'sqale_rating' in metricas_seleccionadas and not df_mantenibilidad.empty:
-    if config_na.get("incluir_na_mantenibilidad", False):
-        df_temp = df_mantenibilidad.copy()
-        df_temp['cumple_maintainability'] = df_temp['sqale_rating'].isin(umbral_mantenibilidad)
-        df_temp['cumple_maintainability'] = df_temp['cumple_maintainability'].fillna(False)
-    else:
-        df_temp = df_mantenibilidad.dropna(subset=['sqale_rating']).copy()
-        df_temp['cumple_maintainability'] = df_temp['sqale_rating'].isin(umbral_mantenibilidad)
-    
-    if not df_temp.empty:
-        fila_resumen['Mantenibilidad'] = formatear_pct(df_temp['cumple_maintainability'].mean() * 100)
-    else:
-        fila_resumen['Mantenibilidad'] = "N/A"
-
-if 'coverage' in metricas_seleccionadas:
-    # Para cobertura en la TABLA PRINCIPAL usar TODOS los proyectos de la célula (NO los filtrados por configuración)
-    df_temp = df_todos_celula_coverage.copy()
-    
-    if config_na.get("incluir_na_cobertura", False):
-        # Incluir todos los proyectos, considerando N/A como "no cumplen"
-        df_temp['cumple_coverage'] = df_temp['coverage'] >= cobertura_min
-        df_temp['cumple_coverage'] = df_temp['cumple_coverage'].fillna(False)
-    else:
-        # Solo proyectos con datos válidos
-        df_temp = df_temp.dropna(subset=['coverage'])
-        df_temp['cumple_coverage'] = df_temp['coverage'] >= cobertura_min
-    
-    df_temp['excluir_coverage'] = df_temp['NombreProyecto'].isin(proyectos_excluir_coverage)
-    df_temp_filtrado = df_temp[~df_temp['excluir_coverage']]
-    if not df_temp_filtrado.empty:
-        fila_resumen['Cobertura de pruebas unitarias'] = formatear_pct(df_temp_filtrado['cumple_coverage'].mean() * 100)
-    else:
-        fila_resumen['Cobertura de pruebas unitarias'] = "N/A"
-
-if 'complexity' in metricas_seleccionadas and not df_complejidad.empty:
-    if config_na.get("incluir_na_complejidad", False):
-        df_temp = df_complejidad.copy()
-        df_temp['cumple_duplications'] = df_temp['complexity'].isin(umbral_complejidad)
-        df_temp['cumple_duplications'] = df_temp['cumple_duplications'].fillna(False)
-    else:
-        df_temp = df_complejidad.dropna(subset=['complexity']).copy()
-        df_temp['cumple_duplications'] = df_temp['complexity'].isin(umbral_complejidad)
-    
-    if not df_temp.empty:
-        fila_resumen['Complejidad'] = formatear_pct(df_temp['cumple_duplications'].mean() * 100)
-    else:
-        fila_resumen['Complejidad'] = "N/A"
+incluido_tabla, cumple_tabla = evaluar_metricas(
+    df_celula, parametros, config_na, exclusiones=reglas_exclusion, metricas=metricas_mostradas
+)
+for m in metricas_mostradas:
+    total = incluido_tabla[m.clave].sum()
+    fila_resumen[nombre_metricas_amigables.get(m.columna, m.nombre)] = (
+        formatear_pct(cumple_tabla[m.clave].sum() / total * 100) if total else "N/A"
+    )
 
 # Completar fila de resumen con columnas de bugs
 for col in nuevo_nombre_cols_bugs_tabla.values():
@@ -805,62 +390,40 @@ if 'Total Bugs' in df_mostrar.columns:  # CORREGIDO: cambié nombre
 
 df_mostrar_final = pd.concat([df_mostrar, pd.DataFrame([fila_resumen])], ignore_index=True)
 
-def resaltar_resumen(row):
-    if row['NombreProyecto'] == 'Cumplimiento (%)':
-        return ['background-color: #f0f0f0; font-weight: bold'] * len(row)
-    else:
-        return [''] * len(row)
-
-def resaltar_cumplimiento(val):
-    """Aplicar colores según el cumplimiento en las columnas de métricas"""
-    if isinstance(val, str) and '%' in val and val != 'N/A':
-        try:
-            # Extraer el número del porcentaje
-            porcentaje = float(val.replace('%', ''))
-            if porcentaje >= 100:
-                return 'background-color: #d4edda; color: #155724'  # Verde para cumplir
-            else:
-                return 'background-color: #f8d7da; color: #721c24'  # Rojo para no cumplir
-        except:
-            return ''
-    return ''
+metricas_cols = ['Confiabilidad', 'Mantenibilidad', 'Cobertura de pruebas unitarias', 'Complejidad']
+
+def resaltar_resumen(df):
+    """Fila de resumen en gris y colores de cumplimiento ('NN%') en las columnas de métricas"""
+    estilo_resumen = np.where(df['NombreProyecto'] == 'Cumplimiento (%)', 'background-color: #f0f0f0; font-weight: bold', '')
+    return combinar_estilos(
+        estilos_filas(df, estilo_resumen),
+        estilos_columnas(df, {col: estilo_cumplimiento_pct(df[col]) for col in metricas_cols if col in df.columns})
+    )
 
 # Aplicar estilos
-df_mostrar_final_styled = df_mostrar_final.style.apply(resaltar_resumen, axis=1)
-# Aplicar colores a las columnas de métricas
-metricas_cols = ['Confiabilidad', 'Mantenibilidad', 'Cobertura de pruebas unitarias', 'Complejidad']
-for col in metricas_cols:
-    if col in df_mostrar_final.columns:
-        # Compatibilidad entre versiones de pandas:
-        # - pandas recientes: Styler.map
-        # - pandas antiguas: Styler.applymap
-        if hasattr(df_mostrar_final_styled, "map"):
-            df_mostrar_final_styled = df_mostrar_final_styled.map(resaltar_cumplimiento, subset=[col])
-        else:
-            df_mostrar_final_styled = df_mostrar_final_styled.applymap(resaltar_cumplimiento, subset=[col])
+df_mostrar_final_styled = df_mostrar_final.style.apply(resaltar_resumen, axis=None)
 
 st.subheader(f"Proyectos y métricas para la célula: {celula_seleccionada}")
 st.dataframe(df_mostrar_final_styled, use_container_width=True, hide_index=True)
 
 # Separar tablas de cobertura si está seleccionada
-if 'coverage' in metricas_seleccionadas:
+if cobertura in metricas_mostradas:
     st.markdown("---")
     st.title("📊 Detalle de Cobertura de Pruebas Unitarias")
     
     # Tabla 1: Proyectos considerados para cobertura - USAR configuración filtrada
-    if config_metricas["cobertura_usar_seleccionados"] and celula_seleccionada in seleccion_proyectos and seleccion_proyectos[celula_seleccionada]:
+    if usa_seleccionados(cobertura):
         # Usar proyectos seleccionados aunque no tengan datos de cobertura
-        proyectos_coverage = df_ultimo[df_ultimo['Celula'] == celula_seleccionada].copy()
-        # Agregar columna de cobertura con NaN para proyectos sin datos
-        proyectos_coverage['coverage'] = proyectos_coverage['coverage'].fillna('N/A')
-        # Solo incluir proyectos seleccionados
-        proyectos_coverage = proyectos_coverage[proyectos_coverage['NombreProyecto'].isin(seleccion_proyectos[celula_seleccionada])]
+        proyectos_coverage = df_todos_celula[df_todos_celula['NombreProyecto'].isin(seleccion_celula)].copy()
     else:
         # Usar configuración original (solo proyectos con datos de cobertura)
-        proyectos_coverage = df_cobertura.dropna(subset=['coverage']).copy()
+        proyectos_coverage = df_todos_celula.dropna(subset=['coverage']).copy()
     
-    proyectos_coverage['cumple_coverage'] = proyectos_coverage['coverage'].apply(lambda x: x >= cobertura_min if pd.notna(x) and x != 'N/A' else 'N/A')
-    proyectos_coverage['excluir_coverage'] = proyectos_coverage['NombreProyecto'].isin(proyectos_excluir_coverage)
+    _, cumple_coverage = evaluar_metricas(proyectos_coverage, parametros, metricas=[cobertura])
+    proyectos_coverage['cumple_coverage'] = cumple_coverage[cobertura.clave].where(proyectos_coverage['coverage'].notna(), 'N/A')
+    # Proyectos sin datos de cobertura como N/A
+    proyectos_coverage['coverage'] = proyectos_coverage['coverage'].astype(object).fillna('N/A')
+    proyectos_coverage['excluir_coverage'] = mascara_exclusion(proyectos_coverage['NombreProyecto'], cobertura.clave, reglas_exclusion)
     
     proyectos_coverage_incluidos = proyectos_coverage[~proyectos_coverage['excluir_coverage']][['NombreProyecto', 'coverage', 'cumple_coverage']].copy()
     
@@ -910,41 +473,30 @@ if 'coverage' in metricas_seleccionadas:
                 'Cumple': ''
             }
             
-            # Concatenar las filas de resumen
-            proyectos_coverage_final = pd.concat([proyectos_coverage_incluidos, pd.DataFrame([fila_cumplimiento, fila_promedio])], ignore_index=True)
+            # Filas de resumen: se agregan al final de cada página de la tabla
+            filas_resumen_coverage = pd.DataFrame([fila_cumplimiento, fila_promedio])
             
-            # Función para resaltar las filas de resumen
-            def resaltar_resumen_coverage(row):
-                if row['Proyecto'] == 'Cumplimiento (%)':
-                    return ['background-color: #e8f4fd; font-weight: bold'] * len(row)
-                elif row['Proyecto'] == 'Promedio Cobertura':
-                    return ['background-color: #f0f8ff; font-weight: bold'] * len(row)
-                else:
-                    return [''] * len(row)
+            # Resaltar las filas de resumen y el cumplimiento de la columna de cobertura
+            def resaltar_resumen_coverage(df):
+                estilo_resumen = np.select(
+                    [df['Proyecto'] == 'Cumplimiento (%)', df['Proyecto'] == 'Promedio Cobertura'],
+                    ['background-color: #e8f4fd; font-weight: bold', 'background-color: #f0f8ff; font-weight: bold'],
+                    default=''
+                )
+                return combinar_estilos(
+                    estilos_filas(df, estilo_resumen),
+                    estilos_columnas(df, {'Cobertura': estilo_cumplimiento_pct(df['Cobertura'])})
+                )
             
-            def resaltar_cumplimiento_coverage(val):
-                """Aplicar colores según el cumplimiento en la columna de cobertura"""
-                if isinstance(val, str) and '%' in val and val != 'N/A':
-                    try:
-                        # Extraer el número del porcentaje
-                        porcentaje = float(val.replace('%', ''))
-                        if porcentaje >= 100:
-                            return 'background-color: #d4edda; color: #155724'  # Verde para cumplir
-                        else:
-                            return 'background-color: #f8d7da; color: #721c24'  # Rojo para no cumplir
-                    except:
-                        return ''
-                return ''
+            def estilo_coverage(df_pagina):
+                return df_pagina.style.apply(resaltar_resumen_coverage, axis=None)
             
-            proyectos_coverage_styled = proyectos_coverage_final.style.apply(resaltar_resumen_coverage, axis=1)
-            # Aplicar colores a la columna de cobertura
-            if hasattr(proyectos_coverage_styled, "map"):
-                proyectos_coverage_styled = proyectos_coverage_styled.map(resaltar_cumplimiento_coverage, subset=['Cobertura'])
-            else:
-                proyectos_coverage_styled = proyectos_coverage_styled.applymap(resaltar_cumplimiento_coverage, subset=['Cobertura'])
-            st.dataframe(proyectos_coverage_styled, use_container_width=True, hide_index=True)
+            tabla_paginada(
+                proyectos_coverage_incluidos, key="tabla_coverage_incluidos", estilo=estilo_coverage,
+                pie=filas_resumen_coverage, use_container_width=True, hide_index=True
+            )
         else:
-            st.dataframe(proyectos_coverage_incluidos, use_container_width=True, hide_index=True)
+            tabla_paginada(proyectos_coverage_incluidos, key="tabla_coverage_incluidos", use_container_width=True, hide_index=True)
     
     # Tabla 2: Proyectos excluidos de cobertura
     proyectos_excluidos = proyectos_coverage[proyectos_coverage['excluir_coverage']][['NombreProyecto', 'coverage']].copy()
@@ -958,12 +510,15 @@ if 'coverage' in metricas_seleccionadas:
         
         st.subheader("⚠️ Proyectos excluidos del cálculo de cobertura")
         # Aplicar colores a la columna de cobertura en proyectos excluidos también
-        proyectos_excluidos_styled = proyectos_excluidos.style
-        if hasattr(proyectos_excluidos_styled, "map"):
-            proyectos_excluidos_styled = proyectos_excluidos_styled.map(resaltar_cumplimiento_coverage, subset=['Cobertura'])
-        else:
-            proyectos_excluidos_styled = proyectos_excluidos_styled.applymap(resaltar_cumplimiento_coverage, subset=['Cobertura'])
-        st.dataframe(proyectos_excluidos_styled, use_container_width=True, hide_index=True)
+        def estilo_excluidos(df_pagina):
+            return df_pagina.style.apply(
+                lambda df: estilos_columnas(df, {'Cobertura': estilo_cumplimiento_pct(df['Cobertura'])}), axis=None
+            )
+        
+        tabla_paginada(
+            proyectos_excluidos, key="tabla_coverage_excluidos", estilo=estilo_excluidos,
+            use_container_width=True, hide_index=True
+        )
 
 # Resumen bugs
 if any(col in df_celula.columns for col in bug_cols):
@@ -999,55 +554,21 @@ if any(col in df_celula.columns for col in bug_cols):
 
     # Métricas históricas de bugs por célula: factor de crecimiento y % eliminación del backlog de deuda técnica
     if not df_historico.empty and 'Mes' in df_historico.columns:
-        df_bugs_hist = df_historico[df_historico['Celula'] == celula_seleccionada].copy()
-        df_bugs_hist['Mes'] = pd.to_datetime(df_bugs_hist['Mes'], errors='coerce')
-        df_bugs_hist = df_bugs_hist.dropna(subset=['Mes'])
-
         # Solo considerar bugs Crítica, Alta, Media y Baja (ignorar otros niveles como "info")
-        bug_cols_hist = [col for col in ['bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor'] if col in df_bugs_hist.columns]
+        bug_cols_hist = [col for col in COLUMNAS_BUGS_BACKLOG if col in df_historico.columns]
         if bug_cols_hist:
-            # Agrupar por mes (periodo mensual) y sumar bugs de la célula
-            df_bugs_mes = (
-                df_bugs_hist
-                .groupby(df_bugs_hist['Mes'].dt.to_period('M'))[bug_cols_hist]
-                .sum()
-                .reset_index()
-            )
-            df_bugs_mes['Mes'] = df_bugs_mes['Mes'].dt.to_timestamp()
-            df_bugs_mes = df_bugs_mes.sort_values('Mes').reset_index(drop=True)
-
-            # Calcular total de bugs por mes con las columnas seleccionadas
-            df_bugs_mes['Total Bugs'] = df_bugs_mes[bug_cols_hist].sum(axis=1)
-
-            # Identificar mes de enero como línea base (tomar el primer enero disponible)
-            df_enero = df_bugs_mes[df_bugs_mes['Mes'].dt.month == 1]
-            if not df_enero.empty:
-                idx_enero_base = df_enero.index[0]
-                total_bugs_base = df_bugs_mes.loc[idx_enero_base, 'Total Bugs']
-
-                # Inicializar columnas de métricas
-                df_bugs_mes['Factor crecimiento bugs'] = None
-                df_bugs_mes['% eliminación backlog deuda técnica'] = None
-
-                for i in range(len(df_bugs_mes)):
-                    total_actual = df_bugs_mes.loc[i, 'Total Bugs']
-
-                    # Factor de crecimiento de bugs: diferencia absoluta respecto al mes anterior (puede ser positiva o negativa)
-                    if i > 0:
-                        total_prev = df_bugs_mes.loc[i - 1, 'Total Bugs']
-                        if not pd.isna(total_prev):
-                            factor = total_actual - total_prev
-                            df_bugs_mes.at[i, 'Factor crecimiento bugs'] = int(factor)
-
-                    # % eliminación del backlog de deuda técnica: respecto a la línea base de enero
-                    if i >= idx_enero_base and total_bugs_base and not pd.isna(total_bugs_base) and total_bugs_base != 0:
-                        if i == idx_enero_base:
-                            # Enero es la línea base, no se muestra porcentaje
-                            df_bugs_mes.at[i, '% eliminación backlog deuda técnica'] = None
-                        else:
-                            eliminacion = ((total_bugs_base - total_actual) / total_bugs_base) * 100
-                            # Puede ser negativo si hay más bugs que en enero
-                            df_bugs_mes.at[i, '% eliminación backlog deuda técnica'] = redondear_hacia_arriba(eliminacion)
+            # Total de bugs por mes de la célula
+            df_bugs_mes = bugs_de_celula(df_historico, celula_seleccionada, bug_cols_hist)
+
+            # Las líneas base de enero se ofrecen solo si la célula tiene algún enero
+            if not df_bugs_mes.empty:
+                base_bugs = st.selectbox(
+                    "Línea base para eliminación de backlog",
+                    bases_disponibles(df_bugs_mes),
+                    format_func=DESCRIPCION_BASES.get,
+                    key="base_backlog_bugs"
+                )
+                df_bugs_mes = tendencia_bugs(df_bugs_mes, base=base_bugs)
 
                 # Preparar tabla para mostrar
                 df_bugs_mostrar = df_bugs_mes[['Mes', 'Total Bugs', 'Factor crecimiento bugs', '% eliminación backlog deuda técnica']].copy()
@@ -1077,7 +598,7 @@ if any(col in df_celula.columns for col in bug_cols):
                 df_bugs_mostrar['% eliminación backlog deuda técnica'] = df_bugs_mostrar['% eliminación backlog deuda técnica'].apply(formatear_porcentaje)
                 df_bugs_mostrar['Mes'] = df_bugs_mostrar['Mes'].dt.strftime('%Y-%m')
 
-                st.subheader("📉 Tendencia de bugs y eliminación de backlog (base: enero)")
+                st.subheader(f"📉 Tendencia de bugs y eliminación de backlog (base: {DESCRIPCION_BASES[base_bugs]})")
                 st.dataframe(df_bugs_mostrar, hide_index=True, use_container_width=True)
 
 # === SECCIÓN: COMPONENTES QUE DEJARON DE CUMPLIR ===
@@ -1092,147 +613,25 @@ if meses_disponibles and len(meses_disponibles) > 1 and mes_seleccionado:
         indice_mes_actual = meses_ordenados.index(mes_seleccionado)
         
         if indice_mes_actual > 0:  # Hay mes anterior
-            mes_anterior = meses_ordenados[indice_mes_actual - 1]
+            # Degradaciones de todo el histórico (un solo merge) y vista de la célula/mes
+            df_degradados = degradados_de(df_historico, celulas_usuario, config)
+            degradados = degradados_por_metrica(df_degradados, celula_seleccionada, mes_seleccionado)
+            
+            # La célula se compara con su último mes con datos, que puede no ser el mes anterior global
+            mes_anterior = mes_anterior_comparado(
+                df_degradados, df_historico, celula_seleccionada, mes_seleccionado
+            ) or meses_ordenados[indice_mes_actual - 1]
             
             st.markdown("---")
             st.header(f"⚠️ Componentes que Dejaron de Cumplir - Comparación {mes_anterior} vs {mes_seleccionado}")
             st.markdown(f"Comparando el mes **{mes_anterior}** (anterior) con **{mes_seleccionado}** (actual)")
             
-            # Función para calcular componentes degradados entre dos meses
-            def calcular_degradados_mes_a_mes(df_historico, celula_seleccionada, mes_anterior, mes_actual, 
-                                               proyectos_seleccionados, config_metricas, config_na, parametros):
-                """Calcular componentes que pasaron de cumplir a no cumplir entre dos meses"""
-                
-                # Obtener datos del mes anterior
-                df_mes_anterior = df_historico[
-                    (df_historico['Celula'] == celula_seleccionada) &
-                    (df_historico['Mes'].dt.strftime('%Y-%m') == mes_anterior)
-                ].copy()
-                
-                # Obtener datos del mes actual
-                df_mes_actual = df_historico[
-                    (df_historico['Celula'] == celula_seleccionada) &
-                    (df_historico['Mes'].dt.strftime('%Y-%m') == mes_actual)
-                ].copy()
-                
-                if df_mes_anterior.empty or df_mes_actual.empty:
-                    return {}
-                
-                # Aplicar parámetros
-                umbral_confiabilidad = parametros["reliability_rating"].split(",")
-                umbral_mantenibilidad = parametros["sqale_rating"].split(",")
-                umbral_complejidad = parametros["duplicated_lines_density"].split(",")
-                
-                resultados = {
-                    'Confiabilidad': [],
-                    'Mantenibilidad': [],
-                    'Complejidad': []
-                }
-                
-                # Definir métricas a analizar (sin cobertura)
-                metricas_config = [
-                    {
-                        'nombre': 'Confiabilidad',
-                        'columna': 'reliability_rating',
-                        'umbral': umbral_confiabilidad,
-                        'usar_seleccionados': config_metricas["confiabilidad_usar_seleccionados"],
-                        'incluir_na': config_na.get("incluir_na_confiabilidad", False),
-                        'es_rating': True
-                    },
-                    {
-                        'nombre': 'Mantenibilidad',
-                        'columna': 'sqale_rating',
-                        'umbral': umbral_mantenibilidad,
-                        'usar_seleccionados': config_metricas["mantenibilidad_usar_seleccionados"],
-                        'incluir_na': config_na.get("incluir_na_mantenibilidad", False),
-                        'es_rating': True
-                    },
-                    {
-                        'nombre': 'Complejidad',
-                        'columna': 'complexity',
-                        'umbral': umbral_complejidad,
-                        'usar_seleccionados': config_metricas["complejidad_usar_seleccionados"],
-                        'incluir_na': config_na.get("incluir_na_complejidad", False),
-                        'es_rating': True
-                    }
-                ]
-                
-                for metrica_config in metricas_config:
-                    nombre_metrica = metrica_config['nombre']
-                    columna = metrica_config['columna']
-                    umbral = metrica_config['umbral']
-                    usar_seleccionados = metrica_config['usar_seleccionados']
-                    incluir_na = metrica_config['incluir_na']
-                    
-                    # Filtrar datos según configuración para mes anterior
-                    if usar_seleccionados and celula_seleccionada in proyectos_seleccionados and proyectos_seleccionados[celula_seleccionada]:
-                        df_anterior = df_mes_anterior[df_mes_anterior['NombreProyecto'].isin(proyectos_seleccionados[celula_seleccionada])].copy()
-                        df_actual = df_mes_actual[df_mes_actual['NombreProyecto'].isin(proyectos_seleccionados[celula_seleccionada])].copy()
-                    else:
-                        df_anterior = df_mes_anterior.copy()
-                        df_actual = df_mes_actual.copy()
-                    
-                    if df_anterior.empty or df_actual.empty or columna not in df_anterior.columns or columna not in df_actual.columns:
-                        continue
-                    
-                    # Determinar cumplimiento para mes anterior
-                    if incluir_na:
-                        df_anterior['cumple'] = df_anterior[columna].isin(umbral)
-                        df_anterior['cumple'] = df_anterior['cumple'].fillna(False)
-                    else:
-                        df_anterior = df_anterior.dropna(subset=[columna]).copy()
-                        if df_anterior.empty:
-                            continue
-                        df_anterior['cumple'] = df_anterior[columna].isin(umbral)
-                    
-                    # Determinar cumplimiento para mes actual
-                    if incluir_na:
-                        df_actual['cumple'] = df_actual[columna].isin(umbral)
-                        df_actual['cumple'] = df_actual['cumple'].fillna(False)
-                    else:
-                        df_actual = df_actual.dropna(subset=[columna]).copy()
-                        if df_actual.empty:
-                            continue
-                        df_actual['cumple'] = df_actual[columna].isin(umbral)
-                    
-                    # Crear diccionarios para búsqueda rápida
-                    anterior_dict = df_anterior.set_index('NombreProyecto')[['cumple', columna]].to_dict('index')
-                    actual_dict = df_actual.set_index('NombreProyecto')[['cumple', columna]].to_dict('index')
-                    
-                    # Encontrar componentes que cumplían antes y no cumplen ahora
-                    for proyecto in anterior_dict.keys():
-                        if proyecto in actual_dict:
-                            cumple_anterior = anterior_dict[proyecto]['cumple']
-                            cumple_actual = actual_dict[proyecto]['cumple']
-                            valor_anterior = anterior_dict[proyecto][columna]
-                            valor_actual = actual_dict[proyecto][columna]
-                            
-                            if cumple_anterior == True and cumple_actual == False:
-                                # Formatear valores
-                                valor_anterior_str = 'N/A' if pd.isna(valor_anterior) else str(valor_anterior)
-                                valor_actual_str = 'N/A' if pd.isna(valor_actual) else str(valor_actual)
-                                
-                                resultados[nombre_metrica].append({
-                                    'Componente': proyecto,
-                                    'Valor Anterior': valor_anterior_str,
-                                    'Valor Actual': valor_actual_str,
-                                    'Estado Anterior': '✅ Cumplía',
-                                    'Estado Actual': '❌ No Cumple'
-                                })
-                
-                return resultados
-            
-            # Calcular componentes degradados
-            degradados = calcular_degradados_mes_a_mes(
-                df_historico, celula_seleccionada, mes_anterior, mes_seleccionado,
-                seleccion_proyectos, config_metricas, config_na, parametros
-            )
-            
-            # Mostrar 3 tablas separadas
-            metricas_tablas = ['Confiabilidad', 'Mantenibilidad', 'Complejidad']
+            # Mostrar una tabla por métrica
+            metricas_tablas = [m.nombre for m in metricas_okr()]
             colores_tablas = {
                 'Confiabilidad': '#fff3cd',
                 'Mantenibilidad': '#f8d7da',
+                'Cobertura': '#e2e3e5',
                 'Complejidad': '#d1ecf1'
             }
             
@@ -1240,14 +639,11 @@ if meses_disponibles and len(meses_disponibles) > 1 and mes_seleccionado:
                 st.markdown("---")
                 st.subheader(f"📊 {metrica}")
                 
-                if degradados.get(metrica):
-                    df_tabla = pd.DataFrame(degradados[metrica])
-                    
-                    # Función para resaltar filas
-                    def resaltar_fila(row):
-                        return ['background-color: ' + colores_tablas[metrica]] * len(row)
+                if metrica in degradados:
+                    df_tabla = degradados[metrica]
                     
-                    df_tabla_styled = df_tabla.style.apply(resaltar_fila, axis=1)
+                    # Resaltar todas las filas con el color de la métrica
+                    df_tabla_styled = df_tabla.style.set_properties(**{'background-color': colores_tablas[metrica]})
                     st.dataframe(df_tabla_styled, use_container_width=True, hide_index=True)
                     
                     # Mostrar métrica resumen
@@ -1260,150 +656,21 @@ st.markdown("---")
 st.title("📈 Tendencia de cumplimiento por célula y mes")
 
 if not df_historico.empty and 'Mes' in df_historico.columns:
-    # Asegurar formato de fecha consistente
-    df_historico['Mes'] = pd.to_datetime(df_historico['Mes'], errors='coerce')
-    df_historico = df_historico.dropna(subset=['Mes'])
-    
-    # Aplicar filtros históricos según configuración de métricas
-    nombres_tendencias = {
-        # 'security_rating': 'Seguridad',  # COMENTADO: No se necesita
-        'reliability_rating': 'Confiabilidad',
-        'sqale_rating': 'Mantenibilidad',
-        'coverage': 'Cobertura',
-        'complexity': 'Complejidad'
-    }
-
-    for metrica in metricas_seleccionadas:
-        # Para complexity, usar duplicated_lines_density
-        if metrica == 'complexity':
-            if 'duplicated_lines_density' not in df_historico.columns:
-                continue
-            col_metrica = 'duplicated_lines_density'
-        else:
-            if metrica not in df_historico.columns:
-                continue
-            col_metrica = metrica
-
-        # Mapear nombres de métricas a nombres de configuración
-        if metrica == 'coverage':
-            usar_seleccionados = config_metricas.get("cobertura_usar_seleccionados", False)
-        elif metrica == 'complexity':
-            usar_seleccionados = config_metricas.get("complejidad_usar_seleccionados", False)
-        else:
-            usar_seleccionados = config_metricas.get(f"{metrica.split('_')[0]}_usar_seleccionados", False)
-
-        # Información de depuración desactivada
-        # if metrica == 'coverage':
-        #     st.info(f"🔍 **Depuración Cobertura:** Usando proyectos seleccionados: {usar_seleccionados}")
-        #     if usar_seleccionados and celula_seleccionada in seleccion_proyectos:
-        #         proyectos_celula = seleccion_proyectos[celula_seleccionada]
-        #         if proyectos_celula:
-        #             st.info(f"📋 **Proyectos seleccionados para cobertura en {celula_seleccionada}:** {', '.join(proyectos_celula[:5])}{'...' if len(proyectos_celula) > 5 else ''}")
-
-        cumplimiento_por_mes = []
-
-        # Procesar cada mes disponible
-        for mes_fecha in sorted(df_historico['Mes'].dt.to_period('M').unique()):
-            df_mes = df_historico[df_historico['Mes'].dt.to_period('M') == mes_fecha]
-            df_filtrado = filtrar_datos_por_metrica(df_mes, celula_seleccionada, seleccion_proyectos, usar_seleccionados)
-
-            if df_filtrado.empty:
-                continue
-
-            # Aplicar configuración de componentes N/A
-            config_na_key = f"incluir_na_{metrica.split('_')[0]}"
-            if metrica == 'complexity':
-                config_na_key = "incluir_na_complejidad"
-            elif metrica == 'coverage':
-                config_na_key = "incluir_na_cobertura"
-            
-            incluir_na = config_na.get(config_na_key, False)
-            
-            if incluir_na:
-                # Incluir todos los proyectos, considerando N/A como "no cumplen"
-                if metrica == 'coverage':
-                    df_filtrado = df_filtrado[~df_filtrado['NombreProyecto'].isin(proyectos_excluir_coverage)]
-                    if df_filtrado.empty:
-                        continue
-                    df_filtrado['cumple'] = df_filtrado['coverage'] >= cobertura_min
-                    df_filtrado['cumple'] = df_filtrado['cumple'].fillna(False)
-                    valor = df_filtrado['cumple'].mean() * 100
-                elif metrica == 'complexity':
-                    df_filtrado['cumple'] = df_filtrado['duplicated_lines_density'].isin(umbral_complejidad)
-                    df_filtrado['cumple'] = df_filtrado['cumple'].fillna(False)
-                    valor = df_filtrado['cumple'].mean() * 100
-                elif metrica == 'reliability_rating':
-                    df_filtrado['cumple'] = df_filtrado['reliability_rating'].isin(umbral_confiabilidad)
-                    df_filtrado['cumple'] = df_filtrado['cumple'].fillna(False)
-                    valor = df_filtrado['cumple'].mean() * 100
-                elif metrica == 'sqale_rating':
-                    df_filtrado['cumple'] = df_filtrado['sqale_rating'].isin(umbral_mantenibilidad)
-                    df_filtrado['cumple'] = df_filtrado['cumple'].fillna(False)
-                    valor = df_filtrado['cumple'].mean() * 100
-            else:
-                # Excluir proyectos con métricas vacías (comportamiento original)
-                df_filtrado = df_filtrado.dropna(subset=[col_metrica])
-                if df_filtrado.empty:
-                    continue
-
-                if metrica == 'coverage':
-                    # Para tendencias usar configuración filtrada (NO todos los proyectos)
-                    df_filtrado = df_filtrado[~df_filtrado['NombreProyecto'].isin(proyectos_excluir_coverage)]
-                    if df_filtrado.empty:
-                        continue
-                    valor = (df_filtrado['coverage'] >= cobertura_min).mean() * 100
-
-                elif metrica == 'complexity':
-                    valor = df_filtrado['duplicated_lines_density'].isin(umbral_complejidad).mean() * 100
-
-                elif metrica == 'reliability_rating':
-                    valor = df_filtrado['reliability_rating'].isin(umbral_confiabilidad).mean() * 100
-
-                elif metrica == 'sqale_rating':
-                    valor = df_filtrado['sqale_rating'].isin(umbral_mantenibilidad).mean() * 100
-
-            # Calcular cumplimiento OKR para tendencias
-            # Obtener meta configurada para la métrica
-            if metrica == 'coverage':
-                meta_key = "meta_cobertura"
-            elif metrica == 'complexity':
-                meta_key = "meta_complejidad"
-            elif metrica == 'reliability_rating':
-                meta_key = "meta_confiabilidad"
-            elif metrica == 'sqale_rating':
-                meta_key = "meta_mantenibilidad"
-            else:
-                meta_key = "meta_seguridad"
-            
-            meta_configurada = metas.get(meta_key, 90)
-            
-            # Calcular componentes objetivo según meta
-            total_proyectos = len(df_filtrado)
-            componentes_objetivo = redondear_hacia_arriba(total_proyectos * (meta_configurada / 100))
-            
-            # Calcular cumplimiento OKR (porcentaje respecto a la meta)
-            if componentes_objetivo > 0:
-                cumplimiento_okr = (valor / 100 * total_proyectos / componentes_objetivo) * 100
-            else:
-                cumplimiento_okr = 100 if valor == 0 else 0
-            
-            # APLICAR REDONDEO A TENDENCIAS OKR
-            cumplimiento_okr = redondear_hacia_arriba(cumplimiento_okr)
+    # OKR mensual de la célula (el mismo de resumen anual); un mes sin componentes evaluables
+    # de la métrica no se grafica
+    df_okr_celula = okr_de_celula(df_historico, celula_seleccionada, config)
 
-            cumplimiento_por_mes.append({
-                'Mes': mes_fecha.to_timestamp(),
-                'Cumplimiento OKR (%)': cumplimiento_okr
-            })
+    for m in metricas_mostradas:
+        df_trend = df_okr_celula[(df_okr_celula['Métrica'] == m.nombre) & (df_okr_celula['Total'] > 0)]
 
-        if cumplimiento_por_mes:
-            df_trend = pd.DataFrame(cumplimiento_por_mes)
-            df_trend.sort_values(by='Mes', inplace=True)
+        if not df_trend.empty:
+            df_trend = df_trend[['Mes', 'OKR (%)']].rename(columns={'OKR (%)': 'Cumplimiento OKR (%)'})
 
             fig_trend = px.line(
                 df_trend,
                 x='Mes',
                 y='Cumplimiento OKR (%)',
-                title=f"Tendencia histórica de cumplimiento OKR - {nombres_tendencias.get(metrica, metrica)}",
+                title=f"Tendencia histórica de cumplimiento OKR - {m.nombre}",
                 markers=True
             )
 
@@ -1419,6 +686,6 @@ if not df_historico.empty and 'Mes' in df_historico.columns:
             fig_trend.update_layout(yaxis=dict(range=[0, 100]))
             st.plotly_chart(fig_trend, use_container_width=True)
         else:
-            st.info(f"No hay datos históricos suficientes para mostrar tendencia de **{nombres_tendencias.get(metrica, metrica)}**.")
+            st.info(f"No hay datos históricos suficientes para mostrar tendencia de **{m.nombre}**.")
 else:
     st.info("No hay datos históricos disponibles.")
@@ -1,5 +1,4 @@
 import os
-import glob
 import re
 
 import pandas as pd
@@ -7,13 +6,14 @@ import streamlit as st
 from openpyxl import load_workbook
 
 from auth_utils import requiere_admin
+from cache_utils import compartido_por_archivo, obtener_compartido
+from catalogo_utils import catalogo_meses, invalidar_catalogo
 
 st.set_page_config(layout="wide", page_title="Editar datos de componentes")
 
 # Solo administradores pueden editar datos
 requiere_admin()
 
-UPLOAD_DIR = "uploads"
 ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
 
 # Columnas de métricas que se pueden editar
@@ -34,23 +34,6 @@ st.caption(
 
 # ---------------------- Utilidades de archivos ----------------------
 
-def mes_de_archivo(path):
-    """Extrae 'YYYY-MM' del nombre metricas_YYYY-MM.xlsx."""
-    m = re.search(r"metricas_(\d{4}-\d{2})\.xlsx$", os.path.basename(path))
-    return m.group(1) if m else None
-
-
-def archivos_por_mes():
-    """Devuelve un dict {mes: ruta} ordenado por mes."""
-    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-    mapa = {}
-    for a in archivos:
-        mes = mes_de_archivo(a)
-        if mes:
-            mapa[mes] = a
-    return dict(sorted(mapa.items()))
-
-
 def leer_headers(ws):
     """Devuelve {nombre_columna: indice_1based} usando la primera fila."""
     headers = {}
@@ -88,17 +71,17 @@ def convertir_valor(valor_str):
         return s
 
 
-@st.cache_data
-def cargar_dataframe(path, _mtime):
+@compartido_por_archivo
+def cargar_dataframe(path):
     """Carga un archivo mensual como DataFrame (para mostrar/seleccionar).
-    _mtime fuerza recarga cuando el archivo cambia."""
+    Compartido entre sesiones; se recarga cuando cambia el mtime del archivo."""
     df = pd.read_excel(path)
     df.columns = df.columns.str.strip()
     return df
 
 
 def cargar_mes(path):
-    return cargar_dataframe(path, os.path.getmtime(path))
+    return cargar_dataframe(path)
 
 
 def filas_de_proyecto(ws, headers, nombre_proyecto, celula=None):
@@ -119,7 +102,8 @@ def filas_de_proyecto(ws, headers, nombre_proyecto, celula=None):
     return filas
 
 
-mapa_archivos = archivos_por_mes()
+catalogo = catalogo_meses()
+mapa_archivos = catalogo.archivos
 
 if not mapa_archivos:
     st.warning("⚠️ No se encontró ningún archivo de métricas en la carpeta 'uploads'.")
@@ -205,7 +189,7 @@ with tab_metricas:
                         if col in headers:
                             ws.cell(row=r, column=headers[col]).value = convertir_valor(valor)
                 wb.save(path_mes)
-                st.cache_data.clear()
+                invalidar_catalogo()
                 st.success(
                     f"✅ Métricas actualizadas para '{proyecto_sel}' en {mes_sel} "
                     f"({len(filas)} fila(s))."
@@ -224,8 +208,7 @@ with tab_celula:
     )
 
     # Índice global de proyecto -> meses en los que aparece y su célula
-    @st.cache_data
-    def indice_global(firmas):
+    def indice_global():
         registros = []
         for mes, path in mapa_archivos.items():
             df = cargar_mes(path)
@@ -239,8 +222,9 @@ with tab_celula:
                 })
         return pd.DataFrame(registros)
 
-    firmas = tuple((m, os.path.getmtime(p)) for m, p in mapa_archivos.items())
-    df_global = indice_global(firmas)
+    firmas = tuple(catalogo.versiones.items())
+    # Una sola versión compartida: cada edición (nuevos mtimes) reemplaza a la anterior
+    df_global = obtener_compartido("indice_global", indice_global, firmas, "editar_datos.py:indice_global")
 
     todos_proyectos = sorted(df_global["NombreProyecto"].unique())
     proyecto_cel = st.selectbox(
@@ -335,7 +319,8 @@ with tab_celula:
                         df_sel.to_csv(ARCHIVO_SELECCION, index=False)
                         sel_msg = " Selección de proyectos actualizada."
 
-                st.cache_data.clear()
+                if meses_editados:
+                    invalidar_catalogo()
                 if total_filas:
                     st.success(
                         f"✅ Célula de '{proyecto_cel}' cambiada a '{nueva_celula}' "
@@ -0,0 +1,54 @@
+import pandas as pd
+import streamlit as st
+
+from auth_utils import requiere_admin
+from cache_utils import PRESUPUESTO_BYTES, estadisticas_caches, limpiar_caches
+from memo_utils import estadisticas_memo, recortar_memo
+
+st.set_page_config(layout="wide", page_title="Estado de cachés")
+
+# Solo administradores
+requiere_admin()
+
+st.title("🧮 Estado de cachés")
+st.caption(
+    "Cachés en memoria de este proceso de Streamlit (compartidas por todas sus sesiones) "
+    "y memo en disco compartido por todos los procesos. Los contadores se reinician con el proceso."
+)
+
+
+def megabytes(valor):
+    return None if pd.isna(valor) else round(valor / (1024 * 1024), 2)
+
+
+df_memoria = estadisticas_caches()
+total_bytes = int(df_memoria["Bytes"].sum()) if not df_memoria.empty else 0
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Cachés en memoria", len(df_memoria))
+col2.metric("Memoria usada (MB)", megabytes(total_bytes))
+col3.metric("Presupuesto (MB)", megabytes(PRESUPUESTO_BYTES), f"{100 * total_bytes / PRESUPUESTO_BYTES:.1f}% usado",
+            delta_color="off")
+
+st.subheader("En memoria")
+if df_memoria.empty:
+    st.info("Todavía no se cargó nada en este proceso.")
+else:
+    tabla = df_memoria.copy()
+    tabla["MB"] = tabla["Bytes"].map(megabytes)
+    tabla["Máx. MB"] = tabla["Máx. bytes"].map(megabytes)
+    st.dataframe(tabla.drop(columns=["Bytes", "Máx. bytes"]), use_container_width=True, hide_index=True)
+
+st.subheader("Memo en disco")
+memo = pd.DataFrame([estadisticas_memo()])
+memo["MB"] = memo["Bytes"].map(megabytes)
+memo["Máx. MB"] = memo["Máx. bytes"].map(megabytes)
+st.dataframe(memo.drop(columns=["Bytes", "Máx. bytes"]), use_container_width=True, hide_index=True)
+
+st.markdown("---")
+col_a, col_b = st.columns(2)
+if col_a.button("🧹 Vaciar cachés en memoria"):
+    limpiar_caches()
+    st.rerun()
+if col_b.button("✂️ Recortar memo en disco al límite"):
+    st.success(f"{recortar_memo()} entradas eliminadas del memo en disco.")
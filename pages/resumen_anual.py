@@ -1,166 +1,39 @@
 import streamlit as st
 import pandas as pd
 import os
-import glob
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
 import math
 
 from auth_utils import (
+    celulas_a_cargar,
     es_usuario,
     filtrar_celulas_permitidas,
     mostrar_navegacion_usuario,
     requiere_admin_o_usuario,
 )
+from bugs_utils import top_variaciones
+from calculos_utils import configuracion, okr_de_celula, variacion_bugs_de
+from estilos_utils import (
+    ESTILO_ALERTA,
+    ESTILO_CUMPLE,
+    ESTILO_NO_CUMPLE,
+    estilo_por_umbral,
+    estilos_columnas,
+    estilos_filas,
+    porcentaje_desde_texto,
+)
+from historico_utils import historico_archivos
+from importacion_utils import importar_perezoso
+from okr_utils import VENTANAS_OKR
+
+# plotly se importa al dibujar el primer gráfico, no al abrir la página
+px = importar_perezoso("plotly.express")
+go = importar_perezoso("plotly.graph_objects")
 
 st.set_page_config(layout="wide", page_title="Resumen Anual - Dashboard SonarQube")
 
 requiere_admin_o_usuario()
 mostrar_navegacion_usuario()
 
-ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
-ARCHIVO_PARAMETROS = "data/parametros_metricas.csv"
-ARCHIVO_METAS = "data/metas_progreso.csv"
-ARCHIVO_CONFIGURACION_METRICAS = "data/configuracion_metricas.csv"
-ARCHIVO_CONFIGURACION_NA = "data/configuracion_na.csv"
-UPLOAD_DIR = "uploads"
-
-def redondear_hacia_arriba(valor):
-    """Redondear hacia arriba cuando el decimal es .5 o mayor"""
-    if pd.isna(valor):
-        return valor
-    return int(valor + 0.5)
-
-@st.cache_data
-def cargar_datos(path):
-    df = pd.read_excel(path)
-    df.columns = df.columns.str.strip()
-    
-    # NO usar fillna(0) para mantener valores NaN
-    df['coverage'] = pd.to_numeric(df['coverage'], errors='coerce')
-
-    # Complexity es un rating (A, B, C, D, E), no un porcentaje - CORREGIR para usar duplicated_lines_density
-    if 'duplicated_lines_density' in df.columns:
-        df['complexity'] = df['duplicated_lines_density'].astype(str).str.strip().str.upper()
-        # Convertir valores inválidos a NaN en lugar de N/A
-        valid_ratings = ['A', 'B', 'C', 'D', 'E']
-        df['complexity'] = df['complexity'].apply(lambda x: x if x in valid_ratings else None)
-    elif 'complexity' in df.columns:
-        df['complexity'] = df['complexity'].astype(str).str.strip().str.upper()
-        valid_ratings = ['A', 'B', 'C', 'D', 'E']
-        df['complexity'] = df['complexity'].apply(lambda x: x if x in valid_ratings else None)
-    else:
-        df['complexity'] = None
-
-    bug_cols = ['bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
-    for col in bug_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-    return df
-
-def cargar_todos_los_datos():
-    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-    dfs = []
-    for archivo in archivos:
-        df_temp = cargar_datos(archivo)
-        mes = os.path.basename(archivo).split("_")[1].replace(".xlsx", "")
-        df_temp['Mes'] = pd.to_datetime(mes, format="%Y-%m")
-        dfs.append(df_temp)
-    return pd.concat(dfs) if dfs else pd.DataFrame()
-
-def cargar_seleccion():
-    if os.path.exists(ARCHIVO_SELECCION):
-        df_sel = pd.read_csv(ARCHIVO_SELECCION)
-        seleccion = {}
-        for celula in df_sel['Celula'].unique():
-            seleccion[celula] = df_sel[df_sel['Celula'] == celula]['NombreProyecto'].tolist()
-        return seleccion
-    return {}
-
-def cargar_parametros():
-    if os.path.exists(ARCHIVO_PARAMETROS):
-        df_param = pd.read_csv(ARCHIVO_PARAMETROS)
-        if not df_param.empty:
-            fila = df_param.iloc[0]
-            return {
-                "security_rating": fila.get("security_rating", "A,B,C,D,E"),
-                "reliability_rating": fila.get("reliability_rating", "A,B,C,D,E"),
-                "sqale_rating": fila.get("sqale_rating", "A,B,C,D,E"),
-                "duplicated_lines_density": fila.get("duplicated_lines_density", "A,B,C,D,E"),
-                "coverage_min": float(fila.get("coverage_min", 0))
-            }
-    return {
-        "security_rating": "A,B,C,D,E",
-        "reliability_rating": "A,B,C,D,E",
-        "sqale_rating": "A,B,C,D,E",
-        "duplicated_lines_density": "A,B,C,D,E",
-        "coverage_min": 0
-    }
-
-def cargar_configuracion_metricas():
-    """Cargar configuración de métricas (si usar proyectos seleccionados o todos)"""
-    if os.path.exists(ARCHIVO_CONFIGURACION_METRICAS):
-        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_METRICAS)
-        if not df_config.empty:
-            fila = df_config.iloc[0]
-            return {
-                "seguridad_usar_seleccionados": fila.get("seguridad_usar_seleccionados", False),
-                "confiabilidad_usar_seleccionados": fila.get("confiabilidad_usar_seleccionados", False),
-                "mantenibilidad_usar_seleccionados": fila.get("mantenibilidad_usar_seleccionados", False),
-                "cobertura_usar_seleccionados": fila.get("cobertura_usar_seleccionados", True),
-                "complejidad_usar_seleccionados": fila.get("complejidad_usar_seleccionados", False)
-            }
-    return {
-        "seguridad_usar_seleccionados": False,
-        "confiabilidad_usar_seleccionados": False,
-        "mantenibilidad_usar_seleccionados": False,
-        "cobertura_usar_seleccionados": True,
-        "complejidad_usar_seleccionados": False
-    }
-
-def cargar_configuracion_na():
-    """Cargar configuración de componentes N/A (si incluirlos o excluirlos del cálculo)"""
-    if os.path.exists(ARCHIVO_CONFIGURACION_NA):
-        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_NA)
-        if not df_config.empty:
-            fila = df_config.iloc[0]
-            return {
-                "incluir_na_seguridad": fila.get("incluir_na_seguridad", False),
-                "incluir_na_confiabilidad": fila.get("incluir_na_confiabilidad", False),
-                "incluir_na_mantenibilidad": fila.get("incluir_na_mantenibilidad", False),
-                "incluir_na_cobertura": fila.get("incluir_na_cobertura", False),
-                "incluir_na_complejidad": fila.get("incluir_na_complejidad", False)
-            }
-    return {
-        "incluir_na_seguridad": False,
-        "incluir_na_confiabilidad": False,
-        "incluir_na_mantenibilidad": False,
-        "incluir_na_cobertura": False,
-        "incluir_na_complejidad": False
-    }
-
-def cargar_metas():
-    """Cargar metas de progreso desde archivo CSV"""
-    if os.path.exists(ARCHIVO_METAS):
-        df_metas = pd.read_csv(ARCHIVO_METAS)
-        if not df_metas.empty:
-            fila = df_metas.iloc[0]
-            return {
-                "meta_seguridad": float(fila.get("meta_seguridad", 90)),
-                "meta_confiabilidad": float(fila.get("meta_confiabilidad", 90)),
-                "meta_mantenibilidad": float(fila.get("meta_mantenibilidad", 90)),
-                "meta_cobertura": float(fila.get("meta_cobertura", 50)),
-                "meta_complejidad": float(fila.get("meta_complejidad", 90))
-            }
-    return {
-        "meta_seguridad": 90.0,
-        "meta_confiabilidad": 90.0,
-        "meta_mantenibilidad": 90.0,
-        "meta_cobertura": 50.0,
-        "meta_complejidad": 90.0
-    }
-
 def filtrar_datos_por_metrica(df, celula, proyectos_seleccionados, usar_seleccionados):
     """Filtrar datos según configuración de métrica específica"""
     if usar_seleccionados and celula in proyectos_seleccionados and proyectos_seleccionados[celula]:
@@ -195,46 +68,30 @@ def calcular_bugs_mensual(df_historico, celula_seleccionada):
     
     return bugs_por_mes
 
-def calcular_variacion_bugs(df_historico, celula_seleccionada):
+def calcular_variacion_bugs(df_historico, celula_seleccionada, celulas_cargadas=None):
     """Calcular todas las aplicaciones con variación de bugs en el último mes"""
-    df_celula = df_historico[df_historico['Celula'] == celula_seleccionada].copy()
-    
-    if df_celula.empty:
-        return pd.DataFrame(), pd.DataFrame(), {}
-    
-    # Calcular total de bugs por aplicación y mes (asegurar enteros)
-    df_celula['Total_Bugs'] = (
-        df_celula['bugs_blocker'].astype(int) + 
-        df_celula['bugs_critical'].astype(int) + 
-        df_celula['bugs_major'].astype(int) + 
-        df_celula['bugs_minor'].astype(int)
-    )
-    
-    # Ordenar por proyecto y mes
-    df_celula = df_celula.sort_values(['NombreProyecto', 'Mes'])
-    
-    # Calcular diferencia de bugs mes a mes por proyecto
-    df_celula['Bugs_Mes_Anterior'] = df_celula.groupby('NombreProyecto')['Total_Bugs'].shift(1)
-    df_celula['Variacion_Bugs'] = df_celula['Total_Bugs'] - df_celula['Bugs_Mes_Anterior']
-    
-    # Filtrar solo registros con mes anterior (excluir primer mes de cada proyecto)
-    df_variacion = df_celula[df_celula['Bugs_Mes_Anterior'].notna()].copy()
+    # Variación de todo el portafolio en una pasada; aquí solo se toma la célula
+    df_variacion = variacion_bugs_de(df_historico, celulas_cargadas)
+    df_variacion = df_variacion[df_variacion['Celula'] == celula_seleccionada]
     
     if df_variacion.empty:
-        return pd.DataFrame(), pd.DataFrame(), {'sin_datos': True}
+        if (df_historico['Celula'] == celula_seleccionada).any():
+            return pd.DataFrame(), pd.DataFrame(), {'sin_datos': True}
+        return pd.DataFrame(), pd.DataFrame(), {}
     
     # Obtener el último mes disponible
     ultimo_mes = df_variacion['Mes'].max()
-    penultimo_mes = df_variacion[df_variacion['Mes'] < ultimo_mes]['Mes'].max() if len(df_variacion[df_variacion['Mes'] < ultimo_mes]) > 0 else None
+    meses_previos = df_variacion.loc[df_variacion['Mes'] < ultimo_mes, 'Mes']
+    penultimo_mes = meses_previos.max() if not meses_previos.empty else None
     
-    df_ultimo_mes = df_variacion[df_variacion['Mes'] == ultimo_mes].copy()
+    df_ultimo_mes = df_variacion[df_variacion['Mes'] == ultimo_mes]
     
     # Estadísticas generales
     estadisticas = {
         'total_aplicaciones': len(df_ultimo_mes),
-        'aplicaciones_incrementaron': len(df_ultimo_mes[df_ultimo_mes['Variacion_Bugs'] > 0]),
-        'aplicaciones_redujeron': len(df_ultimo_mes[df_ultimo_mes['Variacion_Bugs'] < 0]),
-        'aplicaciones_sin_cambio': len(df_ultimo_mes[df_ultimo_mes['Variacion_Bugs'] == 0]),
+        'aplicaciones_incrementaron': int((df_ultimo_mes['Variacion_Bugs'] > 0).sum()),
+        'aplicaciones_redujeron': int((df_ultimo_mes['Variacion_Bugs'] < 0).sum()),
+        'aplicaciones_sin_cambio': int((df_ultimo_mes['Variacion_Bugs'] == 0).sum()),
         'total_bugs_actuales': int(df_ultimo_mes['Total_Bugs'].sum()),
         'total_bugs_anteriores': int(df_ultimo_mes['Bugs_Mes_Anterior'].sum()),
         'variacion_total': int(df_ultimo_mes['Variacion_Bugs'].sum()),
@@ -242,205 +99,42 @@ def calcular_variacion_bugs(df_historico, celula_seleccionada):
         'mes_anterior': penultimo_mes.strftime('%Y-%m') if penultimo_mes else 'N/A'
     }
     
-    # Todos los incrementos (ordenados por mayor variación)
-    incrementos = df_ultimo_mes[df_ultimo_mes['Variacion_Bugs'] > 0].copy()
-    if not incrementos.empty:
-        todos_incrementos = incrementos.nlargest(len(incrementos), 'Variacion_Bugs')[
-            ['NombreProyecto', 'Total_Bugs', 'Bugs_Mes_Anterior', 'Variacion_Bugs', 'Mes',
-             'bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
-        ].copy()
-        todos_incrementos['Mes_Formateado'] = todos_incrementos['Mes'].dt.strftime('%Y-%m')
-        # Asegurar que todos los valores son enteros
-        todos_incrementos['Total_Bugs'] = todos_incrementos['Total_Bugs'].astype(int)
-        todos_incrementos['Bugs_Mes_Anterior'] = todos_incrementos['Bugs_Mes_Anterior'].astype(int)
-        todos_incrementos['Variacion_Bugs'] = todos_incrementos['Variacion_Bugs'].astype(int)
-        todos_incrementos['bugs_blocker'] = todos_incrementos['bugs_blocker'].astype(int)
-        todos_incrementos['bugs_critical'] = todos_incrementos['bugs_critical'].astype(int)
-        todos_incrementos['bugs_major'] = todos_incrementos['bugs_major'].astype(int)
-        todos_incrementos['bugs_minor'] = todos_incrementos['bugs_minor'].astype(int)
-    else:
-        todos_incrementos = pd.DataFrame()
-    
-    # Todos los decrementos (ordenados por menor variación, es decir, mayor reducción primero)
-    decrementos = df_ultimo_mes[df_ultimo_mes['Variacion_Bugs'] < 0].copy()
-    if not decrementos.empty:
-        todos_decrementos = decrementos.nsmallest(len(decrementos), 'Variacion_Bugs')[
-            ['NombreProyecto', 'Total_Bugs', 'Bugs_Mes_Anterior', 'Variacion_Bugs', 'Mes',
-             'bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
-        ].copy()
-        todos_decrementos['Mes_Formateado'] = todos_decrementos['Mes'].dt.strftime('%Y-%m')
-        # Asegurar que todos los valores son enteros
-        todos_decrementos['Total_Bugs'] = todos_decrementos['Total_Bugs'].astype(int)
-        todos_decrementos['Bugs_Mes_Anterior'] = todos_decrementos['Bugs_Mes_Anterior'].astype(int)
-        todos_decrementos['Variacion_Bugs'] = todos_decrementos['Variacion_Bugs'].astype(int)
-        todos_decrementos['bugs_blocker'] = todos_decrementos['bugs_blocker'].astype(int)
-        todos_decrementos['bugs_critical'] = todos_decrementos['bugs_critical'].astype(int)
-        todos_decrementos['bugs_major'] = todos_decrementos['bugs_major'].astype(int)
-        todos_decrementos['bugs_minor'] = todos_decrementos['bugs_minor'].astype(int)
-    else:
-        todos_decrementos = pd.DataFrame()
+    columnas = ['NombreProyecto', 'Total_Bugs', 'Bugs_Mes_Anterior', 'Variacion_Bugs', 'Mes',
+                'bugs_blocker', 'bugs_critical', 'bugs_major', 'bugs_minor']
     
-    return todos_incrementos, todos_decrementos, estadisticas
+    # Todos los incrementos (mayor variación primero) y decrementos (mayor reducción primero)
+    resultados = []
+    for incremento in (True, False):
+        filas = top_variaciones(df_ultimo_mes, incremento=incremento)
+        if filas.empty:
+            resultados.append(pd.DataFrame())
+        else:
+            filas = filas[columnas].copy()
+            filas['Mes_Formateado'] = filas['Mes'].dt.strftime('%Y-%m')
+            resultados.append(filas)
+    
+    return resultados[0], resultados[1], estadisticas
 
-def calcular_okr_anual(df_historico, celula_seleccionada, proyectos_seleccionados, config_metricas, config_na, metas, parametros, proyectos_excluir_coverage):
+def calcular_okr_anual(df_historico, celula_seleccionada, config):
     """Calcular OKR anual para una célula específica"""
     
-    # Proyectos a excluir para coverage
-    proyectos_excluir_coverage = [
-        "AEL.DebidaDiligencia.FrontEnd:Quality",
-        "AEL.NominaElectronica.FrontEnd:Quality"
-    ]
-    
-    # Filtrar datos de la célula seleccionada
-    df_celula_historico = df_historico[df_historico['Celula'] == celula_seleccionada].copy()
+    if not (df_historico['Celula'] == celula_seleccionada).any():
+        return pd.DataFrame(), []
     
-    if df_celula_historico.empty:
-        return []
+    # Numeradores y objetivos de todos los meses y métricas en una sola pasada
+    df_okr = okr_de_celula(df_historico, celula_seleccionada, config)
     
-    # Aplicar parámetros
-    umbral_seguridad = parametros["security_rating"].split(",")
-    umbral_confiabilidad = parametros["reliability_rating"].split(",")
-    umbral_mantenibilidad = parametros["sqale_rating"].split(",")
-    umbral_complejidad = parametros["duplicated_lines_density"].split(",")
-    cobertura_min = parametros["coverage_min"]
+    okr_por_mes = df_okr.pivot(index='Mes', columns='Métrica', values='OKR (%)')
+    okr_por_mes.columns = [f"{metrica} OKR (%)" for metrica in okr_por_mes.columns]
+    okr_mensual_celula = okr_por_mes.reset_index().to_dict('records')
     
-    # Calcular OKR por mes
-    okr_mensual = []
-    
-    for mes in sorted(df_celula_historico['Mes'].dt.to_period('M').unique()):
-        df_mes = df_celula_historico[df_celula_historico['Mes'].dt.to_period('M') == mes].copy()
-        
-        # Filtrar datos según configuración para cada métrica
-        df_seguridad = filtrar_datos_por_metrica(df_mes, celula_seleccionada, proyectos_seleccionados, config_metricas["seguridad_usar_seleccionados"])
-        df_confiabilidad = filtrar_datos_por_metrica(df_mes, celula_seleccionada, proyectos_seleccionados, config_metricas["confiabilidad_usar_seleccionados"])
-        df_mantenibilidad = filtrar_datos_por_metrica(df_mes, celula_seleccionada, proyectos_seleccionados, config_metricas["mantenibilidad_usar_seleccionados"])
-        df_cobertura = filtrar_datos_por_metrica(df_mes, celula_seleccionada, proyectos_seleccionados, config_metricas["cobertura_usar_seleccionados"])
-        df_complejidad = filtrar_datos_por_metrica(df_mes, celula_seleccionada, proyectos_seleccionados, config_metricas["complejidad_usar_seleccionados"])
-        
-        # Calcular OKR para cada métrica
-        okr_mes = {'Mes': mes.to_timestamp()}
-        
-        # Confiabilidad
-        if not df_confiabilidad.empty:
-            if config_na.get("incluir_na_confiabilidad", False):
-                df_confiabilidad_calc = df_confiabilidad.copy()
-                df_confiabilidad_calc['cumple'] = df_confiabilidad_calc['reliability_rating'].isin(umbral_confiabilidad)
-                df_confiabilidad_calc['cumple'] = df_confiabilidad_calc['cumple'].fillna(False)
-            else:
-                df_confiabilidad_calc = df_confiabilidad.dropna(subset=['reliability_rating'])
-                df_confiabilidad_calc['cumple'] = df_confiabilidad_calc['reliability_rating'].isin(umbral_confiabilidad)
-            
-            if not df_confiabilidad_calc.empty:
-                total = len(df_confiabilidad_calc)
-                cumplen = len(df_confiabilidad_calc[df_confiabilidad_calc['cumple']])
-                meta_configurada = metas.get("meta_confiabilidad", 90)
-                componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-                
-                if componentes_objetivo > 0:
-                    cumplimiento_okr = (cumplen / componentes_objetivo) * 100
-                else:
-                    cumplimiento_okr = 100 if cumplen == 0 else 0
-                
-                okr_mes['Confiabilidad OKR (%)'] = redondear_hacia_arriba(cumplimiento_okr)
-            else:
-                okr_mes['Confiabilidad OKR (%)'] = 0
-        else:
-            okr_mes['Confiabilidad OKR (%)'] = 0
-        
-        # Mantenibilidad
-        if not df_mantenibilidad.empty:
-            if config_na.get("incluir_na_mantenibilidad", False):
-                df_mantenibilidad_calc = df_mantenibilidad.copy()
-                df_mantenibilidad_calc['cumple'] = df_mantenibilidad_calc['sqale_rating'].isin(umbral_mantenibilidad)
-                df_mantenibilidad_calc['cumple'] = df_mantenibilidad_calc['cumple'].fillna(False)
-            else:
-                df_mantenibilidad_calc = df_mantenibilidad.dropna(subset=['sqale_rating'])
-                df_mantenibilidad_calc['cumple'] = df_mantenibilidad_calc['sqale_rating'].isin(umbral_mantenibilidad)
-            
-            if not df_mantenibilidad_calc.empty:
-                total = len(df_mantenibilidad_calc)
-                cumplen = len(df_mantenibilidad_calc[df_mantenibilidad_calc['cumple']])
-                meta_configurada = metas.get("meta_mantenibilidad", 90)
-                componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-                
-                if componentes_objetivo > 0:
-                    cumplimiento_okr = (cumplen / componentes_objetivo) * 100
-                else:
-                    cumplimiento_okr = 100 if cumplen == 0 else 0
-                
-                okr_mes['Mantenibilidad OKR (%)'] = redondear_hacia_arriba(cumplimiento_okr)
-            else:
-                okr_mes['Mantenibilidad OKR (%)'] = 0
-        else:
-            okr_mes['Mantenibilidad OKR (%)'] = 0
-        
-        # Complejidad
-        if not df_complejidad.empty:
-            if config_na.get("incluir_na_complejidad", False):
-                df_complejidad_calc = df_complejidad.copy()
-                df_complejidad_calc['cumple'] = df_complejidad_calc['complexity'].isin(umbral_complejidad)
-                df_complejidad_calc['cumple'] = df_complejidad_calc['cumple'].fillna(False)
-            else:
-                df_complejidad_calc = df_complejidad.dropna(subset=['complexity'])
-                df_complejidad_calc['cumple'] = df_complejidad_calc['complexity'].isin(umbral_complejidad)
-            
-            if not df_complejidad_calc.empty:
-                total = len(df_complejidad_calc)
-                cumplen = len(df_complejidad_calc[df_complejidad_calc['cumple']])
-                meta_configurada = metas.get("meta_complejidad", 90)
-                componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-                
-                if componentes_objetivo > 0:
-                    cumplimiento_okr = (cumplen / componentes_objetivo) * 100
-                else:
-                    cumplimiento_okr = 100 if cumplen == 0 else 0
-                
-                okr_mes['Complejidad OKR (%)'] = redondear_hacia_arriba(cumplimiento_okr)
-            else:
-                okr_mes['Complejidad OKR (%)'] = 0
-        else:
-            okr_mes['Complejidad OKR (%)'] = 0
-        
-        # Cobertura
-        if not df_cobertura.empty:
-            # Excluir proyectos específicos
-            df_cobertura_calc = df_cobertura[~df_cobertura['NombreProyecto'].isin(proyectos_excluir_coverage)]
-            
-            if config_na.get("incluir_na_cobertura", False):
-                df_cobertura_calc['cumple'] = df_cobertura_calc['coverage'] >= cobertura_min
-                df_cobertura_calc['cumple'] = df_cobertura_calc['cumple'].fillna(False)
-            else:
-                df_cobertura_calc = df_cobertura_calc.dropna(subset=['coverage'])
-                df_cobertura_calc['cumple'] = df_cobertura_calc['coverage'] >= cobertura_min
-            
-            if not df_cobertura_calc.empty:
-                total = len(df_cobertura_calc)
-                cumplen = len(df_cobertura_calc[df_cobertura_calc['cumple']])
-                meta_configurada = metas.get("meta_cobertura", 50)
-                componentes_objetivo = redondear_hacia_arriba(total * (meta_configurada / 100))
-                
-                if componentes_objetivo > 0:
-                    cumplimiento_okr = (cumplen / componentes_objetivo) * 100
-                else:
-                    cumplimiento_okr = 100 if cumplen == 0 else 0
-                
-                okr_mes['Cobertura OKR (%)'] = redondear_hacia_arriba(cumplimiento_okr)
-            else:
-                okr_mes['Cobertura OKR (%)'] = 0
-        else:
-            okr_mes['Cobertura OKR (%)'] = 0
-        
-        okr_mensual.append(okr_mes)
-    
-    return okr_mensual
+    return df_okr, okr_mensual_celula
 
-# Cargar datos
-df_historico = cargar_todos_los_datos()
-seleccion_proyectos = cargar_seleccion()
-parametros = cargar_parametros()
-config_metricas = cargar_configuracion_metricas()
-config_na = cargar_configuracion_na()
-metas = cargar_metas()
+# Cargar datos (los usuarios solo las filas de sus células asignadas)
+celulas_usuario = celulas_a_cargar()
+df_historico = historico_archivos(celulas_usuario)
+# Misma configuración que usa precalentar.py para dejar listos los cálculos de la página
+config = configuracion()
 
 st.title("📊 Resumen Anual de OKR por Célula")
 
@@ -469,10 +163,7 @@ else:
 st.markdown("---")
 
 # Calcular OKR anual para la célula seleccionada
-okr_anual = calcular_okr_anual(
-    df_historico, celula_seleccionada, seleccion_proyectos, 
-    config_metricas, config_na, metas, parametros, []
-)
+df_okr_ventanas, okr_anual = calcular_okr_anual(df_historico, celula_seleccionada, config)
 
 if okr_anual:
     # Crear DataFrame
@@ -490,21 +181,16 @@ if okr_anual:
     df_mostrar = df_okr_anual[columnas_mostrar].copy()
     df_mostrar.columns = ['Mes', 'Confiabilidad OKR (%)', 'Mantenibilidad OKR (%)', 'Cobertura OKR (%)', 'Complejidad OKR (%)']
     
-    # Función para resaltar valores según cumplimiento
-    def resaltar_okr(val):
-        if val >= 100:
-            return 'background-color: #d4edda; color: #155724'
-        elif val >= 80:
-            return 'background-color: #fff3cd; color: #856404'
-        else:
-            return 'background-color: #f8d7da; color: #721c24'
+    # Resaltar valores según cumplimiento (>= 100 verde, >= 80 amarillo, resto rojo)
+    def resaltar_okr(df):
+        columnas_okr = ['Confiabilidad OKR (%)', 'Mantenibilidad OKR (%)', 'Cobertura OKR (%)', 'Complejidad OKR (%)']
+        return estilos_columnas(df, {
+            col: estilo_por_umbral(df[col], [100, 80], [ESTILO_CUMPLE, ESTILO_ALERTA, ESTILO_NO_CUMPLE])
+            for col in columnas_okr
+        })
     
     # Aplicar estilo
-    df_styled = df_mostrar.style
-    if hasattr(df_styled, "map"):
-        df_styled = df_styled.map(resaltar_okr, subset=['Confiabilidad OKR (%)', 'Mantenibilidad OKR (%)', 'Cobertura OKR (%)', 'Complejidad OKR (%)'])
-    else:
-        df_styled = df_styled.applymap(resaltar_okr, subset=['Confiabilidad OKR (%)', 'Mantenibilidad OKR (%)', 'Cobertura OKR (%)', 'Complejidad OKR (%)'])
+    df_styled = df_mostrar.style.apply(resaltar_okr, axis=None)
     
     st.dataframe(df_styled, use_container_width=True, hide_index=True)
     
@@ -563,25 +249,47 @@ if okr_anual:
     
     df_resumen = pd.DataFrame(cumplimiento_resumen)
     
-    # Función para resaltar según cumplimiento
-    def resaltar_cumplimiento(val):
-        if isinstance(val, str) and '%' in val:
-            porcentaje = float(val.replace('%', ''))
-            if porcentaje >= 80:
-                return 'background-color: #d4edda; color: #155724'
-            elif porcentaje >= 50:
-                return 'background-color: #fff3cd; color: #856404'
-            else:
-                return 'background-color: #f8d7da; color: #721c24'
-        return ''
+    # Resaltar según cumplimiento (>= 80% verde, >= 50% amarillo, resto rojo)
+    def resaltar_cumplimiento(df):
+        porcentajes = porcentaje_desde_texto(df['% Meses Cumplidos'])
+        estilos = estilo_por_umbral(porcentajes, [80, 50], [ESTILO_CUMPLE, ESTILO_ALERTA, ESTILO_NO_CUMPLE], estilo_nan='')
+        return estilos_columnas(df, {'% Meses Cumplidos': estilos})
     
-    df_resumen_styled = df_resumen.style
-    if hasattr(df_resumen_styled, "map"):
-        df_resumen_styled = df_resumen_styled.map(resaltar_cumplimiento, subset=['% Meses Cumplidos'])
-    else:
-        df_resumen_styled = df_resumen_styled.applymap(resaltar_cumplimiento, subset=['% Meses Cumplidos'])
+    df_resumen_styled = df_resumen.style.apply(resaltar_cumplimiento, axis=None)
     st.dataframe(df_resumen_styled, use_container_width=True, hide_index=True)
 
+    # Ventanas móviles, acumulado del año y variación interanual
+    st.markdown("---")
+    st.subheader("📆 OKR por Ventana de Tiempo")
+    
+    columnas_ventana = [f"OKR {n}M (%)" for n in VENTANAS_OKR] + ['OKR YTD (%)']
+    mes_ventana = st.selectbox(
+        "Mes de referencia",
+        options=df_okr_anual['Mes_Formateado'].tolist()[::-1],
+        key="mes_ventanas_okr"
+    )
+    df_ventanas = df_okr_ventanas[df_okr_ventanas['Mes'].dt.strftime('%Y-%m') == mes_ventana]
+    df_ventanas = df_ventanas[['Métrica', 'OKR (%)'] + columnas_ventana + ['Δ Interanual (pts)']]
+    st.caption(
+        "Las ventanas suman componentes que cumplen y objetivos de los últimos meses con datos "
+        "(N/A hasta completar la ventana); el acumulado parte de enero y la variación interanual "
+        "compara contra el mismo mes del año anterior."
+    )
+    
+    def resaltar_ventanas(df):
+        return estilos_columnas(df, {
+            col: estilo_por_umbral(df[col], [100, 80], [ESTILO_CUMPLE, ESTILO_ALERTA, ESTILO_NO_CUMPLE], estilo_nan='')
+            for col in ['OKR (%)'] + columnas_ventana
+        })
+    
+    formatos = {col: lambda x: f"{x:.0f}" if pd.notna(x) else "N/A" for col in columnas_ventana}
+    formatos['Δ Interanual (pts)'] = lambda x: f"{x:+.0f}" if pd.notna(x) else "N/A"
+    st.dataframe(
+        df_ventanas.style.apply(resaltar_ventanas, axis=None).format(formatos),
+        use_container_width=True,
+        hide_index=True
+    )
+
 else:
     st.warning(f"⚠️ No hay datos suficientes para calcular OKR anual de {celula_seleccionada}.")
 
@@ -685,7 +393,7 @@ if not bugs_mensuales.empty:
     st.markdown("---")
     st.subheader("📊 Aplicaciones con Variación de Bugs")
     
-    incrementos, decrementos, estadisticas = calcular_variacion_bugs(df_historico, celula_seleccionada)
+    incrementos, decrementos, estadisticas = calcular_variacion_bugs(df_historico, celula_seleccionada, celulas_usuario)
     
     if not incrementos.empty or not decrementos.empty:
         col1, col2 = st.columns(2)
@@ -698,12 +406,9 @@ if not bugs_mensuales.empty:
                 inc_mostrar.columns = ['Aplicación', 'Bugs Mes Anterior', 'Bugs Actuales', 'Variación', 'Período']
                 inc_mostrar['Variación'] = inc_mostrar['Variación'].astype(int)
                 
-                # Función para resaltar incrementos
-                def resaltar_incremento(row):
-                    return ['background-color: #f8d7da' if col == 'Variación' else '' for col in row.index]
-                
+                # Resaltar la columna de variación
                 st.dataframe(
-                    inc_mostrar.style.apply(resaltar_incremento, axis=1),
+                    inc_mostrar.style.set_properties(subset=['Variación'], **{'background-color': '#f8d7da'}),
                     use_container_width=True,
                     hide_index=True
                 )
@@ -718,12 +423,9 @@ if not bugs_mensuales.empty:
                 dec_mostrar.columns = ['Aplicación', 'Bugs Mes Anterior', 'Bugs Actuales', 'Variación', 'Período']
                 dec_mostrar['Variación'] = dec_mostrar['Variación'].astype(int)
                 
-                # Función para resaltar decrementos
-                def resaltar_decremento(row):
-                    return ['background-color: #d4edda' if col == 'Variación' else '' for col in row.index]
-                
+                # Resaltar la columna de variación
                 st.dataframe(
-                    dec_mostrar.style.apply(resaltar_decremento, axis=1),
+                    dec_mostrar.style.set_properties(subset=['Variación'], **{'background-color': '#d4edda'}),
                     use_container_width=True,
                     hide_index=True
                 )
@@ -825,18 +527,16 @@ if not bugs_mensuales.empty:
             'Porcentaje': [f"{(v/sum(valores_bugs)*100):.1f}%" if sum(valores_bugs) > 0 else "0%" for v in valores_bugs]
         })
         
-        # Función para colorear filas según tipo
-        def colorear_tipo(row):
-            colores = {
-                'Blocker': 'background-color: #f8d7da',
-                'Critical': 'background-color: #fff3cd',
-                'Major': 'background-color: #fff9e6',
-                'Minor': 'background-color: #d1ecf1'
-            }
-            return [colores.get(row['Tipo'], '')] * len(row)
+        # Colorear filas según tipo
+        colores_tipo = {
+            'Blocker': 'background-color: #f8d7da',
+            'Critical': 'background-color: #fff3cd',
+            'Major': 'background-color: #fff9e6',
+            'Minor': 'background-color: #d1ecf1'
+        }
         
         st.dataframe(
-            detalle_bugs.style.apply(colorear_tipo, axis=1),
+            detalle_bugs.style.apply(lambda df: estilos_filas(df, df['Tipo'].map(colores_tipo).fillna('')), axis=None),
             use_container_width=True,
             hide_index=True
         )
@@ -1,8 +1,15 @@
 import streamlit as st
 import pandas as pd
 import os
-import glob
-from datetime import datetime
+
+from cache_utils import compartido_por_archivo
+from calculos_utils import configuracion, historico_almacen, resumen_general
+from catalogo_utils import catalogo_meses
+from db_utils import abrir_almacen, cumplimiento_por_celula, proyectos_por_celula
+from bugs_utils import comparativo_celulas, top_variaciones
+from degradados_utils import resumen_degradados
+from metricas_utils import METRICAS
+from tabla_utils import tabla_paginada
 
 st.set_page_config(layout="wide", page_title="Resumen General")
 
@@ -10,12 +17,7 @@ if "rol" not in st.session_state or st.session_state["rol"] != "admin":
     st.error("🚫 No tienes permiso para ver esta página. Por favor inicia sesión como admin.")
     st.stop()
 
-# Archivos de configuración
-ARCHIVO_PARAMETROS = "data/parametros_metricas.csv"
-ARCHIVO_CONFIGURACION_NA = "data/configuracion_na.csv"
-UPLOAD_DIR = "uploads"
-
-@st.cache_data
+@compartido_por_archivo
 def cargar_datos(path):
     """Cargar datos de métricas desde archivo Excel"""
     df = pd.read_excel(path)
@@ -37,96 +39,12 @@ def cargar_datos(path):
     
     return df
 
-def obtener_ultimo_archivo():
-    """Obtener el archivo de métricas más reciente"""
-    archivos = glob.glob(os.path.join(UPLOAD_DIR, "metricas_*.xlsx"))
-    if not archivos:
-        return None
-    archivos_ordenados = sorted(
-        archivos,
-        key=lambda x: datetime.strptime(os.path.basename(x).split("_")[1].replace(".xlsx", ""), "%Y-%m"),
-        reverse=True
-    )
-    return archivos_ordenados[0]
-
-def cargar_parametros():
-    """Cargar parámetros de calidad"""
-    if os.path.exists(ARCHIVO_PARAMETROS):
-        df_param = pd.read_csv(ARCHIVO_PARAMETROS)
-        if not df_param.empty:
-            fila = df_param.iloc[0]
-            return {
-                "security_rating": fila.get("security_rating", "A,B,C,D,E"),
-                "reliability_rating": fila.get("reliability_rating", "A,B,C,D,E"),
-                "sqale_rating": fila.get("sqale_rating", "A,B,C,D,E"),
-                "duplicated_lines_density": fila.get("duplicated_lines_density", "A,B,C,D,E"),
-                "coverage_min": float(fila.get("coverage_min", 0))
-            }
-    return {
-        "security_rating": "A,B,C,D,E",
-        "reliability_rating": "A,B,C,D,E",
-        "sqale_rating": "A,B,C,D,E",
-        "duplicated_lines_density": "A,B,C,D,E",
-        "coverage_min": 0
-    }
-
-def cargar_configuracion_na():
-    """Cargar configuración de componentes N/A"""
-    if os.path.exists(ARCHIVO_CONFIGURACION_NA):
-        df_config = pd.read_csv(ARCHIVO_CONFIGURACION_NA)
-        if not df_config.empty:
-            fila = df_config.iloc[0]
-            return {
-                "incluir_na_seguridad": fila.get("incluir_na_seguridad", False),
-                "incluir_na_confiabilidad": fila.get("incluir_na_confiabilidad", False),
-                "incluir_na_mantenibilidad": fila.get("incluir_na_mantenibilidad", False),
-                "incluir_na_cobertura": fila.get("incluir_na_cobertura", False),
-                "incluir_na_complejidad": fila.get("incluir_na_complejidad", False)
-            }
-    return {
-        "incluir_na_seguridad": False,
-        "incluir_na_confiabilidad": False,
-        "incluir_na_mantenibilidad": False,
-        "incluir_na_cobertura": False,
-        "incluir_na_complejidad": False
-    }
-
-def calcular_cumplimiento(df, columna_metrica, umbral, es_rating=True, incluir_na=False):
-    """Calcular cumplimiento de una métrica"""
-    if df.empty:
-        return 0, 0, 0.0
-    
-    if incluir_na:
-        # Incluir todos los proyectos
-        df_calc = df.copy()
-        if es_rating:
-            df_calc['cumple'] = df_calc[columna_metrica].isin(umbral)
-            df_calc['cumple'] = df_calc['cumple'].fillna(False)
-        else:
-            df_calc['cumple'] = df_calc[columna_metrica] >= umbral
-            df_calc['cumple'] = df_calc['cumple'].fillna(False)
-    else:
-        # Excluir proyectos con valores nulos
-        df_calc = df.dropna(subset=[columna_metrica]).copy()
-        if df_calc.empty:
-            return 0, 0, 0.0
-        
-        if es_rating:
-            df_calc['cumple'] = df_calc[columna_metrica].isin(umbral)
-        else:
-            df_calc['cumple'] = df_calc[columna_metrica] >= umbral
-    
-    total = len(df_calc)
-    cumplen = df_calc['cumple'].sum()
-    porcentaje = (cumplen / total * 100) if total > 0 else 0.0
-    
-    return int(cumplen), total, porcentaje
-
 # ---------- Página principal ----------
 st.title("📊 Resumen General de Cumplimiento")
 
 # Cargar último archivo
-ultimo_archivo = obtener_ultimo_archivo()
+catalogo = catalogo_meses()
+ultimo_archivo = catalogo.ultimo_archivo
 if ultimo_archivo is None:
     st.warning("⚠️ No se encontró ningún archivo de métricas en la carpeta uploads.")
     st.stop()
@@ -135,8 +53,12 @@ st.markdown(f"**📁 Archivo cargado:** {os.path.basename(ultimo_archivo)}")
 
 # Cargar datos y configuración
 df = cargar_datos(ultimo_archivo)
-parametros = cargar_parametros()
-config_na = cargar_configuracion_na()
+mes_ultimo = catalogo.ultimo_mes
+conn = abrir_almacen()
+# Misma configuración que usa precalentar.py para dejar listos los cálculos de la página
+config = configuracion()
+parametros = config["parametros"]
+config_na = config["config_na"]
 
 # Filtrar para excluir célula "obsoleta" (case-insensitive)
 df_filtrado = df[df['Celula'].str.lower() != 'obsoleta'].copy()
@@ -144,32 +66,31 @@ df_filtrado = df[df['Celula'].str.lower() != 'obsoleta'].copy()
 total_proyectos = len(df_filtrado)
 st.info(f"📋 **Total de proyectos considerados (excluyendo 'Obsoleta'):** {total_proyectos}")
 
-# Convertir parámetros a listas
-umbral_seguridad = parametros["security_rating"].split(",")
-umbral_confiabilidad = parametros["reliability_rating"].split(",")
-umbral_mantenibilidad = parametros["sqale_rating"].split(",")
-umbral_complejidad = parametros["duplicated_lines_density"].split(",")
-cobertura_min = parametros["coverage_min"]
-
-# Para cobertura, usar TODOS los proyectos (sin exclusiones)
-df_cobertura = df_filtrado.copy()
+# Etiqueta de cada métrica del registro en las tarjetas de cumplimiento
+ETIQUETAS_METRICAS = {
+    "seguridad": "🔐 Seguridad",
+    "confiabilidad": "🛡️ Confiabilidad",
+    "mantenibilidad": "🧹 Mantenibilidad",
+    "cobertura": "🧪 Cobertura de Pruebas Unitarias",
+    "complejidad": "🌀 Complejidad",
+}
 
 # ---------- Calcular cumplimiento para cada métrica ----------
 st.markdown("---")
 st.header("🎯 Estadísticas de Cumplimiento por Métrica")
 
-metricas = [
-    ("🔐 Seguridad", "security_rating", umbral_seguridad, True, config_na["incluir_na_seguridad"], df_filtrado),
-    ("🛡️ Confiabilidad", "reliability_rating", umbral_confiabilidad, True, config_na["incluir_na_confiabilidad"], df_filtrado),
-    ("🧹 Mantenibilidad", "sqale_rating", umbral_mantenibilidad, True, config_na["incluir_na_mantenibilidad"], df_filtrado),
-    ("🌀 Complejidad", "duplicated_lines_density", umbral_complejidad, True, config_na["incluir_na_complejidad"], df_filtrado),
-    ("🧪 Cobertura de Pruebas Unitarias", "coverage", cobertura_min, False, config_na["incluir_na_cobertura"], df_cobertura)
-]
-
 # Mostrar en columnas
 cols = st.columns(3)
-for idx, (nombre, columna, umbral, es_rating, incluir_na, df_metrica) in enumerate(metricas):
-    cumplen, total, porcentaje = calcular_cumplimiento(df_metrica, columna, umbral, es_rating, incluir_na)
+for idx, m in enumerate(METRICAS):
+    nombre = ETIQUETAS_METRICAS.get(m.clave, m.nombre)
+    umbral = parametros[m.parametro].split(",") if m.es_rating else parametros[m.parametro]
+    # Agregación en SQL sobre el almacén; cobertura usa TODOS los proyectos (sin exclusiones)
+    por_celula = cumplimiento_por_celula(
+        conn, mes_ultimo, m.columna, umbral, m.es_rating, config_na.get(m.clave_na, False),
+        excluir_celulas=["obsoleta"]
+    )
+    cumplen, total = int(por_celula['cumplen'].sum()), int(por_celula['total'].sum())
+    porcentaje = (cumplen / total * 100) if total > 0 else 0.0
     
     with cols[idx % 3]:
         st.metric(
@@ -179,9 +100,8 @@ for idx, (nombre, columna, umbral, es_rating, incluir_na, df_metrica) in enumera
         )
         
         # Mostrar umbral
-        if es_rating:
-            umbral_str = ", ".join(umbral) if isinstance(umbral, list) else str(umbral)
-            st.caption(f"Umbral: {umbral_str}")
+        if m.es_rating:
+            st.caption(f"Umbral: {', '.join(umbral)}")
         else:
             st.caption(f"Umbral: ≥ {umbral}%")
 
@@ -200,9 +120,12 @@ df_mostrar.columns = ['Célula', 'Proyecto', 'Seguridad', 'Confiabilidad',
 # Ordenar por célula y proyecto
 df_mostrar = df_mostrar.sort_values(['Célula', 'Proyecto'])
 
-# Mostrar tabla
-st.dataframe(
-    df_mostrar.style.format({
+# Mostrar tabla paginada (el formato se aplica solo a la página visible)
+tabla_paginada(
+    df_mostrar,
+    key="tabla_proyectos_considerados",
+    filas_por_pagina=100,
+    estilo=lambda df_pagina: df_pagina.style.format({
         'Cobertura (%)': lambda x: f"{x:.1f}" if pd.notna(x) else "N/A"
     }),
     use_container_width=True,
@@ -213,8 +136,71 @@ st.dataframe(
 st.markdown("---")
 st.header("📊 Resumen por Célula")
 
-resumen_celulas = df_filtrado.groupby('Celula').agg({
-    'NombreProyecto': 'count'
-}).rename(columns={'NombreProyecto': 'Total Proyectos'})
+resumen_celulas = proyectos_por_celula(conn, mes_ultimo, excluir_celulas=["obsoleta"])
+
+# Histórico completo para degradaciones y bugs (mismos cálculos que el detalle por célula),
+# leído del archivo Arrow con memory map que comparten todos los procesos del host
+df_historico, version_historico = historico_almacen(conn)
+conn.close()
+df_degradados, df_tendencia_bugs, df_variacion_bugs = resumen_general(df_historico, version_historico, config)
 
 st.dataframe(resumen_celulas, use_container_width=True)
+
+# Regresiones del mes en todo el portafolio
+st.markdown("---")
+st.header(f"⚠️ Componentes que Dejaron de Cumplir en {mes_ultimo}")
+
+df_degradados_mes = df_degradados[
+    (df_degradados['Mes'] == mes_ultimo) & (df_degradados['Celula'].str.lower() != 'obsoleta')
+]
+if df_degradados_mes.empty:
+    st.success(f"✅ Ningún componente dejó de cumplir sus métricas en {mes_ultimo}.")
+else:
+    st.dataframe(resumen_degradados(df_degradados_mes, mes_ultimo), use_container_width=True)
+    tabla_paginada(
+        df_degradados_mes.drop(columns=['Mes']),
+        key="tabla_degradados_mes",
+        use_container_width=True,
+        hide_index=True
+    )
+
+# Comparativo de bugs entre células
+st.markdown("---")
+st.header(f"🐛 Backlog de Bugs por Célula - {mes_ultimo}")
+
+comparativo_bugs = comparativo_celulas(df_tendencia_bugs, mes_ultimo)
+comparativo_bugs = comparativo_bugs[comparativo_bugs['Celula'].str.lower() != 'obsoleta']
+if comparativo_bugs.empty:
+    st.info("No hay datos de bugs para el último mes.")
+else:
+    st.caption("Factor de crecimiento respecto al mes anterior; % de eliminación respecto al primer enero disponible de cada célula.")
+    st.dataframe(
+        comparativo_bugs[['Celula', 'Total Bugs', 'Factor crecimiento bugs', '% eliminación backlog deuda técnica']]
+        .sort_values('Total Bugs', ascending=False)
+        .style.format({
+            'Total Bugs': "{:.0f}",
+            'Factor crecimiento bugs': lambda x: f"{x:+.0f}" if pd.notna(x) else "N/A",
+            '% eliminación backlog deuda técnica': lambda x: f"{x:.0f}%" if pd.notna(x) else "N/A"
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+# Aplicaciones que más bugs agregaron en el mes (toda la organización)
+st.subheader(f"📈 Top 10 aplicaciones con mayor incremento de bugs en {mes_ultimo}")
+top_incrementos = top_variaciones(df_variacion_bugs, n=10, mes=mes_ultimo)
+top_incrementos = top_incrementos[top_incrementos['Celula'].str.lower() != 'obsoleta']
+if top_incrementos.empty:
+    st.success("✅ Ninguna aplicación incrementó sus bugs en el último mes.")
+else:
+    st.dataframe(
+        top_incrementos[['Celula', 'NombreProyecto', 'Bugs_Mes_Anterior', 'Total_Bugs', 'Variacion_Bugs']]
+        .rename(columns={
+            'NombreProyecto': 'Aplicación',
+            'Bugs_Mes_Anterior': 'Bugs Mes Anterior',
+            'Total_Bugs': 'Bugs Actuales',
+            'Variacion_Bugs': 'Variación'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import os
 
+from cache_utils import obtener_compartido
+
 # Verificación de rol
 if "rol" not in st.session_state or st.session_state["rol"] != "admin":
     st.warning("🚫 No tienes permiso para ver esta página. Por favor inicia sesión como admin.")
@@ -11,13 +13,7 @@ ARCHIVO_SELECCION = "data/seleccion_proyectos.csv"
 CARPETA_METRICAS = "uploads"
 
 # Cargar todos los archivos metricas_*.xlsx de la carpeta uploads
-@st.cache_data
-def cargar_datos():
-    archivos = sorted([
-        f for f in os.listdir(CARPETA_METRICAS)
-        if f.startswith("metricas_") and f.endswith(".xlsx")
-    ])
-
+def leer_datos(archivos):
     if not archivos:
         return pd.DataFrame(columns=["Celula", "NombreProyecto"])
 
@@ -30,6 +26,17 @@ def cargar_datos():
     df_total = pd.concat(dfs, ignore_index=True)
     return df_total
 
+def cargar_datos():
+    # Compartido entre sesiones; se vuelve a leer cuando cambia algún archivo de uploads
+    archivos = sorted([
+        f for f in os.listdir(CARPETA_METRICAS)
+        if f.startswith("metricas_") and f.endswith(".xlsx")
+    ])
+    firma = tuple((f, os.path.getmtime(os.path.join(CARPETA_METRICAS, f))) for f in archivos)
+    return obtener_compartido(
+        CARPETA_METRICAS, lambda: leer_datos(archivos), firma, "seleccionar_proyectos.py:cargar_datos"
+    )
+
 # Cargar selección guardada
 def cargar_seleccion():
     if os.path.exists(ARCHIVO_SELECCION):
@@ -2,6 +2,9 @@ import streamlit as st
 import os
 from datetime import datetime
 
+from catalogo_utils import invalidar_catalogo
+from datos_utils import mes_de_nombre
+
 UPLOAD_DIR = "uploads"
 
 if "rol" not in st.session_state or st.session_state["rol"] != "admin":
@@ -13,8 +16,9 @@ st.title("📤 Subir nuevo archivo de métricas")
 uploaded_file = st.file_uploader("Selecciona archivo Excel de métricas", type=["xlsx"])
 
 if uploaded_file is not None:
-    # Aquí puedes pedir al usuario que seleccione el mes (opcional), si no se usa el mes actual
-    fecha_str = st.text_input("Ingresa el mes del archivo (formato YYYY-MM)", datetime.now().strftime("%Y-%m"))
+    # Mes sugerido: el del nombre del archivo si lo trae, si no el mes actual
+    mes_sugerido = mes_de_nombre(uploaded_file.name) or datetime.now().strftime("%Y-%m")
+    fecha_str = st.text_input("Ingresa el mes del archivo (formato YYYY-MM)", mes_sugerido)
 
     if fecha_str:
         try:
@@ -29,6 +33,7 @@ if uploaded_file is not None:
 
             with open(archivo_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
+            invalidar_catalogo()
 
             st.success(f"Archivo guardado correctamente como {nombre_archivo}")
 
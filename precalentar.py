@@ -0,0 +1,151 @@
+"""Precalentamiento del servidor antes de aceptar tráfico (lo ejecuta startup.sh).
+
+Uso:
+    python precalentar.py
+
+Deja listo en disco lo que las páginas leen al abrirse: bytecode de páginas y módulos,
+almacén SQLite sincronizado con uploads/ y data/, históricos Arrow compartidos, y el memo
+en disco con los cálculos que hacen las páginas (calculos_utils) para el admin y para las
+células de cada usuario. Informa el tiempo de cada etapa y cuántas entradas del memo dejó listas.
+"""
+import compileall
+import sys
+import time
+
+ETAPAS = []
+
+
+def etapa(nombre):
+    """Registra una función como etapa del precalentamiento (se ejecutan en orden)."""
+    def registrar(funcion):
+        ETAPAS.append((nombre, funcion))
+        return funcion
+    return registrar
+
+
+@etapa("Bytecode de páginas y módulos")
+def compilar():
+    ok = all(compileall.compile_dir(d, maxlevels=0, quiet=1) for d in [".", "pages"])
+    return "compilado" if ok else "con errores de compilación"
+
+
+@etapa("Almacén SQLite")
+def sincronizar_almacen():
+    from db_utils import abrir_almacen, meses_disponibles
+
+    conn = abrir_almacen()
+    try:
+        return f"{len(meses_disponibles(conn))} meses"
+    finally:
+        conn.close()
+
+
+@etapa("Históricos Arrow")
+def historico():
+    from catalogo_utils import catalogo_meses
+    from db_utils import conectar
+    from historico_utils import (
+        RUTA_HISTORICO,
+        RUTA_HISTORICO_ARCHIVOS,
+        abrir_historico,
+        asegurar_historico,
+        asegurar_historico_archivos,
+    )
+
+    conn = conectar()
+    try:
+        asegurar_historico(conn)
+    finally:
+        conn.close()
+    asegurar_historico_archivos(catalogo_meses().firma)
+    return ", ".join(f"{abrir_historico(ruta).num_rows} filas en {ruta}"
+                     for ruta in (RUTA_HISTORICO, RUTA_HISTORICO_ARCHIVOS))
+
+
+def _conjuntos_de_celulas():
+    """None (admin: todas) y las células de cada usuario, como las carga celulas_a_cargar()."""
+    from auth_utils import celulas_desde_usuario
+    from usuarios_utils import cargar_usuarios
+
+    conjuntos = {None: None}
+    for usuario in cargar_usuarios().values():
+        celulas = celulas_desde_usuario(usuario)
+        if usuario.get("rol") == "usuario" and celulas:
+            conjuntos.setdefault(tuple(sorted(set(celulas))), celulas)
+    return list(conjuntos.values())
+
+
+@etapa("Cálculos de las páginas (memo en disco)")
+def calculos_paginas():
+    """Las mismas llamadas de resumen general, resumen anual y detalle, con sus argumentos."""
+    from bugs_utils import COLUMNAS_BUGS_BACKLOG, bases_disponibles, tendencia_bugs
+    from calculos_utils import (
+        bugs_de_celula,
+        configuracion,
+        degradados_de,
+        historico_almacen,
+        okr_de_celula,
+        resumen_general,
+        variacion_bugs_de,
+    )
+    from db_utils import abrir_almacen
+    from historico_utils import historico_archivos
+    from memo_utils import contadores_memo
+
+    antes = contadores_memo()
+    config = configuracion()
+
+    conn = abrir_almacen()
+    try:
+        df_historico, version = historico_almacen(conn)
+    finally:
+        conn.close()
+    resumen_general(df_historico, version, config)
+
+    for celulas in _conjuntos_de_celulas():
+        df_historico = historico_archivos(celulas)
+        if df_historico.empty:
+            continue
+        degradados_de(df_historico, celulas, config)
+        variacion_bugs_de(df_historico, celulas)
+
+    # Los cálculos por célula comparten entrada entre el admin y los usuarios de esa célula
+    df_historico = historico_archivos()
+    columnas_bugs = [col for col in COLUMNAS_BUGS_BACKLOG if col in df_historico.columns]
+    for celula in df_historico["Celula"].dropna().unique():
+        okr_de_celula(df_historico, celula, config)
+        bugs = bugs_de_celula(df_historico, celula, columnas_bugs)
+        if not bugs.empty:
+            # La base que el detalle muestra por defecto
+            tendencia_bugs(bugs, base=bases_disponibles(bugs)[0])
+
+    despues = contadores_memo()
+    calculadas = despues["guardados"] - antes["guardados"]
+    vigentes = despues["aciertos"] - antes["aciertos"]
+    return f"{calculadas} entradas calculadas y guardadas, {vigentes} ya estaban en disco"
+
+
+def precalentar(etapas=None):
+    """Ejecuta las etapas y devuelve [(nombre, segundos, detalle, ok)]."""
+    resultados = []
+    for nombre, funcion in etapas or ETAPAS:
+        inicio = time.perf_counter()
+        try:
+            detalle, ok = funcion(), True
+        except Exception as e:
+            detalle, ok = f"{type(e).__name__}: {e}", False
+        resultados.append((nombre, time.perf_counter() - inicio, detalle, ok))
+    return resultados
+
+
+def main():
+    print("🔥 Precalentando...")
+    resultados = precalentar()
+    for nombre, segundos, detalle, ok in resultados:
+        print(f"  {'✔️' if ok else '❌'} {segundos:7.2f} s  {nombre}: {detalle}")
+    print(f"Total: {sum(r[1] for r in resultados):.2f} s")
+    return 0 if all(r[3] for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
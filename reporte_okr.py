@@ -0,0 +1,137 @@
+"""Reporte anual de OKR, bugs y degradaciones de todas las células, sin el servidor de Streamlit.
+
+Uso:
+    python reporte_okr.py                                  # año más reciente -> reporte_okr_<año>.xlsx
+    python reporte_okr.py --anio 2025 --salida reportes/okr_2025.html
+
+Lee el histórico del almacén (data/sonarqube.db, sincronizado con uploads/) y la
+configuración de data/, igual que las páginas del dashboard.
+"""
+import argparse
+import html
+import os
+import sys
+
+import pandas as pd
+
+from bugs_utils import bugs_mensuales, tendencia_bugs
+from config_utils import (
+    cargar_configuracion_metricas,
+    cargar_configuracion_na,
+    cargar_metas,
+    cargar_parametros,
+    cargar_seleccion,
+)
+from db_utils import abrir_almacen
+from degradados_utils import calcular_degradados
+from exclusiones_utils import cargar_reglas_exclusion
+from export_utils import generar_excel
+from historico_utils import asegurar_historico, leer_historico
+from metricas_utils import metricas_okr
+from okr_utils import okr_mensual, resumen_okr_anual, ventanas_okr
+
+
+def cargar_historico():
+    """(histórico completo del almacén sin la célula 'Obsoleta' ni filas sin célula, versión de los datos)."""
+    conn = abrir_almacen()
+    try:
+        firma = asegurar_historico(conn)
+    finally:
+        conn.close()
+    df = leer_historico()
+    return df[df["Celula"].notna() & (df["Celula"].str.lower() != "obsoleta")], ("historico.arrow", firma, "sin obsoleta")
+
+
+def _formatear_mes(df, columna="Mes"):
+    df = df.copy()
+    df[columna] = pd.to_datetime(df[columna]).dt.strftime("%Y-%m")
+    return df
+
+
+def construir_hojas(df_historico, anio=None, version_datos=None):
+    """{nombre_hoja: DataFrame} del reporte; devuelve también el año reportado.
+
+    `version_datos` (la de cargar_historico) identifica el histórico en el memo en disco.
+    """
+    parametros = cargar_parametros()
+    config_na = cargar_configuracion_na()
+    config_metricas = cargar_configuracion_metricas()
+    seleccion = cargar_seleccion()
+    reglas_exclusion = cargar_reglas_exclusion()
+
+    okr = ventanas_okr(okr_mensual(
+        df_historico, parametros, cargar_metas(), config_na, config_metricas,
+        seleccion, reglas_exclusion, version_datos=version_datos
+    ))
+    anio = int(anio or okr["Mes"].dt.year.max())
+    okr_anio = okr[okr["Mes"].dt.year == anio]
+
+    okr_por_mes = okr_anio.pivot(index=["Celula", "Mes"], columns="Métrica", values="OKR (%)")
+    okr_por_mes = okr_por_mes[[m.nombre for m in metricas_okr() if m.nombre in okr_por_mes.columns]]
+    okr_por_mes.columns = [f"{metrica} OKR (%)" for metrica in okr_por_mes.columns]
+
+    tendencia = tendencia_bugs(bugs_mensuales(df_historico, version_datos=version_datos))
+    tendencia = tendencia[tendencia["Mes"].dt.year == anio]
+
+    degradados = calcular_degradados(
+        df_historico, parametros, config_na, config_metricas, seleccion, reglas_exclusion,
+        version_datos=version_datos
+    )
+    degradados = degradados[degradados["Mes"].str.startswith(f"{anio}-")]
+
+    hojas = {
+        "Resumen OKR": resumen_okr_anual(okr, anio),
+        "OKR mensual": _formatear_mes(okr_por_mes.reset_index()),
+        "OKR ventanas": _formatear_mes(okr_anio),
+        "Bugs": _formatear_mes(tendencia),
+        "Degradaciones": degradados.reset_index(drop=True),
+    }
+    return hojas, anio
+
+
+def escribir_html(hojas, path, titulo):
+    """Escribe las hojas como tablas de un solo archivo HTML."""
+    partes = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(titulo)}</title></head><body>",
+        f"<h1>{html.escape(titulo)}</h1>",
+    ]
+    for nombre, df in hojas.items():
+        partes.append(f"<h2>{html.escape(nombre)}</h2>")
+        partes.append(df.to_html(index=False, na_rep="N/A", float_format=lambda x: f"{x:.0f}", border=1))
+    partes.append("</body></html>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(partes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el reporte anual de OKR de todas las células.")
+    parser.add_argument("--anio", type=int, help="Año a reportar (por defecto el más reciente con datos)")
+    parser.add_argument("--salida", help="Archivo .xlsx o .html (por defecto reporte_okr_<año>.xlsx)")
+    args = parser.parse_args(argv)
+
+    df_historico, version_datos = cargar_historico()
+    if df_historico.empty:
+        print("⚠️ No hay datos en el almacén. Carga archivos de métricas en uploads/.")
+        return 1
+    if args.anio and not (df_historico["Mes"].dt.year == args.anio).any():
+        print(f"⚠️ No hay datos para el año {args.anio}.")
+        return 1
+
+    hojas, anio = construir_hojas(df_historico, args.anio, version_datos)
+    salida = args.salida or f"reporte_okr_{anio}.xlsx"
+    carpeta = os.path.dirname(salida)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+
+    if salida.lower().endswith((".html", ".htm")):
+        escribir_html(hojas, salida, f"Reporte anual de OKR {anio}")
+    else:
+        with open(salida, "wb") as f:
+            f.write(generar_excel(hojas))
+    print(f"✔️ Reporte {anio} generado en {salida} ({len(hojas['Resumen OKR'])} células).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
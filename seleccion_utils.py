@@ -0,0 +1,20 @@
+import pandas as pd
+
+
+def indice_seleccion(proyectos_seleccionados):
+    """MultiIndex (Celula, NombreProyecto) con los proyectos seleccionados de cada célula."""
+    celulas, proyectos = [], []
+    for celula, lista in (proyectos_seleccionados or {}).items():
+        celulas.extend([celula] * len(lista))
+        proyectos.extend(lista)
+    return pd.MultiIndex.from_arrays([celulas, proyectos], names=["Celula", "NombreProyecto"])
+
+
+def marcar_seleccionados(df, indice):
+    """Agrega la columna booleana 'seleccionado' comparando (Celula, NombreProyecto) contra el índice."""
+    if df.empty:
+        df["seleccionado"] = pd.Series(dtype=bool)
+        return df
+    pares = pd.MultiIndex.from_frame(df[["Celula", "NombreProyecto"]])
+    df["seleccionado"] = pares.isin(indice)
+    return df
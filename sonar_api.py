@@ -0,0 +1,228 @@
+"""Descarga las métricas del mes directamente de la Web API de SonarQube.
+
+Uso:
+    SONAR_URL=https://sonar.empresa.com SONAR_TOKEN=... python sonar_api.py --mes 2026-07
+    python sonar_api.py --url http://127.0.0.1:9000 --simular      # contra sonar_stub.py
+
+Recorre api/components/search (proyectos) y api/measures/search / api/issues/search
+(medidas y bugs por severidad) con una sesión HTTP con pool de conexiones, consultas
+concurrentes y reintentos. El resultado se guarda como uploads/metricas_YYYY-MM.xlsx
+(mismas columnas que las exportaciones manuales) y se importa normalizado al almacén.
+La célula de cada proyecto se toma del último mes cargado en el almacén.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from catalogo_utils import invalidar_catalogo
+from datos_utils import UPLOAD_DIR, normalizar_metricas
+from db_utils import COLUMNAS_ARCHIVO_MES, celulas_por_proyecto, conectar, importar_archivo_mes
+from export_utils import MOTOR_EXCEL
+
+METRICAS_SONAR = [
+    "security_rating", "reliability_rating", "sqale_rating", "coverage", "duplicated_lines_density", "bugs",
+]
+COLUMNAS_RATING_SONAR = ["security_rating", "reliability_rating", "sqale_rating"]
+SEVERIDADES_BUGS = {
+    "BLOCKER": "bugs_blocker",
+    "CRITICAL": "bugs_critical",
+    "MAJOR": "bugs_major",
+    "MINOR": "bugs_minor",
+    "INFO": "bugs_info",
+}
+
+# SonarQube entrega los ratings como 1.0-5.0
+LETRAS_RATING = {1: "A", 2: "B", 3: "C", 4: "D", 5: "E"}
+
+# duplicated_lines_density llega como % de líneas duplicadas; los archivos guardan la letra
+# (A < 3%, B < 5%, C < 10%, D < 20%, E el resto)
+LIMITES_DUPLICACION = [3, 5, 10, 20]
+
+TAMANO_PAGINA = 500
+# Claves de proyecto por consulta (la API acepta hasta 100 en projectKeys)
+CLAVES_POR_CONSULTA = 50
+
+
+class ClienteSonar:
+    """Cliente de la Web API con sesión compartida, pool de conexiones y reintentos."""
+
+    def __init__(self, url, token=None, trabajadores=8, reintentos=5, timeout=30):
+        self.url = url.rstrip("/")
+        self.trabajadores = trabajadores
+        self.timeout = timeout
+        self.sesion = requests.Session()
+        if token:
+            # Convención de SonarQube: el token va como usuario con contraseña vacía
+            self.sesion.auth = (token, "")
+        reintento = Retry(
+            total=reintentos,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+        )
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=trabajadores, max_retries=reintento)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+
+    def cerrar(self):
+        self.sesion.close()
+
+    def _get(self, ruta, **params):
+        respuesta = self.sesion.get(f"{self.url}/{ruta}", params=params, timeout=self.timeout)
+        respuesta.raise_for_status()
+        return respuesta.json()
+
+    def _en_paralelo(self, funcion, elementos):
+        with ThreadPoolExecutor(max_workers=self.trabajadores) as pool:
+            return list(pool.map(funcion, elementos))
+
+    def proyectos(self):
+        """DataFrame con key y name de todos los proyectos; la primera página da el total."""
+        primera = self._get("api/components/search", qualifiers="TRK", ps=TAMANO_PAGINA, p=1)
+        total = primera["paging"]["total"]
+        paginas = range(2, -(-total // TAMANO_PAGINA) + 1)
+        resto = self._en_paralelo(
+            lambda p: self._get("api/components/search", qualifiers="TRK", ps=TAMANO_PAGINA, p=p),
+            paginas,
+        )
+        componentes = [c for pagina in [primera] + resto for c in pagina["components"]]
+        return pd.DataFrame(componentes, columns=["key", "name"]).drop_duplicates("key")
+
+    def medidas(self, claves):
+        """Valores crudos (texto) de METRICAS_SONAR: una fila por clave de proyecto."""
+        def consultar(lote):
+            datos = self._get(
+                "api/measures/search", projectKeys=",".join(lote), metricKeys=",".join(METRICAS_SONAR)
+            )
+            return datos["measures"]
+
+        medidas = [m for lote in self._en_paralelo(consultar, _lotes(claves)) for m in lote]
+        if not medidas:
+            return pd.DataFrame(index=pd.Index(claves, name="key"), columns=METRICAS_SONAR)
+        df = pd.DataFrame(medidas)
+        return df.pivot(index="component", columns="metric", values="value").reindex(
+            index=claves, columns=METRICAS_SONAR
+        ).rename_axis("key")
+
+    def bugs_por_severidad(self, claves):
+        """Bugs abiertos por severidad (faceta 'projects' de api/issues/search por lote y severidad)."""
+        def consultar(tarea):
+            lote, severidad = tarea
+            datos = self._get(
+                "api/issues/search", componentKeys=",".join(lote), types="BUG", resolved="false",
+                severities=severidad, facets="projects", ps=1,
+            )
+            faceta = next((f for f in datos.get("facets", []) if f["property"] == "projects"), {"values": []})
+            return {(v["val"], SEVERIDADES_BUGS[severidad]): v["count"] for v in faceta["values"]}
+
+        tareas = [(lote, severidad) for lote in _lotes(claves) for severidad in SEVERIDADES_BUGS]
+        conteos = {}
+        for parcial in self._en_paralelo(consultar, tareas):
+            conteos.update(parcial)
+        df = pd.Series(conteos, dtype="float64").unstack() if conteos else pd.DataFrame()
+        return df.reindex(index=claves, columns=list(SEVERIDADES_BUGS.values())).fillna(0).rename_axis("key")
+
+
+def _lotes(claves):
+    return [claves[i:i + CLAVES_POR_CONSULTA] for i in range(0, len(claves), CLAVES_POR_CONSULTA)]
+
+
+def _rating_a_letra(valores):
+    return pd.to_numeric(valores, errors="coerce").round().map(LETRAS_RATING)
+
+
+def _duplicacion_a_letra(valores):
+    porcentajes = pd.to_numeric(valores, errors="coerce")
+    letras = pd.cut(porcentajes, [-float("inf")] + LIMITES_DUPLICACION + [float("inf")],
+                    right=False, labels=list("ABCDE"))
+    return letras.astype(object).where(porcentajes.notna())
+
+
+def descargar_mes(cliente, mes, celulas=None):
+    """Métricas de todos los proyectos con las columnas de uploads/metricas_YYYY-MM.xlsx."""
+    proyectos = cliente.proyectos()
+    claves = proyectos["key"].tolist()
+    medidas = cliente.medidas(claves)
+    bugs = cliente.bugs_por_severidad(claves)
+
+    df = proyectos.set_index("key").join(medidas).join(bugs).reset_index(drop=True)
+    df = df.rename(columns={"name": "NombreProyecto"})
+    for col in COLUMNAS_RATING_SONAR:
+        df[col] = _rating_a_letra(df[col])
+    df["duplicated_lines_density"] = _duplicacion_a_letra(df["duplicated_lines_density"])
+    df["coverage"] = pd.to_numeric(df["coverage"], errors="coerce")
+    df["bugs"] = pd.to_numeric(df["bugs"], errors="coerce")
+    df["Celula"] = df["NombreProyecto"].map(celulas or {})
+    df["Mes"] = mes
+    return df[COLUMNAS_ARCHIVO_MES]
+
+
+def guardar_mes(df, mes, forzar=False):
+    """Escribe uploads/metricas_YYYY-MM.xlsx e importa el mes al almacén; False si ya existía."""
+    destino = os.path.join(UPLOAD_DIR, f"metricas_{mes}.xlsx")
+    if os.path.exists(destino) and not forzar:
+        return False
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    df.to_excel(destino, index=False, engine=MOTOR_EXCEL)
+    invalidar_catalogo()
+    conn = conectar()
+    try:
+        with conn:
+            importar_archivo_mes(conn, destino, normalizar_metricas(df, mes), mes)
+    finally:
+        conn.close()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga las métricas del mes desde SonarQube.")
+    parser.add_argument("--url", default=os.environ.get("SONAR_URL"), help="URL base (o variable SONAR_URL)")
+    parser.add_argument("--token", default=os.environ.get("SONAR_TOKEN"), help="Token (o variable SONAR_TOKEN)")
+    parser.add_argument("--mes", default=datetime.now().strftime("%Y-%m"), help="Mes a guardar (YYYY-MM)")
+    parser.add_argument("--trabajadores", type=int, default=8, help="Consultas simultáneas")
+    parser.add_argument("--forzar", action="store_true", help="Reemplaza el mes si ya existe en uploads/")
+    parser.add_argument("--simular", action="store_true", help="Descarga y muestra el resumen sin guardar")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        parser.error("indica --url o la variable de entorno SONAR_URL")
+    try:
+        datetime.strptime(args.mes, "%Y-%m")
+    except ValueError:
+        parser.error("formato de mes inválido. Usa YYYY-MM, por ejemplo: 2025-05")
+
+    conn = conectar()
+    try:
+        celulas = celulas_por_proyecto(conn)
+    finally:
+        conn.close()
+
+    cliente = ClienteSonar(args.url, args.token, trabajadores=args.trabajadores)
+    try:
+        df = descargar_mes(cliente, args.mes, celulas)
+    except requests.RequestException as e:
+        print(f"❌ Error consultando SonarQube: {e}")
+        return 1
+    finally:
+        cliente.cerrar()
+
+    sin_celula = int(df["Celula"].isna().sum())
+    print(f"{len(df)} proyectos descargados para {args.mes} ({sin_celula} sin célula asignada).")
+    if args.simular:
+        return 0
+    if not guardar_mes(df, args.mes, args.forzar):
+        print(f"⚠️ El mes {args.mes} ya existe en uploads (usa --forzar para reemplazarlo).")
+        return 1
+    print(f"✔️ Guardado como metricas_{args.mes}.xlsx e importado al almacén.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Servidor local que imita las rutas de la Web API de SonarQube que usa sonar_api.py.
+
+Uso:
+    python sonar_stub.py --puerto 9000 --desde uploads/metricas_2026-06.xlsx
+    python sonar_stub.py --puerto 9000 --proyectos 800 --fallos 0.1   # datos sintéticos, 10% de 503
+
+Sirve api/components/search, api/measures/search y api/issues/search con paginación y
+faceta 'projects' a partir de un archivo de métricas existente o de datos sintéticos, para
+probar la descarga sin acceso a SonarQube. `iniciar_stub` lo levanta en un hilo.
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from sonar_api import LETRAS_RATING, SEVERIDADES_BUGS
+
+NUMERO_RATING = {letra: float(n) for n, letra in LETRAS_RATING.items()}
+# Porcentaje representativo de cada letra de duplicación (ver LIMITES_DUPLICACION)
+PORCENTAJE_DUPLICACION = {"A": 1.0, "B": 4.0, "C": 7.5, "D": 15.0, "E": 30.0}
+
+
+def proyectos_desde_archivo(path):
+    """Proyectos del stub con los valores de un archivo metricas_YYYY-MM.xlsx."""
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    df = df.dropna(subset=["NombreProyecto"]).drop_duplicates("NombreProyecto")
+    proyectos = []
+    for fila in df.to_dict("records"):
+        medidas = {
+            col: NUMERO_RATING.get(str(fila.get(col)).strip().upper())
+            for col in ["security_rating", "reliability_rating", "sqale_rating"]
+        }
+        medidas["duplicated_lines_density"] = PORCENTAJE_DUPLICACION.get(
+            str(fila.get("duplicated_lines_density")).strip().upper()
+        )
+        cobertura = pd.to_numeric(fila.get("coverage"), errors="coerce")
+        medidas["coverage"] = None if pd.isna(cobertura) else float(cobertura)
+        bugs = {sev: pd.to_numeric(fila.get(col), errors="coerce") for sev, col in SEVERIDADES_BUGS.items()}
+        bugs = {sev: 0 if pd.isna(n) else int(n) for sev, n in bugs.items()}
+        medidas["bugs"] = sum(bugs.values())
+        proyectos.append({"key": fila["NombreProyecto"], "name": fila["NombreProyecto"],
+                          "medidas": medidas, "bugs": bugs})
+    return proyectos
+
+
+def proyectos_sinteticos(cantidad, semilla=0):
+    azar = random.Random(semilla)
+    proyectos = []
+    for i in range(cantidad):
+        bugs = {sev: azar.choice([0, 0, 0, 1, 2, 5]) for sev in SEVERIDADES_BUGS}
+        medidas = {
+            "security_rating": float(azar.randint(1, 5)),
+            "reliability_rating": float(azar.randint(1, 5)),
+            "sqale_rating": float(azar.randint(1, 5)),
+            "coverage": round(azar.uniform(0, 100), 1) if azar.random() > 0.1 else None,
+            "duplicated_lines_density": round(azar.uniform(0, 30), 1),
+            "bugs": sum(bugs.values()),
+        }
+        nombre = f"Proyecto{i:04d}:Quality"
+        proyectos.append({"key": nombre, "name": nombre, "medidas": medidas, "bugs": bugs})
+    return proyectos
+
+
+def crear_servidor(proyectos, puerto=0, fallos=0.0):
+    """ThreadingHTTPServer con las rutas del stub (puerto 0 = libre)."""
+    por_clave = {p["key"]: p for p in proyectos}
+    azar = random.Random(1)
+
+    class Manejador(BaseHTTPRequestHandler):
+        def log_message(self, formato, *args):
+            pass
+
+        def _responder(self, estado, cuerpo):
+            datos = json.dumps(cuerpo).encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if fallos and azar.random() < fallos:
+                return self._responder(503, {"errors": [{"msg": "stub: fallo simulado"}]})
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            ruta = {
+                "/api/components/search": self._componentes,
+                "/api/measures/search": self._medidas,
+                "/api/issues/search": self._issues,
+            }.get(url.path)
+            if ruta is None:
+                return self._responder(404, {"errors": [{"msg": f"ruta desconocida: {url.path}"}]})
+            self._responder(200, ruta(params))
+
+        def _componentes(self, params):
+            ps, p = int(params.get("ps", 100)), int(params.get("p", 1))
+            pagina = proyectos[(p - 1) * ps:p * ps]
+            return {
+                "paging": {"pageIndex": p, "pageSize": ps, "total": len(proyectos)},
+                "components": [{"key": x["key"], "name": x["name"], "qualifier": "TRK"} for x in pagina],
+            }
+
+        def _medidas(self, params):
+            claves = params.get("projectKeys", "").split(",")
+            metricas = params.get("metricKeys", "").split(",")
+            return {"measures": [
+                {"metric": m, "value": str(por_clave[k]["medidas"][m]), "component": k}
+                for k in claves if k in por_clave
+                for m in metricas if por_clave[k]["medidas"].get(m) is not None
+            ]}
+
+        def _issues(self, params):
+            claves = [k for k in params.get("componentKeys", "").split(",") if k in por_clave]
+            severidades = params.get("severities", ",".join(SEVERIDADES_BUGS)).split(",")
+            conteos = {k: sum(por_clave[k]["bugs"].get(s, 0) for s in severidades) for k in claves}
+            return {
+                "total": sum(conteos.values()),
+                "issues": [],
+                "facets": [{"property": "projects",
+                            "values": [{"val": k, "count": n} for k, n in conteos.items() if n]}],
+            }
+
+    return ThreadingHTTPServer(("127.0.0.1", puerto), Manejador)
+
+
+def iniciar_stub(proyectos, puerto=0, fallos=0.0):
+    """Levanta el stub en un hilo y devuelve (servidor, url); detener con servidor.shutdown()."""
+    servidor = crear_servidor(proyectos, puerto, fallos)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub local de la Web API de SonarQube.")
+    parser.add_argument("--puerto", type=int, default=9000)
+    parser.add_argument("--desde", help="Archivo metricas_YYYY-MM.xlsx con los datos a servir")
+    parser.add_argument("--proyectos", type=int, default=500, help="Proyectos sintéticos si no se usa --desde")
+    parser.add_argument("--fallos", type=float, default=0.0, help="Fracción de respuestas 503 simuladas")
+    args = parser.parse_args(argv)
+
+    proyectos = proyectos_desde_archivo(args.desde) if args.desde else proyectos_sinteticos(args.proyectos)
+    servidor = crear_servidor(proyectos, args.puerto, args.fallos)
+    print(f"Stub de SonarQube en http://127.0.0.1:{servidor.server_port} ({len(proyectos)} proyectos)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,5 @@
 #!/bin/bash
+# Precalentamiento (bytecode, almacén, históricos Arrow compartidos y cálculos de las páginas) antes de abrir el puerto;
+# si falla, la app arranca igual y las páginas muestran sus propios avisos
+python precalentar.py || echo "⚠️ Precalentamiento incompleto"
 streamlit run app.py --server.port $PORT --server.address 0.0.0.0
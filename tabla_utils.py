@@ -0,0 +1,63 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+OPCIONES_FILAS_POR_PAGINA = [25, 50, 100, 250]
+SIN_ORDEN = "(sin orden)"
+
+
+def posiciones_ordenadas(df, columna, descendente=False):
+    """Posiciones de las filas ordenadas por una columna (NaN al final), sin reordenar el DataFrame."""
+    serie = df[columna].reset_index(drop=True)
+    try:
+        serie = serie.sort_values(ascending=not descendente, kind="stable", na_position="last")
+    except TypeError:
+        # Columnas mixtas (números y textos como 'N/A'): ordenar como texto
+        serie = serie.astype(str).sort_values(ascending=not descendente, kind="stable")
+    return serie.index.to_numpy()
+
+
+def tabla_paginada(df, key, filas_por_pagina=50, estilo=None, pie=None, ordenable=True, **kwargs):
+    """Muestra un DataFrame con paginación del lado del servidor.
+
+    Solo se envía al navegador la página visible: se ordena una columna, se toman las
+    filas de la página y recién entonces se aplica estilo(df_pagina) (que debe devolver
+    un Styler o un DataFrame). pie son filas fijas (totales, promedios) que se agregan al
+    final de cada página. Las tablas que caben en una página se muestran como siempre.
+    """
+    if len(df) <= filas_por_pagina:
+        df_pagina = df if pie is None else pd.concat([df, pie], ignore_index=True)
+        st.dataframe(estilo(df_pagina) if estilo else df_pagina, **kwargs)
+        return df_pagina
+
+    opciones_tam = sorted(set(OPCIONES_FILAS_POR_PAGINA) | {filas_por_pagina})
+    col_orden, col_dir, col_tam, col_pag = st.columns([3, 2, 2, 2])
+    orden = SIN_ORDEN
+    descendente = False
+    if ordenable:
+        orden = col_orden.selectbox("Ordenar por", [SIN_ORDEN] + list(df.columns), key=f"{key}_orden")
+        descendente = col_dir.radio("Dirección", ["Asc", "Desc"], horizontal=True, key=f"{key}_dir") == "Desc"
+    tam = col_tam.selectbox(
+        "Filas por página", opciones_tam, index=opciones_tam.index(filas_por_pagina), key=f"{key}_tam"
+    )
+
+    total = len(df)
+    n_paginas = max(1, math.ceil(total / tam))
+    clave_pagina = f"{key}_pagina"
+    if st.session_state.get(clave_pagina, 1) > n_paginas:
+        st.session_state[clave_pagina] = n_paginas
+    pagina = col_pag.number_input("Página", min_value=1, max_value=n_paginas, step=1, key=clave_pagina)
+
+    inicio = (int(pagina) - 1) * tam
+    fin = min(inicio + tam, total)
+    if orden != SIN_ORDEN:
+        df_pagina = df.iloc[posiciones_ordenadas(df, orden, descendente)[inicio:fin]]
+    else:
+        df_pagina = df.iloc[inicio:fin]
+    if pie is not None:
+        df_pagina = pd.concat([df_pagina, pie], ignore_index=True)
+
+    st.dataframe(estilo(df_pagina) if estilo else df_pagina, **kwargs)
+    st.caption(f"Filas {inicio + 1}–{fin} de {total} · página {int(pagina)} de {n_paginas}")
+    return df_pagina
@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+USUARIOS_FILE = "usuarios.json"
+
+# Verificaciones bcrypt simultáneas: el resto de la ráfaga espera en cola en vez de
+# ocupar todos los núcleos y frenar los reruns de los demás usuarios.
+MAX_VERIFICACIONES_SIMULTANEAS = 2
+
+# Límite de intentos fallidos dentro de la ventana (segundos): por usuario desde una IP y,
+# mucho más alto, por IP sola (detrás de un NAT comparten IP todos los de una oficina)
+MAX_INTENTOS_FALLIDOS = 5
+MAX_INTENTOS_POR_IP = 50
+VENTANA_INTENTOS = 300
+
+_ejecutor_bcrypt = ThreadPoolExecutor(
+    max_workers=MAX_VERIFICACIONES_SIMULTANEAS, thread_name_prefix="bcrypt"
+)
+
+_cache_usuarios = {"mtime": None, "usuarios": {}}
+_lock_usuarios = threading.Lock()
+
+
+# ---------------------- Usuarios ----------------------
+
+def cargar_usuarios():
+    """Devuelve los usuarios de usuarios.json, releyendo el archivo solo si cambió su mtime."""
+    try:
+        mtime = os.stat(USUARIOS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _lock_usuarios:
+        if _cache_usuarios["mtime"] != mtime:
+            with open(USUARIOS_FILE, "r") as f:
+                _cache_usuarios["usuarios"] = json.load(f)
+            _cache_usuarios["mtime"] = mtime
+        return dict(_cache_usuarios["usuarios"])
+
+
+def verificar_password(password, hashed):
+    """Ejecuta bcrypt.checkpw en el pool dedicado, fuera del hilo del script."""
+    futuro = _ejecutor_bcrypt.submit(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+    return futuro.result()
+
+
+# ---------------------- Límite de intentos ----------------------
+
+class LimitadorIntentos:
+    """Cuenta intentos fallidos por clave (usuario o IP) en una ventana deslizante."""
+
+    def __init__(self, max_intentos=MAX_INTENTOS_FALLIDOS, ventana=VENTANA_INTENTOS):
+        self.max_intentos = max_intentos
+        self.ventana = ventana
+        self._fallos = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _purgar(self, clave, ahora):
+        fallos = self._fallos[clave]
+        while fallos and ahora - fallos[0] > self.ventana:
+            fallos.popleft()
+        if not fallos:
+            del self._fallos[clave]
+        return fallos
+
+    def segundos_bloqueo(self, *claves):
+        """Segundos que faltan para desbloquear la clave más restringida (0 si ninguna lo está)."""
+        ahora = time.monotonic()
+        espera = 0
+        with self._lock:
+            for clave in claves:
+                if clave is None or clave not in self._fallos:
+                    continue
+                fallos = self._purgar(clave, ahora)
+                if len(fallos) >= self.max_intentos:
+                    espera = max(espera, self.ventana - (ahora - fallos[0]))
+        return math.ceil(espera)
+
+    def registrar_fallo(self, *claves):
+        ahora = time.monotonic()
+        with self._lock:
+            # Se olvidan las claves cuyo último fallo ya salió de la ventana
+            vencidas = [c for c, fallos in self._fallos.items() if ahora - fallos[-1] > self.ventana]
+            for clave in vencidas:
+                del self._fallos[clave]
+            for clave in claves:
+                if clave is not None:
+                    self._fallos[clave].append(ahora)
+
+    def reiniciar(self, *claves):
+        with self._lock:
+            for clave in claves:
+                self._fallos.pop(clave, None)
+
+
+limitador_login = LimitadorIntentos()
+limitador_ip = LimitadorIntentos(max_intentos=MAX_INTENTOS_POR_IP)
+
+
+def claves_limite(username, ip=None):
+    """(clave del usuario desde esa IP, clave de la IP o None si no se conoce)."""
+    usuario = f"usuario:{username.strip().lower()}"
+    if not ip:
+        return usuario, None
+    return f"{usuario}|ip:{ip}", f"ip:{ip}"
+
+
+def segundos_bloqueo_login(username, ip=None):
+    """Segundos de espera antes de otro intento de login (0 si se puede intentar ya)."""
+    clave_usuario, clave_ip = claves_limite(username, ip)
+    return max(limitador_login.segundos_bloqueo(clave_usuario), limitador_ip.segundos_bloqueo(clave_ip))
+
+
+def registrar_fallo_login(username, ip=None):
+    clave_usuario, clave_ip = claves_limite(username, ip)
+    limitador_login.registrar_fallo(clave_usuario)
+    limitador_ip.registrar_fallo(clave_ip)
+
+
+def reiniciar_login(username, ip=None):
+    """Login exitoso: borra los fallos del usuario desde esa IP y los de la IP."""
+    clave_usuario, clave_ip = claves_limite(username, ip)
+    limitador_login.reiniciar(clave_usuario)
+    limitador_ip.reiniciar(clave_ip)